@@ -0,0 +1,223 @@
+from pathlib import Path
+
+import numpy as np
+
+from ledger import LedgerError
+
+# Столбцы, которые сохраняются на диск (.npy рядом с историей) и в state()
+ARRAY_FIELDS = ('balances', 'start', 'positions', 'cost', 'realized', 'trades')
+
+
+class AccountRegistry:
+    # Много счетов на одном рынке. Состояние хранится столбцами: вектор балансов и
+    # матрица позиций счета × монеты, поэтому оценка всех счетов — одно умножение на вектор цен.
+    # Себестоимость ведётся по средней цене (матрица cost), без FIFO-лотов на каждый счёт.
+
+    def __init__(self, symbols, balance=10000.0, capacity=1024):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.start_balance = float(balance)
+        self.names = []
+        self.ids = {}
+        self.count = 0
+        self.version = 0
+        self.prices = None
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        n = len(self.symbols)
+        self.balances = np.zeros(capacity)
+        self.start = np.zeros(capacity)
+        self.positions = np.zeros((capacity, n))
+        self.cost = np.zeros((capacity, n))
+        self.realized = np.zeros(capacity)
+        self.trades = np.zeros(capacity, dtype=np.int64)
+        self.equity = np.zeros(capacity)
+
+    def _grow(self, needed):
+        capacity = len(self.balances)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        old = (self.balances, self.start, self.positions, self.cost, self.realized, self.trades, self.equity)
+        self._allocate(capacity)
+        for new, data in zip((self.balances, self.start, self.positions, self.cost, self.realized,
+                              self.trades, self.equity), old):
+            new[:self.count] = data[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def open(self, name, balance=None):
+        return self.open_many([name], balance)[0]
+
+    def open_many(self, names, balance=None):
+        # Пакетное открытие счетов (класс, турнир); повторное имя — ошибка
+        names = [str(name) for name in names]
+        for name in names:
+            if name in self.ids:
+                raise LedgerError(f"Счёт уже существует: {name}")
+        if len(set(names)) != len(names):
+            raise LedgerError("Повторяющиеся имена счетов")
+
+        first = self.count
+        self._grow(first + len(names))
+        rows = np.arange(first, first + len(names))
+        amount = self.start_balance if balance is None else float(balance)
+        self.balances[rows] = amount
+        self.start[rows] = amount
+        self.equity[rows] = amount
+        for row, name in zip(rows.tolist(), names):
+            self.ids[name] = row
+        self.names.extend(names)
+        self.count += len(names)
+        self.version += 1
+        return rows.tolist()
+
+    def row(self, account):
+        # Счёт можно указать именем или номером строки
+        if isinstance(account, str):
+            try:
+                return self.ids[account]
+            except KeyError:
+                raise LedgerError(f"Нет такого счёта: {account}")
+        if not 0 <= account < self.count:
+            raise LedgerError(f"Нет такого счёта: {account}")
+        return account
+
+    def position(self, account, symbol):
+        return float(self.positions[self.row(account), self.index[symbol]])
+
+    def buy(self, account, symbol, amount, cost):
+        row, column = self.row(account), self.index[symbol]
+        if cost > self.balances[row]:
+            raise LedgerError("Недостаточно средств!")
+        self.balances[row] -= cost
+        self.positions[row, column] += amount
+        self.cost[row, column] += cost
+        self.trades[row] += 1
+        self._revalue(row)
+        self.version += 1
+
+    def sell(self, account, symbol, amount, revenue):
+        row, column = self.row(account), self.index[symbol]
+        held = self.positions[row, column]
+        if amount > held:
+            raise LedgerError("Недостаточно токенов!")
+        basis = self.cost[row, column] * (amount / held) if held > 0 else 0.0
+        pnl = revenue - basis
+        self.balances[row] += revenue
+        self.positions[row, column] = held - amount
+        self.cost[row, column] -= basis
+        if self.positions[row, column] <= 1e-12:
+            self.positions[row, column] = 0.0
+            self.cost[row, column] = 0.0
+        self.realized[row] += pnl
+        self.trades[row] += 1
+        self._revalue(row)
+        self.version += 1
+        return pnl
+
+    def _revalue(self, rows):
+        # Капитал счетов после сделки по последним ценам оценки; до первой оценки —
+        # по себестоимости позиций
+        if self.prices is None:
+            self.equity[rows] = self.balances[rows] + self.cost[rows].sum(axis=-1)
+        else:
+            self.equity[rows] = self.balances[rows] + self.positions[rows] @ self.prices
+
+    def mark_to_market(self, prices):
+        # Капитал всех счетов за тик: balances + positions @ prices
+        self.prices = prices
+        n = self.count
+        np.matmul(self.positions[:n], prices, out=self.equity[:n])
+        self.equity[:n] += self.balances[:n]
+        return self.equity[:n]
+
+    def unrealized(self, prices):
+        n = self.count
+        return self.positions[:n] @ prices - self.cost[:n].sum(axis=1)
+
+    def leaderboard(self, prices=None, top=10):
+        # Лучшие счета по капиталу; без prices берётся последняя оценка
+        equity = self.mark_to_market(prices) if prices is not None else self.equity[:self.count]
+        top = min(top, self.count)
+        if top <= 0:
+            return []
+        best = np.argpartition(-equity, top - 1)[:top]
+        best = best[np.argsort(-equity[best], kind='stable')]
+        return [(self.names[row], float(equity[row]), float(equity[row] / self.start[row] - 1) * 100
+                 if self.start[row] else 0.0) for row in best.tolist()]
+
+    def account(self, account):
+        row = self.row(account)
+        return {
+            'name': self.names[row],
+            'balance': float(self.balances[row]),
+            'equity': float(self.equity[row]),
+            'realized': float(self.realized[row]),
+            'trades': int(self.trades[row]),
+            'positions': {self.symbols[i]: float(self.positions[row, i])
+                          for i in np.flatnonzero(self.positions[row]).tolist()},
+        }
+
+    def state(self):
+        # JSON-вид для отпечатков прогонов; сессия сохраняется через save в .npy
+        return {**self._meta(), **{field: data.tolist() for field, data in self._arrays().items()}}
+
+    def _meta(self):
+        return {'symbols': self.symbols, 'start_balance': self.start_balance, 'names': self.names}
+
+    def _arrays(self):
+        return {field: getattr(self, field)[:self.count] for field in ARRAY_FIELDS}
+
+    def save(self, directory):
+        directory = Path(directory)
+        for field, data in self._arrays().items():
+            np.save(directory / f'accounts_{field}.npy', data)
+        return self._meta()
+
+    def remap(self, symbols):
+        # Тот же реестр над другим набором монет (столбцы переносятся по именам)
+        return self.from_arrays(self._meta(), self._arrays(), symbols)
+
+    @classmethod
+    def load(cls, directory, meta, symbols=None):
+        directory = Path(directory)
+        arrays = {field: np.load(directory / f'accounts_{field}.npy') for field in ARRAY_FIELDS}
+        return cls.from_arrays(meta, arrays, symbols)
+
+    @classmethod
+    def from_state(cls, state, symbols=None):
+        return cls.from_arrays(state, {field: state[field] for field in ARRAY_FIELDS}, symbols)
+
+    @classmethod
+    def from_arrays(cls, meta, arrays, symbols=None):
+        # Столбцы сохранённых монет переносятся по именам, если набор монет изменился
+        registry = cls(symbols if symbols is not None else meta['symbols'], meta['start_balance'],
+                       capacity=len(meta['names']) or 1)
+        registry.open_many(meta['names'])
+        n = registry.count
+        if not n:
+            return registry
+        registry.balances[:n] = arrays['balances']
+        registry.start[:n] = arrays['start']
+        registry.realized[:n] = arrays['realized']
+        registry.trades[:n] = arrays['trades']
+        positions = np.asarray(arrays['positions'], dtype=np.float64).reshape(n, -1)
+        cost = np.asarray(arrays['cost'], dtype=np.float64).reshape(n, -1)
+        if list(meta['symbols']) == registry.symbols:
+            registry.positions[:n] = positions
+            registry.cost[:n] = cost
+        else:
+            for old, symbol in enumerate(meta['symbols']):
+                column = registry.index.get(symbol)
+                if column is not None:
+                    registry.positions[:n, column] = positions[:, old]
+                    registry.cost[:n, column] = cost[:, old]
+        registry._revalue(slice(0, n))
+        return registry
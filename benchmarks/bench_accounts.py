@@ -0,0 +1,58 @@
+import argparse
+import time
+
+import numpy as np
+
+from clock import VirtualClock
+from market_engine import MarketEngine
+from simulator import Simulator
+from order_book import BUY
+
+
+def run(accounts, ticks, seed=0):
+    sim = Simulator(MarketEngine(seed=seed), clock=VirtualClock())
+    rows = sim.accounts.open_many(f"user{i}" for i in range(accounts))
+
+    # Сделки счетов идут только через биржу: первые orders счетов покупают заявками,
+    # остальным позиция на 1000$ ставится прямо в матрицу, чтобы оценка шла по полной матрице
+    orders = min(accounts, 2000)
+    start = time.perf_counter()
+    for row in range(orders):
+        sim.trade(row, sim.engine.symbols[row % len(sim.engine.symbols)], BUY, 0.01)
+    trade_time = time.perf_counter() - start
+
+    rng = np.random.default_rng(seed)
+    rest = np.asarray(rows[orders:], dtype=np.intp)
+    columns = rng.integers(0, len(sim.engine.symbols), size=len(rest))
+    sim.accounts.positions[rest, columns] = 1000.0 / sim.engine.prices[columns]
+    sim.accounts.cost[rest, columns] = 1000.0
+    sim.accounts.balances[rest] -= 1000.0
+
+    start = time.perf_counter()
+    for _ in range(ticks):
+        sim.clock.advance(sim.tick_interval)
+        sim.tick()
+    tick_time = time.perf_counter() - start
+
+    return {
+        'accounts': accounts,
+        'ticks_per_sec': ticks / tick_time,
+        'orders_per_sec': orders / trade_time,
+        'leader': sim.accounts.leaderboard(top=1)[0],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость оценки многих счетов")
+    parser.add_argument('--ticks', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for accounts in (1, 1000, 10000, 100000):
+        result = run(accounts, args.ticks, args.seed)
+        print(f"Счетов: {accounts:>7}, тиков/с: {result['ticks_per_sec']:>9,.0f}, "
+              f"заявок/с: {result['orders_per_sec']:>8,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import tkinter as tk
+from pathlib import Path
+
+from gui_pro import ProCryptoGUI
+from market_engine import MarketEngine
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def make_engine(count, seed=0):
+    return MarketEngine({f"SYM{i}": 100.0 for i in range(count)}, seed=seed)
+
+
+def bench_frames(count, frames):
+    start = time.perf_counter()
+    app = ProCryptoGUI(engine=make_engine(count))
+    app.root.update_idletasks()
+    first_frame = time.perf_counter() - start
+
+    timings = []
+    try:
+        for _ in range(frames):
+            start = time.perf_counter()
+            app.sim.tick()
+            app.update_market_display()
+            app.update_portfolio_display()
+            app.root.update_idletasks()
+            timings.append(time.perf_counter() - start)
+    finally:
+        if app.journal is not None:
+            app.journal.close()
+        app.root.destroy()
+    timings.sort()
+    return {
+        'symbols': count,
+        'first_frame_ms': first_frame * 1000,
+        'median_ms': statistics.median(timings) * 1000,
+        'p95_ms': timings[int(len(timings) * 0.95) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время кадра таблицы рынка в зависимости от числа монет")
+    parser.add_argument('--symbols', type=int, nargs='+', default=[8, 100, 1000, 5000])
+    parser.add_argument('--frames', type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f"Нет дисплея для Tk ({e}). Запустите через xvfb-run.")
+        return
+
+    # Интерфейс запускается во временной папке, чтобы не тронуть сохранения и журнал
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(ROOT / 'config.json', tmp)
+        os.chdir(tmp)
+        try:
+            print(f"{'Монет':>8} {'Первый кадр, мс':>16} {'Медиана, мс':>12} {'p95, мс':>10}")
+            for count in args.symbols:
+                result = bench_frames(count, args.frames)
+                print(f"{result['symbols']:>8} {result['first_frame_ms']:>16.1f} "
+                      f"{result['median_ms']:>12.2f} {result['p95_ms']:>10.2f}")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
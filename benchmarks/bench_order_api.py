@@ -0,0 +1,65 @@
+import argparse
+import http.client
+import json
+import random
+import time
+
+from market_engine import MarketEngine
+from simulator import Simulator
+from order_api import OrderApi
+
+
+def make_batch(rng, size, symbols):
+    orders = []
+    for _ in range(size):
+        symbol = rng.choice(symbols)
+        side = 'buy' if rng.random() < 0.6 else 'sell'
+        orders.append({'symbol': symbol, 'side': side, 'qty': round(rng.uniform(0.001, 0.01), 6)})
+    return orders
+
+
+def run(batches, batch_size, seed=0):
+    sim = Simulator(MarketEngine(seed=seed), balance=1e12)
+    api = OrderApi(sim, port=0).start()
+    rng = random.Random(seed)
+    symbols = sim.engine.symbols
+    conn = http.client.HTTPConnection('127.0.0.1', api.port)
+    latencies = []
+
+    start = time.perf_counter()
+    for i in range(batches):
+        body = json.dumps({'orders': make_batch(rng, batch_size, symbols)})
+        t0 = time.perf_counter()
+        conn.request('POST', '/orders/batch', body, {'Idempotency-Key': f"batch-{i}"})
+        conn.getresponse().read()
+        latencies.append(time.perf_counter() - t0)
+        if i % 10 == 0:
+            sim.tick()
+    elapsed = time.perf_counter() - start
+
+    conn.close()
+    api.stop()
+    latencies.sort()
+    return {
+        'orders': batches * batch_size,
+        'orders_per_sec': batches * batch_size / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p99_ms': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'rejected': api.rejected,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность HTTP API заявок")
+    parser.add_argument('--batches', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for batch_size in (1, 100, 500):
+        result = run(args.batches, batch_size, args.seed)
+        print(f"Пакет {batch_size:>4}: заявок/с {result['orders_per_sec']:>9,.0f}, "
+              f"p50 {result['p50_ms']:.2f} мс, p99 {result['p99_ms']:.2f} мс, отклонено {result['rejected']}")
+
+
+if __name__ == "__main__":
+    main()
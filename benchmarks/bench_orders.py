@@ -0,0 +1,74 @@
+import argparse
+import random
+import time
+
+from order_book import MatchingEngine, BUY, SELL, LIMIT, MARKET, IOC, FOK
+
+
+def make_flow(count, seed=0):
+    rng = random.Random(seed)
+    flow = []
+    for _ in range(count):
+        roll = rng.random()
+        side = BUY if rng.random() < 0.5 else SELL
+        qty = rng.randint(1, 10)
+        if roll < 0.10:
+            flow.append(('cancel', None, None, None, None))
+        elif roll < 0.20:
+            flow.append(('submit', side, qty, None, MARKET))
+        elif roll < 0.25:
+            flow.append(('submit', side, qty, round(100 + rng.gauss(0, 0.5), 2), IOC))
+        elif roll < 0.30:
+            flow.append(('submit', side, qty, round(100 + rng.gauss(0, 0.5), 2), FOK))
+        else:
+            offset = abs(rng.gauss(0, 0.5))
+            price = round(100 - offset if side == BUY else 100 + offset, 2)
+            flow.append(('submit', side, qty, price, LIMIT))
+    return flow
+
+
+def run(count, seed=0):
+    flow = make_flow(count, seed)
+    engine = MatchingEngine()
+    resting = []
+    latencies = []
+    rng = random.Random(seed + 1)
+    clock = time.perf_counter_ns
+
+    start = time.perf_counter()
+    for action, side, qty, price, order_type in flow:
+        t0 = clock()
+        if action == 'cancel':
+            if resting:
+                engine.cancel(resting.pop(rng.randrange(len(resting))))
+        else:
+            order_id, fills, remaining = engine.submit('SIM', side, qty, price, order_type)
+            if remaining and order_type == LIMIT:
+                resting.append(order_id)
+        latencies.append(clock() - t0)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'orders': count,
+        'orders_per_sec': count / elapsed,
+        'fills': engine.fills_count,
+        'p50_us': latencies[len(latencies) // 2] / 1000,
+        'p99_us': latencies[int(len(latencies) * 0.99) - 1] / 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Пропускная способность движка сопоставления заявок")
+    parser.add_argument('--orders', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    result = run(args.orders, args.seed)
+    print(f"Заявок: {result['orders']}, сделок: {result['fills']}")
+    print(f"Заявок в секунду: {result['orders_per_sec']:,.0f}")
+    print(f"Задержка p50: {result['p50_us']:.2f} мкс, p99: {result['p99_us']:.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
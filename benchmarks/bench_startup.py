@@ -0,0 +1,82 @@
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Каждый замер — отдельный процесс, чтобы импорт был холодным (без кеша sys.modules)
+HEADLESS = """
+import sys, time, json
+start = time.perf_counter()
+import simulator
+elapsed = time.perf_counter() - start
+print(json.dumps({'seconds': elapsed, 'tk': 'tkinter' in sys.modules, 'matplotlib': 'matplotlib' in sys.modules}))
+"""
+
+GUI = """
+import sys, time, json
+start = time.perf_counter()
+import gui_pro
+imported = time.perf_counter() - start
+try:
+    app = gui_pro.ProCryptoGUI()
+    app.root.update()
+    painted = time.perf_counter() - start
+    app.root.destroy()
+except Exception as e:
+    painted = None
+    print(f"Первая отрисовка пропущена: {e}", file=sys.stderr)
+print(json.dumps({'seconds': imported, 'first_paint': painted, 'matplotlib': 'matplotlib' in sys.modules}))
+"""
+
+
+def measure(code, cwd):
+    env = dict(os.environ, PYTHONPATH=str(ROOT), PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True)
+    if result.stderr.strip():
+        print(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(repeat):
+    # Интерфейс запускается во временной папке, чтобы не тронуть сохранения и журнал
+    with tempfile.TemporaryDirectory() as tmp:
+        shutil.copy(ROOT / 'config.json', tmp)
+        headless = [measure(HEADLESS, tmp) for _ in range(repeat)]
+        gui = [measure(GUI, tmp) for _ in range(repeat)]
+
+    paints = [r['first_paint'] for r in gui if r['first_paint'] is not None]
+    return {
+        'headless_import': statistics.median(r['seconds'] for r in headless),
+        'headless_loads_tk': any(r['tk'] or r['matplotlib'] for r in headless),
+        'gui_import': statistics.median(r['seconds'] for r in gui),
+        'first_paint': statistics.median(paints) if paints else None,
+        'matplotlib_at_start': any(r['matplotlib'] for r in gui),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время запуска: холодный импорт и первая отрисовка")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    result = run(args.repeat)
+    print(f"Импорт ядра без интерфейса: {result['headless_import'] * 1000:.0f} мс "
+          f"(Tk/matplotlib: {'да' if result['headless_loads_tk'] else 'нет'})")
+    print(f"Импорт gui_pro: {result['gui_import'] * 1000:.0f} мс")
+    if result['first_paint'] is not None:
+        print(f"До первой отрисовки окна: {result['first_paint'] * 1000:.0f} мс "
+              f"(matplotlib загружен: {'да' if result['matplotlib_at_start'] else 'нет'})")
+    else:
+        print("До первой отрисовки окна: нет дисплея")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import argparse
+import time
+
+from clock import VirtualClock
+from market_engine import MarketEngine
+from simulator import Simulator
+from strategies import StrategyRunner, MovingAverageCross, MeanReversion
+
+
+def run(strategies, ticks, seed=0):
+    sim = Simulator(MarketEngine(seed=seed), clock=VirtualClock())
+    runner = StrategyRunner(sim)
+    for i in range(strategies):
+        if i % 2:
+            runner.add(MeanReversion(threshold=0.02 + 0.001 * (i % 20)))
+        else:
+            runner.add(MovingAverageCross(fast=5 + i % 10, slow=30 + i % 40))
+
+    start = time.perf_counter()
+    sim.run(ticks, on_tick=runner.on_tick)
+    elapsed = time.perf_counter() - start
+    return {
+        'strategies': strategies,
+        'ticks': ticks,
+        'evaluations_per_sec': runner.evaluations / elapsed,
+        'ticks_per_sec': ticks / elapsed,
+        'orders': runner.orders_executed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Скорость работы торговых стратегий")
+    parser.add_argument('--ticks', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for strategies in (1, 10, 100):
+        result = run(strategies, args.ticks, args.seed)
+        print(f"Стратегий: {strategies:>4}, тиков/с: {result['ticks_per_sec']:>9,.0f}, "
+              f"оценок/с: {result['evaluations_per_sec']:>10,.0f}, заявок: {result['orders']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from market_engine import MarketEngine
+from price_history import PriceHistory
+from order_book import MatchingEngine
+from accounts import AccountRegistry
+from metrics import StreamingMetrics
+from clock import VirtualClock
+from simulator import Simulator
+from benchmarks.bench_orders import make_flow
+
+# Набор замеров в духе asv: каждый замер готовит данные и возвращает (функция, операций за прогон).
+# Результаты пишутся в JSON и сравниваются с базовым файлом; замедление сверх порога — ошибка.
+
+BENCHMARKS = []
+
+
+class Skip(Exception):
+    pass
+
+
+def benchmark(name, params=(None,)):
+    def register(setup):
+        for param in params:
+            BENCHMARKS.append((name if param is None else f"{name}[{param}]", setup, param))
+        return setup
+    return register
+
+
+def make_engine(count, seed=0):
+    return MarketEngine({f"SYM{i}": 100.0 for i in range(count)}, seed=seed)
+
+
+@benchmark('engine_step', params=(10, 1000, 10000))
+def engine_step(symbols):
+    engine = make_engine(symbols)
+
+    def run():
+        for _ in range(200):
+            engine.step()
+    return run, 200
+
+
+@benchmark('engine_simulate', params=(10, 1000))
+def engine_simulate(symbols):
+    engine = make_engine(symbols)
+    return (lambda: engine.simulate(4096)), 4096
+
+
+@benchmark('simulator_tick', params=(10, 1000))
+def simulator_tick(symbols):
+    sim = Simulator(make_engine(symbols), clock=VirtualClock())
+
+    def run():
+        for _ in range(200):
+            sim.clock.advance(sim.tick_interval)
+            sim.tick()
+    return run, 200
+
+
+@benchmark('history_append', params=(10, 1000))
+def history_append(symbols):
+    history = PriceHistory([f"SYM{i}" for i in range(symbols)], capacity=10000)
+    prices = np.full(symbols, 100.0)
+
+    def run():
+        for i in range(5000):
+            history.append(prices, i)
+    return run, 5000
+
+
+@benchmark('history_readout', params=(10, 1000))
+def history_readout(symbols):
+    names = [f"SYM{i}" for i in range(symbols)]
+    history = PriceHistory(names, capacity=10000)
+    rng = np.random.default_rng(0)
+    history.extend(rng.uniform(50, 150, (15000, symbols)), np.arange(15000, dtype=np.int64))
+
+    def run():
+        for i in range(1000):
+            history.prices(last=100)
+            history.prices(names[i % symbols], last=1000)
+    return run, 1000
+
+
+@benchmark('order_matching')
+def order_matching(_):
+    flow = make_flow(50_000)
+
+    def run():
+        engine = MatchingEngine()
+        resting = []
+        for action, side, qty, price, order_type in flow:
+            if action == 'cancel':
+                if resting:
+                    engine.cancel(resting.pop())
+            else:
+                order_id, fills, remaining = engine.submit('SIM', side, qty, price, order_type)
+                if remaining:
+                    resting.append(order_id)
+    return run, len(flow)
+
+
+@benchmark('simulator_orders')
+def simulator_orders(_):
+    sim = Simulator(make_engine(10), clock=VirtualClock(), balance=1e12)
+    symbols = sim.engine.symbols
+
+    def run():
+        for i in range(2000):
+            sim.buy(symbols[i % len(symbols)], 0.01)
+            sim.sell(symbols[i % len(symbols)], 0.01)
+    return run, 4000
+
+
+@benchmark('mark_to_market', params=(1000, 50_000))
+def mark_to_market(accounts):
+    registry = AccountRegistry([f"SYM{i}" for i in range(100)], capacity=accounts)
+    rows = registry.open_many(range(accounts))
+    rng = np.random.default_rng(0)
+    registry.positions[rows] = rng.uniform(0, 1, (accounts, 100))
+    prices = rng.uniform(50, 150, 100)
+
+    def run():
+        for _ in range(20):
+            registry.mark_to_market(prices)
+    return run, 20 * accounts
+
+
+@benchmark('portfolio_value')
+def portfolio_value(_):
+    sim = Simulator(make_engine(100), clock=VirtualClock(), balance=1e9)
+    for symbol in sim.engine.symbols[::2]:
+        sim.buy(symbol, 1.0)
+
+    def run():
+        for _ in range(10000):
+            sim.portfolio_value()
+    return run, 10000
+
+
+@benchmark('stats_update')
+def stats_update(_):
+    metrics = StreamingMetrics()
+    rng = np.random.default_rng(0)
+    equity = (10000 + rng.normal(0, 50, 10000)).tolist()
+    pnl = rng.normal(0, 10, 1000).tolist()
+
+    def run():
+        for value in equity:
+            metrics.record_equity(value)
+        for value in pnl:
+            metrics.record_trade(value)
+        metrics.sharpe, metrics.volatility, metrics.max_drawdown
+    return run, len(equity) + len(pnl)
+
+
+@benchmark('tk_market_grid', params=(10, 1000))
+def tk_market_grid(symbols):
+    # Кадр таблицы рынка в настоящем Tk: нужен дисплей (xvfb-run или --xvfb)
+    try:
+        import tkinter as tk
+        from market_grid import MarketGrid
+        root = tk.Tk()
+    except Exception as e:
+        raise Skip(f"нет Tk: {e}")
+    root.geometry("1200x800")
+
+    theme = {"bg_card": "#ffffff", "primary": "#3b82f6", "success": "#10b981",
+             "danger": "#ef4444", "text_primary": "#1e293b", "border": "#e2e8f0"}
+    fonts = {'body': ('Segoe UI', 11), 'number': ('Consolas', 12, 'bold'), 'small': ('Segoe UI', 9)}
+    engine = make_engine(symbols)
+    grid = MarketGrid(root, engine, theme, fonts, on_buy=lambda symbol: None)
+    grid.frame.pack(fill='both', expand=True)
+    root.update()
+
+    def run():
+        for _ in range(20):
+            engine.step()
+            grid.update_changes()
+            grid.refresh()
+            root.update_idletasks()
+    run.cleanup = root.destroy
+    return run, 20
+
+
+@contextmanager
+def virtual_display(enabled):
+    # Xvfb поднимается только по запросу и только если дисплея ещё нет
+    if not enabled or os.environ.get('DISPLAY') or sys.platform == 'win32' or not shutil.which('Xvfb'):
+        yield
+        return
+    display = ':97'
+    process = subprocess.Popen(['Xvfb', display, '-screen', '0', '1600x1000x24'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    os.environ['DISPLAY'] = display
+    time.sleep(0.5)
+    try:
+        yield
+    finally:
+        del os.environ['DISPLAY']
+        process.terminate()
+        process.wait()
+
+
+def measure(setup, param, repeat):
+    run, ops = setup(param)
+    try:
+        run()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - start)
+    finally:
+        cleanup = getattr(run, 'cleanup', None)
+        if cleanup is not None:
+            cleanup()
+    median = statistics.median(timings)
+    return {
+        'ops': ops,
+        'repeat': repeat,
+        'median_s': median,
+        'min_s': min(timings),
+        'ops_per_sec': ops / median,
+    }
+
+
+def run_suite(repeat=5, match=None):
+    results = {}
+    skipped = {}
+    for name, setup, param in BENCHMARKS:
+        if match and not any(m in name for m in match):
+            continue
+        try:
+            results[name] = measure(setup, param, repeat)
+        except Skip as e:
+            skipped[name] = str(e)
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'commit': git_commit(),
+        },
+        'results': results,
+        'skipped': skipped,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    # Возвращает строки (имя, было, стало, изменение, регрессия) для общих замеров
+    rows = []
+    for name, result in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        change = result['ops_per_sec'] / old['ops_per_sec'] - 1
+        rows.append((name, old['ops_per_sec'], result['ops_per_sec'], change, change < -threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Набор замеров производительности с сравнением с базой")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--match', nargs='*', help="запускать только замеры с этими подстроками в имени")
+    parser.add_argument('--output', help="куда сохранить результаты (JSON)")
+    parser.add_argument('--baseline', help="JSON прошлого прогона для сравнения")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="допустимое замедление, доля (0.15 = 15%%)")
+    parser.add_argument('--xvfb', action='store_true', help="запустить Xvfb для замеров Tk")
+    args = parser.parse_args()
+
+    with virtual_display(args.xvfb):
+        current = run_suite(args.repeat, args.match)
+
+    print(f"{'Замер':<28} {'оп/с':>14} {'медиана, мс':>12}")
+    for name, result in current['results'].items():
+        print(f"{name:<28} {result['ops_per_sec']:>14,.0f} {result['median_s'] * 1000:>12.2f}")
+    for name, reason in current['skipped'].items():
+        print(f"{name:<28} пропущен: {reason}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        rows = compare(current, baseline, args.threshold)
+        print(f"\nСравнение с {args.baseline} (порог {args.threshold:.0%}):")
+        for name, old, new, change, regressed in rows:
+            mark = "  РЕГРЕССИЯ" if regressed else ""
+            print(f"{name:<28} {old:>14,.0f} → {new:>14,.0f} {change:>+8.1%}{mark}")
+        if any(row[4] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+from pathlib import Path
+
+import numpy as np
+
+RESOLUTIONS = {
+    '1s': 1_000_000_000,
+    '1m': 60_000_000_000,
+    '5m': 300_000_000_000,
+    '1h': 3_600_000_000_000,
+}
+
+FIELDS = ('start', 'open', 'high', 'low', 'close', 'volume', 'ticks')
+
+
+class CandleSeries:
+    # Свечи одного разрешения для всех монет сразу: строка кольцевого буфера = одна свеча
+
+    def __init__(self, n_symbols, resolution_ns, capacity=1440):
+        self.resolution_ns = resolution_ns
+        self.capacity = capacity
+
+        self.start = np.zeros(capacity, dtype=np.int64)
+        self.open = np.zeros((capacity, n_symbols))
+        self.high = np.zeros((capacity, n_symbols))
+        self.low = np.zeros((capacity, n_symbols))
+        self.close = np.zeros((capacity, n_symbols))
+        self.volume = np.zeros((capacity, n_symbols))
+        self.ticks = np.zeros(capacity, dtype=np.int64)
+
+        self.pos = -1
+        self.count = 0
+        self.current_start = None
+
+    def __len__(self):
+        return self.count
+
+    def update(self, prices, timestamp_ns, volumes=None):
+        bucket = timestamp_ns - timestamp_ns % self.resolution_ns
+
+        if self.current_start is None or bucket > self.current_start:
+            pos = self._open(bucket, prices)
+        else:
+            # Опоздавший тик досчитывается в текущую свечу
+            pos = self.pos
+            np.maximum(self.high[pos], prices, out=self.high[pos])
+            np.minimum(self.low[pos], prices, out=self.low[pos])
+            self.close[pos] = prices
+
+        self.ticks[pos] += 1
+        if volumes is not None:
+            self.volume[pos] += volumes
+
+    def _open(self, bucket, prices):
+        pos = self.pos = (self.pos + 1) % self.capacity
+        self.current_start = bucket
+        self.start[pos] = bucket
+        self.open[pos] = prices
+        self.high[pos] = prices
+        self.low[pos] = prices
+        self.close[pos] = prices
+        self.volume[pos] = 0.0
+        self.ticks[pos] = 0
+        self.count = min(self.count + 1, self.capacity)
+        return pos
+
+    def extend(self, path, timestamps_ns):
+        # Пакет тиков (ticks × symbols) с неубывающими метками: свечи собираются через reduceat
+        buckets = timestamps_ns - timestamps_ns % self.resolution_ns
+
+        if self.current_start is not None:
+            late = int(np.searchsorted(buckets, self.current_start, side='right'))
+            if late:
+                pos = self.pos
+                np.maximum(self.high[pos], path[:late].max(axis=0), out=self.high[pos])
+                np.minimum(self.low[pos], path[:late].min(axis=0), out=self.low[pos])
+                self.close[pos] = path[late - 1]
+                self.ticks[pos] += late
+                path = path[late:]
+                buckets = buckets[late:]
+        if not len(buckets):
+            return
+
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        total = len(starts)
+        if total > self.capacity:
+            # В кольцо всё равно поместятся только последние capacity свечей
+            cut = starts[len(starts) - self.capacity]
+            path = path[cut:]
+            buckets = buckets[cut:]
+            starts = starts[len(starts) - self.capacity:] - cut
+
+        m = len(starts)
+        ends = np.r_[starts[1:], len(buckets)]
+        rows = (self.pos + 1 + total - m + np.arange(m)) % self.capacity
+        self.start[rows] = buckets[starts]
+        self.open[rows] = path[starts]
+        self.high[rows] = np.maximum.reduceat(path, starts, axis=0)
+        self.low[rows] = np.minimum.reduceat(path, starts, axis=0)
+        self.close[rows] = path[ends - 1]
+        self.volume[rows] = 0.0
+        self.ticks[rows] = ends - starts
+
+        self.pos = int(rows[-1])
+        self.count = min(self.count + total, self.capacity)
+        self.current_start = int(buckets[-1])
+
+    def add_volume(self, column, amount, timestamp_ns):
+        # Объём идёт в свечу времени сделки. Сделка раньше первого тика новой корзины
+        # открывает её по последнему закрытию; сделка в корзину, которой нет в кольце, теряется
+        if not self.count:
+            return
+        bucket = timestamp_ns - timestamp_ns % self.resolution_ns
+        if bucket > self.current_start:
+            pos = self._open(bucket, self.close[self.pos].copy())
+        elif bucket == self.current_start:
+            pos = self.pos
+        else:
+            index = self.ordered_index()
+            i = int(np.searchsorted(self.start[index], bucket))
+            if i == len(index) or self.start[index[i]] != bucket:
+                return
+            pos = index[i]
+        self.volume[pos, column] += amount
+
+    def ordered_index(self):
+        return (np.arange(self.count) + self.pos + 1 - self.count) % self.capacity
+
+    def oldest_start(self):
+        if not self.count:
+            return None
+        return int(self.start[(self.pos + 1 - self.count) % self.capacity])
+
+    def select(self, column, start_ns=None, end_ns=None):
+        index = self.ordered_index()
+        starts = self.start[index]
+        lo = 0 if start_ns is None else np.searchsorted(starts, start_ns - start_ns % self.resolution_ns)
+        hi = len(index) if end_ns is None else np.searchsorted(starts, end_ns, side='right')
+        index = index[lo:hi]
+        return {
+            'start': self.start[index],
+            'open': self.open[index, column],
+            'high': self.high[index, column],
+            'low': self.low[index, column],
+            'close': self.close[index, column],
+            'volume': self.volume[index, column],
+        }
+
+
+class CandleAggregator:
+    def __init__(self, symbols, resolutions=('1s', '1m', '5m', '1h'), capacity=1440):
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.series = {
+            name: CandleSeries(len(self.symbols), RESOLUTIONS[name], capacity)
+            for name in resolutions
+        }
+
+    def update(self, prices, timestamp_ns, volumes=None):
+        for series in self.series.values():
+            series.update(prices, timestamp_ns, volumes)
+
+    def _open(self, bucket, prices):
+        pos = self.pos = (self.pos + 1) % self.capacity
+        self.current_start = bucket
+        self.start[pos] = bucket
+        self.open[pos] = prices
+        self.high[pos] = prices
+        self.low[pos] = prices
+        self.close[pos] = prices
+        self.volume[pos] = 0.0
+        self.ticks[pos] = 0
+        self.count = min(self.count + 1, self.capacity)
+        return pos
+
+    def extend(self, path, timestamps_ns):
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        for series in self.series.values():
+            series.extend(path, timestamps_ns)
+
+    def add_volume(self, symbol, amount, timestamp_ns):
+        column = self.index[symbol]
+        for series in self.series.values():
+            series.add_volume(column, amount, timestamp_ns)
+
+    def save(self, directory):
+        directory = Path(directory)
+        series_meta = {}
+        for name, series in self.series.items():
+            for field in FIELDS:
+                np.save(directory / f'candles_{name}_{field}.npy', getattr(series, field))
+            series_meta[name] = {'capacity': series.capacity, 'pos': series.pos,
+                                 'count': series.count, 'current_start': series.current_start}
+        return {'symbols': self.symbols, 'series': series_meta}
+
+    @classmethod
+    def load(cls, directory, meta, mmap_mode='c'):
+        directory = Path(directory)
+        aggregator = cls.__new__(cls)
+        aggregator.symbols = list(meta['symbols'])
+        aggregator.index = {symbol: i for i, symbol in enumerate(aggregator.symbols)}
+        aggregator.series = {}
+        for name, series_meta in meta['series'].items():
+            series = CandleSeries.__new__(CandleSeries)
+            series.resolution_ns = RESOLUTIONS[name]
+            for key, value in series_meta.items():
+                setattr(series, key, value)
+            for field in FIELDS:
+                setattr(series, field, np.load(directory / f'candles_{name}_{field}.npy',
+                                               mmap_mode=mmap_mode))
+            aggregator.series[name] = series
+        return aggregator
+
+    def candles(self, symbol, resolution, start_ns=None, end_ns=None):
+        return self.series[resolution].select(self.index[symbol], start_ns, end_ns)
+
+    def pick_resolution(self, start_ns, end_ns, points):
+        # Самое мелкое разрешение, которое покрывает диапазон и даёт не больше 4N свечей
+        by_size = sorted(self.series.items(), key=lambda item: item[1].resolution_ns)
+        for name, series in by_size:
+            oldest = series.oldest_start()
+            covers = oldest is not None and oldest <= start_ns
+            if covers and (end_ns - start_ns) / series.resolution_ns <= points * 4:
+                return name
+        return by_size[-1][0]
+
+    def query(self, symbol, start_ns, end_ns, points, method='minmax'):
+        resolution = self.pick_resolution(start_ns, end_ns, points)
+        candles = self.candles(symbol, resolution, start_ns, end_ns)
+        x = candles['start']
+
+        if method == 'minmax':
+            return minmax_decimate(x, candles['low'], candles['high'], points)
+        if method == 'lttb':
+            return lttb(x, candles['close'], points)
+        raise ValueError(f"Неизвестный метод прореживания: {method}")
+
+
+def minmax_decimate(x, low, high, points):
+    # По две точки на корзину (минимум и максимум) в порядке времени
+    n = len(x)
+    buckets = points // 2
+    if n * 2 <= points or buckets < 1:
+        out_y = np.empty(n * 2)
+        out_y[0::2] = low
+        out_y[1::2] = high
+        return np.repeat(x, 2), out_y
+
+    size = -(-n // buckets)
+    padded = buckets * size
+    pad = padded - n
+    low_b = np.pad(low, (0, pad), mode='edge').reshape(buckets, size)
+    high_b = np.pad(high, (0, pad), mode='edge').reshape(buckets, size)
+
+    base = np.arange(buckets) * size
+    i_min = np.minimum(base + low_b.argmin(axis=1), n - 1)
+    i_max = np.minimum(base + high_b.argmax(axis=1), n - 1)
+
+    first = np.minimum(i_min, i_max)
+    second = np.maximum(i_min, i_max)
+    first_is_min = i_min <= i_max
+
+    out_x = np.empty(buckets * 2, dtype=np.asarray(x).dtype)
+    out_y = np.empty(buckets * 2)
+    out_x[0::2] = x[first]
+    out_x[1::2] = x[second]
+    out_y[0::2] = np.where(first_is_min, low[first], high[first])
+    out_y[1::2] = np.where(first_is_min, high[second], low[second])
+    return out_x, out_y
+
+
+def lttb(x, y, points):
+    # Largest-Triangle-Three-Buckets
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n <= points or points < 3:
+        return x, y
+
+    xf = x.astype(np.float64)
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    selected = np.empty(points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+
+        area = np.abs((xf[a] - avg_x) * (y[lo:hi] - y[a]) - (xf[a] - xf[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+
+    return x[selected], y[selected]
@@ -0,0 +1,42 @@
+import time
+from datetime import datetime
+
+
+class WallClock:
+    # Обычное время: monotonic() для планировщика, time_ns() для меток сделок и тиков
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def time_ns(self):
+        return time.time_ns()
+
+    def now(self):
+        return datetime.now()
+
+
+class VirtualClock:
+    # Виртуальное время для ускоренного прогона и повтора тиков: стоит на месте,
+    # пока его не сдвинут, поэтому прогон с фиксированным seed повторяется бит в бит.
+
+    def __init__(self, start_ns=0):
+        self.start_ns = int(start_ns)
+        self._now_ns = int(start_ns)
+
+    def monotonic(self):
+        return (self._now_ns - self.start_ns) / 1e9
+
+    def time_ns(self):
+        return self._now_ns
+
+    def now(self):
+        return datetime.fromtimestamp(self._now_ns / 1e9)
+
+    def advance(self, seconds):
+        self._now_ns += int(round(seconds * 1e9))
+        return self._now_ns
+
+    def set_time_ns(self, timestamp_ns):
+        # Повтор записи: время берётся из файла и не может идти назад
+        self._now_ns = max(self._now_ns, int(timestamp_ns))
+        return self._now_ns
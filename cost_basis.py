@@ -0,0 +1,94 @@
+from collections import deque
+
+FIFO = 'fifo'
+AVERAGE = 'average'
+
+
+class CostBasis:
+    # Себестоимость позиций: в режиме FIFO у каждой монеты очередь лотов [qty, price],
+    # продажа съедает лоты с головы (амортизированно O(1)); в режиме average хранится
+    # только суммарные количество и стоимость. Открытая стоимость всегда поддерживается,
+    # поэтому нереализованный PnL — это рыночная стоимость минус total_cost.
+
+    def __init__(self, method=FIFO):
+        if method not in (FIFO, AVERAGE):
+            raise ValueError(f"Неизвестный метод учёта себестоимости: {method}")
+        self.method = method
+        self.lots = {}
+        self.qty = {}
+        self.cost = {}
+        self.total_cost = 0.0
+        self.realized_pnl = 0.0
+
+    def buy(self, symbol, qty, price):
+        if self.method == FIFO:
+            lots = self.lots.get(symbol)
+            if lots is None:
+                lots = self.lots[symbol] = deque()
+            if lots and lots[-1][1] == price:
+                lots[-1][0] += qty
+            else:
+                lots.append([qty, price])
+
+        self.qty[symbol] = self.qty.get(symbol, 0.0) + qty
+        self.cost[symbol] = self.cost.get(symbol, 0.0) + qty * price
+        self.total_cost += qty * price
+
+    def sell(self, symbol, qty, price):
+        held = self.qty.get(symbol, 0.0)
+        cost = self.cost.get(symbol, 0.0)
+
+        if self.method == FIFO:
+            lots = self.lots.get(symbol, ())
+            remaining = qty
+            released = 0.0
+            while remaining > 1e-12 and lots:
+                lot = lots[0]
+                take = lot[0] if lot[0] <= remaining else remaining
+                released += take * lot[1]
+                lot[0] -= take
+                remaining -= take
+                if lot[0] <= 1e-12:
+                    lots.popleft()
+        else:
+            released = cost * min(qty, held) / held if held > 0 else 0.0
+
+        pnl = qty * price - released
+        self.realized_pnl += pnl
+        self.total_cost -= released
+
+        if held - qty <= 1e-12:
+            self.qty.pop(symbol, None)
+            self.total_cost -= cost - released
+            self.cost.pop(symbol, None)
+            self.lots.pop(symbol, None)
+        else:
+            self.qty[symbol] = held - qty
+            self.cost[symbol] = cost - released
+        return pnl
+
+    def average_price(self, symbol):
+        qty = self.qty.get(symbol, 0.0)
+        return self.cost.get(symbol, 0.0) / qty if qty > 0 else 0.0
+
+    def unrealized(self, symbol, price):
+        return self.qty.get(symbol, 0.0) * price - self.cost.get(symbol, 0.0)
+
+    def state(self):
+        return {
+            'method': self.method,
+            'lots': {symbol: [list(lot) for lot in lots] for symbol, lots in self.lots.items()},
+            'qty': dict(self.qty),
+            'cost': dict(self.cost),
+            'realized_pnl': self.realized_pnl,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        basis = cls(state['method'])
+        basis.lots = {symbol: deque([list(lot) for lot in lots]) for symbol, lots in state['lots'].items()}
+        basis.qty = dict(state['qty'])
+        basis.cost = dict(state['cost'])
+        basis.total_cost = sum(basis.cost.values())
+        basis.realized_pnl = state['realized_pnl']
+        return basis
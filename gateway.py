@@ -0,0 +1,353 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+from web import (ServerThread, HttpError, read_request, response, websocket_handshake,
+                 ws_frame, read_ws_frame, WS_TEXT, WS_CLOSE, WS_PING, WS_PONG)
+
+DROP = 'drop'
+CONFLATE = 'conflate'
+HISTORY_WINDOW_NS = 3_600_000_000_000
+
+
+def encode(message):
+    return ws_frame(json.dumps(message, ensure_ascii=False, separators=(',', ':')))
+
+
+class Subscriber:
+    # Состояние одного WebSocket-клиента. Меняется только в цикле сервера.
+    # Очередь ограничена: при DROP выбрасываются самые старые сообщения, при CONFLATE
+    # тики не копятся, а сливаются в одну дельту с последними ценами.
+
+    def __init__(self, writer, queue_size, policy):
+        self.writer = writer
+        self.queue = deque()
+        self.queue_size = queue_size
+        self.policy = policy
+        self.wakeup = asyncio.Event()
+
+        self.all_ticks = False
+        self.tick_symbols = set()
+        self.candles = {}
+        self.fills = False
+
+        self.pending = {}
+        self.pending_ts = None
+        self.pending_seq = None
+
+        self.sent = 0
+        self.dropped = 0
+        self.conflated = 0
+
+    def push(self, frame):
+        if len(self.queue) >= self.queue_size:
+            self.queue.popleft()
+            self.dropped += 1
+        self.queue.append(frame)
+        self.wakeup.set()
+
+    def push_tick(self, seq, ts, delta):
+        if self.policy == CONFLATE:
+            if self.pending:
+                self.conflated += 1
+            self.pending.update(delta)
+            self.pending_ts = ts
+            self.pending_seq = seq
+            self.wakeup.set()
+        else:
+            self.push(encode({'type': 'tick', 'seq': seq, 'ts': ts, 'd': delta}))
+
+    def subscribe(self, topic, on):
+        # Темы: ticks:* / ticks:BTC, candles:1m:* / candles:1m:BTC, fills
+        parts = topic.split(':')
+        if parts[0] == 'ticks' and len(parts) == 2:
+            if parts[1] == '*':
+                self.all_ticks = on
+            elif on:
+                self.tick_symbols.add(parts[1])
+            else:
+                self.tick_symbols.discard(parts[1])
+        elif parts[0] == 'candles' and len(parts) == 3:
+            symbols = self.candles.setdefault(parts[1], set())
+            if on:
+                symbols.add(parts[2])
+            else:
+                symbols.discard(parts[2])
+                if not symbols:
+                    del self.candles[parts[1]]
+        elif parts[0] == 'fills' and len(parts) == 1:
+            self.fills = on
+        else:
+            raise ValueError(topic)
+
+    def select(self, delta, symbols, everything):
+        if everything:
+            return delta
+        if len(symbols) < len(delta):
+            return {s: delta[s] for s in symbols if s in delta}
+        return {s: v for s, v in delta.items() if s in symbols}
+
+
+class MarketDataGateway:
+    # Локальный сервер рыночных данных: тики, свечи и сделки рассылаются подписчикам
+    # по WebSocket (/ws), снимок цен, прореженная история и статистика доступны по HTTP
+    # (/snapshot, /history, /stats).
+    # publish_* вызываются из потока симулятора, вся рассылка идёт в цикле сервера.
+
+    def __init__(self, sim, host='127.0.0.1', port=8765, queue_size=256, policy=CONFLATE):
+        if policy not in (DROP, CONFLATE):
+            raise ValueError(f"Неизвестная политика очереди: {policy}")
+        self.sim = sim
+        self.queue_size = queue_size
+        self.policy = policy
+        self.server = ServerThread(self.handle, host, port, name='market-data')
+        self.subscribers = set()
+
+        self.seq = 0
+        self.ts = 0
+        self._last = None
+        self._candle_resolutions = frozenset()
+        self.messages = 0
+
+    @property
+    def port(self):
+        return self.server.port
+
+    def start(self):
+        self.server.start()
+        self.sim.exchange.fill_handlers.append(self.publish_fill)
+        return self
+
+    def stop(self):
+        if self.publish_fill in self.sim.exchange.fill_handlers:
+            self.sim.exchange.fill_handlers.remove(self.publish_fill)
+        self.server.stop()
+
+    def publish_tick(self):
+        # Вызывается после sim.tick(): копия цен и текущих свечей уходит в цикл сервера
+        prices = self.sim.engine.prices.copy()
+        ts = self.sim.clock.time_ns()
+        candles = {}
+        for name in self._candle_resolutions:
+            series = self.sim.candles.series.get(name)
+            if series is not None and series.count:
+                pos = series.pos
+                candles[name] = (int(series.start[pos]), series.open[pos].copy(), series.high[pos].copy(),
+                                 series.low[pos].copy(), series.close[pos].copy())
+        self.server.call(self._broadcast_tick, ts, prices, candles)
+
+    def publish_fill(self, symbol, side, owner, fills):
+        if fills:
+            message = {'type': 'fill', 'symbol': symbol, 'side': side, 'owner': owner,
+                       'fills': [[price, qty] for _, _, _, price, qty in fills]}
+            self.server.call(self._broadcast_fill, message)
+
+    def _broadcast_tick(self, ts, prices, candles):
+        symbols = self.sim.engine.symbols
+        if self._last is None or len(self._last) != len(prices):
+            changed = np.arange(len(prices))
+        else:
+            changed = np.flatnonzero(prices != self._last)
+        self._last = prices
+        self.ts = ts
+        if not len(changed):
+            return
+        self.seq += 1
+
+        values = prices[changed].tolist()
+        delta = {symbols[i]: v for i, v in zip(changed.tolist(), values)}
+        rows = {}
+        for name, (start, o, h, l, c) in candles.items():
+            rows[name] = (start, {symbols[i]: [o[i], h[i], l[i], c[i]] for i in changed.tolist()})
+
+        for client in self.subscribers:
+            if client.all_ticks or client.tick_symbols:
+                part = client.select(delta, client.tick_symbols, client.all_ticks)
+                if part:
+                    client.push_tick(self.seq, ts, part)
+                    self.messages += 1
+            for name, subscribed in client.candles.items():
+                if name in rows:
+                    start, row = rows[name]
+                    part = client.select(row, subscribed, '*' in subscribed)
+                    if part:
+                        client.push(encode({'type': 'candle', 'res': name, 'start': start, 'd': part}))
+                        self.messages += 1
+
+    def _broadcast_fill(self, message):
+        frame = None
+        for client in self.subscribers:
+            if client.fills:
+                frame = frame or encode(message)
+                client.push(frame)
+                self.messages += 1
+
+    def snapshot(self, symbols=None):
+        prices = self._last if self._last is not None else self.sim.engine.prices.copy()
+        data = dict(zip(self.sim.engine.symbols, prices.tolist()))
+        if symbols is not None:
+            data = {s: data[s] for s in symbols if s in data}
+        return {'type': 'snapshot', 'seq': self.seq, 'ts': self.ts, 'd': data}
+
+    def history(self, query):
+        # История для графика клиента: свечи подходящего разрешения, прореженные до points точек
+        symbol = query.get('symbol')
+        if symbol not in self.sim.candles.index:
+            raise HttpError(404, f"Неизвестная монета: {symbol}")
+        method = query.get('method', 'minmax')
+        try:
+            points = int(query.get('points', 500))
+            end = int(query['end']) if 'end' in query else self.sim.clock.time_ns()
+            start = int(query['start']) if 'start' in query else end - HISTORY_WINDOW_NS
+        except ValueError:
+            raise HttpError(400, "Некорректные параметры истории")
+        if points < 3 or start > end or method not in ('minmax', 'lttb'):
+            raise HttpError(400, "Некорректные параметры истории")
+
+        # Свечи пишет поток симулятора: выборка идёт под его блокировкой
+        with self.sim.lock:
+            times, values = self.sim.candles.query(symbol, start, end, points, method)
+        return {'type': 'history', 'symbol': symbol, 'method': method,
+                't': times.tolist(), 'p': values.tolist()}
+
+    def stats(self):
+        return {
+            'clients': len(self.subscribers),
+            'seq': self.seq,
+            'messages': self.messages,
+            'sent': sum(c.sent for c in self.subscribers),
+            'dropped': sum(c.dropped for c in self.subscribers),
+            'conflated': sum(c.conflated for c in self.subscribers),
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as e:
+                    writer.write(response(e.status, {'error': str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                if request.path == '/ws':
+                    writer.write(websocket_handshake(request))
+                    await self.serve_websocket(reader, writer)
+                    break
+                if request.path == '/snapshot':
+                    status, body = 200, self.snapshot()
+                elif request.path == '/history':
+                    try:
+                        status, body = 200, self.history(request.query)
+                    except HttpError as e:
+                        status, body = e.status, {'error': str(e)}
+                elif request.path == '/stats':
+                    status, body = 200, self.stats()
+                else:
+                    status, body = 404, {'error': "Нет такого адреса"}
+                writer.write(response(status, body, keep_alive=request.keep_alive))
+                await writer.drain()
+                if not request.keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError, HttpError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_websocket(self, reader, writer):
+        client = Subscriber(writer, self.queue_size, self.policy)
+        self.subscribers.add(client)
+        self._update_resolutions()
+        sender = asyncio.ensure_future(self.send_loop(client))
+        try:
+            while True:
+                opcode, payload = await read_ws_frame(reader)
+                if opcode == WS_CLOSE:
+                    writer.write(ws_frame(payload[:2], WS_CLOSE))
+                    break
+                if opcode == WS_PING:
+                    writer.write(ws_frame(payload, WS_PONG))
+                elif opcode == WS_TEXT:
+                    self.command(client, payload)
+        finally:
+            sender.cancel()
+            self.subscribers.discard(client)
+            self._update_resolutions()
+
+    def command(self, client, payload):
+        # {"op": "subscribe" | "unsubscribe", "topics": [...]}; на подписку по тикам сразу шлётся снимок
+        try:
+            message = json.loads(payload)
+            op = message['op']
+            topics = list(message.get('topics', ()))
+            if op not in ('subscribe', 'unsubscribe'):
+                raise ValueError(op)
+            for topic in topics:
+                client.subscribe(topic, op == 'subscribe')
+        except (ValueError, KeyError, TypeError) as e:
+            client.push(encode({'type': 'error', 'error': f"Некорректная команда: {e}"}))
+            return
+
+        self._update_resolutions()
+        if op == 'subscribe':
+            symbols = [t.split(':', 1)[1] for t in topics if t.startswith('ticks:')]
+            if symbols:
+                client.push(encode(self.snapshot(None if '*' in symbols else symbols)))
+
+    def _update_resolutions(self):
+        self._candle_resolutions = frozenset(name for c in self.subscribers for name in c.candles)
+
+    async def send_loop(self, client):
+        writer = client.writer
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                frames = []
+                if client.pending:
+                    frames.append(encode({'type': 'tick', 'seq': client.pending_seq,
+                                          'ts': client.pending_ts, 'd': client.pending}))
+                    client.pending = {}
+                while client.queue:
+                    frames.append(client.queue.popleft())
+                if frames:
+                    writer.write(b''.join(frames))
+                    client.sent += len(frames)
+                    await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def main():
+    # Симулятор без интерфейса, раздающий рынок по WebSocket
+    from market_engine import MarketEngine
+    from simulator import Simulator
+
+    parser = argparse.ArgumentParser(description="Сервер рыночных данных без интерфейса")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate', type=float, default=10.0, help="тиков в секунду")
+    parser.add_argument('--policy', default=CONFLATE, choices=(DROP, CONFLATE))
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    sim = Simulator(MarketEngine(seed=args.seed), tick_interval=1.0 / args.rate)
+    gateway = MarketDataGateway(sim, args.host, args.port, policy=args.policy).start()
+    print(f"Рыночные данные: ws://{args.host}:{gateway.port}/ws")
+    try:
+        while True:
+            sim.tick()
+            gateway.publish_tick()
+            time.sleep(sim.tick_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+
+
+if __name__ == "__main__":
+    main()
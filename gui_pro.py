@@ -1,18 +1,27 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, font
 import json
-import threading
 import time
-import random
 import math
+import threading
 from datetime import datetime, timedelta
 from pathlib import Path
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import numpy as np
+
+from market_engine import MarketEngine, DEFAULT_PRICES
+from price_models import create_model
+from symbols import SymbolRegistry
+from market_grid import MarketGrid
+from ledger import LedgerError
+from scheduler import Scheduler
+from render_loop import RenderLoop
+from instrumentation import instruments, profiler
+from mining import MiningFarms
+from trade_journal import TradeJournal, JournalError
+from snapshot import save_snapshot, load_snapshot
+from simulator import Simulator
 
 class ProCryptoGUI:
-    def __init__(self):
+    def __init__(self, engine=None):
         self.root = tk.Tk()
         self.root.title("💎 Pro Crypto Simulator")
         self.root.geometry("1600x1000")
@@ -20,25 +29,49 @@ class ProCryptoGUI:
         
         self.load_config()
         
-        self.prices = {
-            'BTC': 45000.0, 'ETH': 3200.0, 'BNB': 420.0, 'ADA': 1.8,
-            'SOL': 120.0, 'DOT': 28.0, 'LINK': 18.5, 'MATIC': 1.2
-        }
-        
-        self.balance = 10000.0
-        self.portfolio = {token: 0.0 for token in self.prices}
-        self.stats = {
-            'total_trades': 0, 'win_rate': 0.0, 'total_profit': 0.0,
-            'best_trade': 0.0, 'worst_trade': 0.0, 'roi': 0.0,
-            'trade_history': []
-        }
-        
-        self.price_history = {token: [] for token in self.prices}
-        self.time_history = []
+        session = self.load_session() if engine is None else None
+        if session is not None:
+            engine = MarketEngine.from_state(session[0]['engine'])
+        if engine is None:
+            registry = self.load_symbols()
+            engine = MarketEngine(model=create_model(self.config.get("price_model"), len(registry)),
+                                  registry=registry)
+        
+        self.journal = self.open_journal(engine.symbols)
+        self._save_thread = None
+        self.sim = Simulator(engine, journal=self.journal,
+                             cost_method=self.config.get("cost_basis", "fifo"),
+                             tick_interval=self.config.get("tick_interval", 3.0),
+                             history_capacity=self.config.get("history_capacity", 10000),
+                             candle_capacity=self.config.get("candle_capacity", 1440))
         
         self.mining_power = 1.0
         self.mining_active = False
-        self.total_earned = 0.0
+        self.mining = MiningFarms()
+        self.farm = self.mining.add(self.mining_power)
+        # Намайненное зачисляется в монету из настроек; если её нет в наборе монет, майнинг выключен
+        self.mining_symbol = self.config.get("mining_symbol", "BTC")
+        if self.mining_symbol not in engine.registry:
+            print(f"Монета майнинга {self.mining_symbol} не найдена, майнинг отключён")
+            self.mining_symbol = None
+        
+        self.scheduler = Scheduler(clock=self.sim.clock.monotonic)
+        self.render = RenderLoop(fps=self.config.get("ui_fps", 30),
+                                 budget_ms=self.config.get("frame_budget_ms", 12))
+        self.render.add('stats', self.update_stats_display, priority=0)
+        self.render.add('market', self.update_market_display, priority=1)
+        self.render.add('portfolio', self.update_portfolio_display, priority=2)
+        
+        self.sim.instrument()
+        for name in ('frames', 'coalesced', 'dropped', 'over_budget'):
+            instruments.register('render_' + name, lambda n=name: getattr(self.render, n), 'counter')
+        self.metrics_server = self.start_metrics_server()
+        profiler.start_from_env()
+        self.gateway = self.start_gateway()
+        self.order_api = self.start_order_api()
+        
+        if session is not None:
+            self.apply_session(*session)
         
         self.setup_styles()
         self.create_interface()
@@ -69,6 +102,97 @@ class ProCryptoGUI:
         self.current_theme = self.config["themes"][self.config["theme"]]
         self.texts = self.config["languages"][self.config["language"]]
         
+    def load_symbols(self):
+        # Набор монет из файла (CSV/JSON, хоть десятки тысяч строк) или восемь монет по умолчанию
+        path = self.config.get("symbols_path")
+        if path:
+            try:
+                return SymbolRegistry.load(path)
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Ошибка загрузки списка монет: {e}")
+        return SymbolRegistry.from_prices(DEFAULT_PRICES)
+        
+    def open_journal(self, symbols):
+        try:
+            return TradeJournal(self.config.get("journal_path", "trades.journal"), symbols)
+        except (OSError, JournalError) as e:
+            print(f"Журнал сделок недоступен: {e}")
+            return None
+            
+    def start_gateway(self):
+        settings = self.config.get("gateway", {})
+        if not settings.get("enabled"):
+            return None
+        from gateway import MarketDataGateway
+        try:
+            return MarketDataGateway(self.sim, settings.get("host", "127.0.0.1"), settings.get("port", 8765),
+                                     settings.get("queue_size", 256), settings.get("policy", "conflate")).start()
+        except (OSError, ValueError) as e:
+            print(f"Сервер рыночных данных не запущен: {e}")
+            return None
+            
+    def start_order_api(self):
+        settings = self.config.get("order_api", {})
+        if not settings.get("enabled"):
+            return None
+        from order_api import OrderApi
+        try:
+            return OrderApi(self.sim, settings.get("host", "127.0.0.1"), settings.get("port", 8766)).start()
+        except OSError as e:
+            print(f"API заявок не запущен: {e}")
+            return None
+            
+    def start_metrics_server(self):
+        settings = self.config.get("metrics", {})
+        if not settings.get("enabled"):
+            return None
+        from instrumentation import MetricsServer
+        try:
+            return MetricsServer(settings.get("host", "127.0.0.1"), settings.get("port", 8767)).start()
+        except OSError as e:
+            print(f"Сервер метрик не запущен: {e}")
+            return None
+            
+    def load_session(self):
+        try:
+            return load_snapshot(self.config.get("session_path", "session"))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Не удалось восстановить сессию: {e}")
+            return None
+            
+    def apply_session(self, state, history, candles, accounts):
+        self.sim.restore(state, history, candles, accounts)
+        self.mining_power = state['mining_power']
+        self.mining = MiningFarms.from_state(state['mining'], self.scheduler.clock())
+        self.mining_active = bool(self.mining.active[self.farm])
+        
+    def save_session(self, wait=False):
+        # Запись и fsync журнала идут в фоновом потоке; состояние и массивы поток пишет
+        # прямо из живых буферов под sim.lock, без копий на потоке Tk.
+        # При выходе (wait=True) запись ждёт предыдущую и идёт сразу
+        if self._save_thread is not None and self._save_thread.is_alive():
+            if not wait:
+                return
+            self._save_thread.join()
+        mining = {'mining_power': self.mining_power, 'mining': self.mining.state()}
+        if wait:
+            self.write_session(mining)
+        else:
+            self._save_thread = threading.Thread(target=self.write_session, args=(mining,),
+                                                 name='session-save', daemon=True)
+            self._save_thread.start()
+            
+    def write_session(self, mining):
+        def state():
+            return {**self.sim.state(), **mining}
+        try:
+            if self.journal is not None:
+                self.journal.flush()
+            save_snapshot(self.config.get("session_path", "session"), state, self.sim.history,
+                          self.sim.candles, lock=self.sim.lock, accounts=self.sim.accounts)
+        except (OSError, JournalError) as e:
+            print(f"Ошибка сохранения сессии: {e}")
+            
     def save_config(self):
         try:
             with open('config.json', 'w', encoding='utf-8') as f:
@@ -102,10 +226,27 @@ class ProCryptoGUI:
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill='both', expand=True, padx=10, pady=10)
         
+        # Статистика и настройки строятся при первом открытии вкладки
+        self.lazy_tabs = {}
         self.create_main_tab()
-        self.create_stats_tab()
-        self.create_settings_tab()
-        
+        self.add_lazy_tab("📈 Статистика", self.create_stats_tab)
+        self.add_lazy_tab("⚙️ Настройки", self.create_settings_tab)
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+        
+    def add_lazy_tab(self, text, build):
+        frame = tk.Frame(self.notebook, bg=self.current_theme["bg_main"])
+        self.notebook.add(frame, text=text)
+        self.lazy_tabs[str(frame)] = (frame, build)
+        
+    def on_tab_changed(self, event=None):
+        tab = self.lazy_tabs.pop(self.notebook.select(), None)
+        if tab is not None:
+            frame, build = tab
+            build(frame)
+            self.update_stats_display()
+        if hasattr(self, 'price_chart'):
+            self.render.invalidate('chart')
+            
     def create_main_tab(self):
         main_frame = tk.Frame(self.notebook, bg=self.current_theme["bg_main"])
         self.notebook.add(main_frame, text="📊 Торговля")
@@ -131,10 +272,7 @@ class ProCryptoGUI:
         self.create_portfolio_panel(right_frame)
         self.create_mining_panel(left_frame)
         
-    def create_stats_tab(self):
-        stats_frame = tk.Frame(self.notebook, bg=self.current_theme["bg_main"])
-        self.notebook.add(stats_frame, text="📈 Статистика")
-        
+    def create_stats_tab(self, stats_frame):
         tk.Label(stats_frame, text="📈 ДЕТАЛЬНАЯ СТАТИСТИКА",
                 font=self.fonts['title'],
                 bg=self.current_theme["bg_main"],
@@ -146,10 +284,7 @@ class ProCryptoGUI:
         self.create_key_metrics(stats_container)
         self.create_charts_panel(stats_container)
         
-    def create_settings_tab(self):
-        settings_frame = tk.Frame(self.notebook, bg=self.current_theme["bg_main"])
-        self.notebook.add(settings_frame, text="⚙️ Настройки")
-        
+    def create_settings_tab(self, settings_frame):
         tk.Label(settings_frame, text="⚙️ НАСТРОЙКИ",
                 font=self.fonts['title'],
                 bg=self.current_theme["bg_main"],
@@ -186,6 +321,17 @@ class ProCryptoGUI:
                                  state="readonly", font=self.fonts['body'])
         lang_combo.pack(fill='x', pady=5)
         
+        profile_frame = tk.Frame(settings_container, bg=self.current_theme["bg_card"])
+        profile_frame.pack(fill='x', padx=30, pady=10)
+        
+        self.profile_var = tk.BooleanVar(value=profiler.active)
+        tk.Checkbutton(profile_frame, text="🔬 Профилирование (cProfile + tracemalloc)",
+                      variable=self.profile_var,
+                      font=self.fonts['body'],
+                      bg=self.current_theme["bg_card"],
+                      fg=self.current_theme["text_primary"],
+                      command=self.toggle_profiling).pack(anchor='w')
+        
         buttons_frame = tk.Frame(settings_container, bg=self.current_theme["bg_card"])
         buttons_frame.pack(fill='x', padx=30, pady=20)
         
@@ -242,7 +388,7 @@ class ProCryptoGUI:
                 fg=self.current_theme.get("text_secondary", "#64748b")).pack()
         
         self.balance_label = tk.Label(balance_frame,
-                                     text=f"${self.balance:,.2f}",
+                                     text=f"${self.sim.ledger.balance:,.2f}",
                                      font=self.fonts['number'],
                                      bg=self.current_theme["bg_card"],
                                      fg=self.current_theme["success"])
@@ -272,7 +418,7 @@ class ProCryptoGUI:
                 fg=self.current_theme.get("text_secondary", "#64748b")).pack()
         
         self.profit_label = tk.Label(profit_frame,
-                                    text=f"${self.stats['total_profit']:.2f}",
+                                    text=f"${self.sim.metrics.realized_pnl:.2f}",
                                     font=self.fonts['number'],
                                     bg=self.current_theme["bg_card"],
                                     fg=self.current_theme["success"])
@@ -306,15 +452,20 @@ class ProCryptoGUI:
         metrics_container.pack(fill='both', expand=True, padx=30, pady=10)
         
         metrics_data = [
-            ("Всего сделок", self.stats['total_trades'], "🔄"),
-            ("Успешных сделок", self.stats['successful_trades'], "✅"),
-            ("Лучшая сделка", f"${self.stats['best_trade']:.2f}", "🚀"),
-            ("Худшая сделка", f"${self.stats['worst_trade']:.2f}", "📉"),
-            ("ROI", f"{((self.balance - self.stats['start_balance']) / self.stats['start_balance'] * 100):.1f}%", "📊"),
-            ("Майнинг заработок", f"${self.total_earned:.2f}", "⛏️")
+            ('total_trades', "Всего сделок", "🔄"),
+            ('wins', "Успешных сделок", "✅"),
+            ('best_trade', "Лучшая сделка", "🚀"),
+            ('worst_trade', "Худшая сделка", "📉"),
+            ('roi', "ROI", "📊"),
+            ('mining', "Майнинг заработок", "⛏️"),
+            ('max_drawdown', "Макс. просадка", "🔻"),
+            ('volatility', "Волатильность", "🌊"),
+            ('sharpe', "Коэффициент Шарпа", "⚖️")
         ]
+        values = self.metric_texts()
+        self.metric_labels = {}
         
-        for i, (label, value, icon) in enumerate(metrics_data):
+        for i, (key, label, icon) in enumerate(metrics_data):
             row = i // 3
             col = i % 3
             
@@ -326,10 +477,11 @@ class ProCryptoGUI:
                     bg=metric_frame['bg'],
                     fg=self.current_theme.get("text_secondary", "#64748b")).pack(pady=5)
             
-            tk.Label(metric_frame, text=str(value),
-                    font=self.fonts['number'],
-                    bg=metric_frame['bg'],
-                    fg=self.current_theme["text_primary"]).pack(pady=2)
+            self.metric_labels[key] = tk.Label(metric_frame, text=values[key],
+                                               font=self.fonts['number'],
+                                               bg=metric_frame['bg'],
+                                               fg=self.current_theme["text_primary"])
+            self.metric_labels[key].pack(pady=2)
         
         for i in range(3):
             metrics_container.grid_columnconfigure(i, weight=1)
@@ -352,23 +504,14 @@ class ProCryptoGUI:
                     fg=self.current_theme.get("text_secondary", "#64748b")).pack(expand=True)
             
     def create_price_chart(self, parent):
-        fig, ax = plt.subplots(figsize=(12, 6), facecolor=self.current_theme["bg_card"])
-        ax.set_facecolor(self.current_theme["bg_card"])
-        
-        x = np.linspace(0, 100, 100)
-        for i, (token, price) in enumerate(list(self.prices.items())[:4]):
-            y = price + np.sin(x/10 + i) * price * 0.1 + np.random.normal(0, price*0.02, 100)
-            ax.plot(x, y, label=token, linewidth=2)
-        
-        ax.set_title('Динамика цен криптовалют', color=self.current_theme["text_primary"])
-        ax.set_xlabel('Время', color=self.current_theme["text_primary"])
-        ax.set_ylabel('Цена ($)', color=self.current_theme["text_primary"])
-        ax.legend()
-        ax.grid(True, alpha=0.3)
-        
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True, padx=20, pady=10)
+        # matplotlib загружается только здесь, при первом открытии статистики
+        from live_chart import LiveChart
+        self.price_chart = LiveChart(parent, self.sim.history, self.current_theme,
+                                     self.sim.engine.symbols[:4])
+        self.price_chart.pack(fill='both', expand=True, padx=20, pady=10)
+        # График — самая дорогая и наименее срочная панель общего цикла отрисовки
+        self.render.add('chart', self.price_chart.on_frame, priority=3)
+        self.render.invalidate('chart')
         
     def create_market_panel(self, parent):
         market_card = self.create_card(parent, height=400)
@@ -390,26 +533,9 @@ class ProCryptoGUI:
                                command=self.manual_update)
         refresh_btn.pack(side='right')
         
-        self.market_container = tk.Frame(market_card, bg=self.current_theme["bg_card"])
-        self.market_container.pack(fill='both', expand=True, padx=20, pady=10)
-        
-        headers_frame = tk.Frame(self.market_container, bg=self.current_theme.get("border", "#e2e8f0"))
-        headers_frame.pack(fill='x', pady=(0, 10))
-        
-        headers = ['Монета', 'Цена', 'Изменение', 'Действие']
-        for i, header in enumerate(headers):
-            label = tk.Label(headers_frame, text=header,
-                           font=self.fonts['body'],
-                           bg=headers_frame['bg'],
-                           fg=self.current_theme["text_primary"],
-                           pady=10)
-            label.grid(row=0, column=i, sticky='ew', padx=5)
-            
-        for i in range(4):
-            headers_frame.grid_columnconfigure(i, weight=1)
-            
-        self.tokens_container = tk.Frame(self.market_container, bg=self.current_theme["bg_card"])
-        self.tokens_container.pack(fill='both', expand=True)
+        self.market_grid = MarketGrid(market_card, self.sim.engine, self.current_theme,
+                                      self.fonts, self.quick_buy)
+        self.market_grid.pack(fill='both', expand=True, padx=20, pady=10)
         
     def create_trading_panel(self, parent):
         trading_card = self.create_card(parent, height=280)
@@ -428,9 +554,9 @@ class ProCryptoGUI:
                 bg=self.current_theme["bg_card"],
                 fg=self.current_theme["text_primary"]).grid(row=0, column=0, sticky='w', pady=5)
         
-        self.token_var = tk.StringVar(value="BTC")
+        self.token_var = tk.StringVar(value=self.sim.engine.symbols[0])
         token_combo = ttk.Combobox(form_frame, textvariable=self.token_var,
-                                  values=list(self.prices.keys()),
+                                  values=list(self.sim.prices.keys()),
                                   state="readonly", font=self.fonts['body'])
         token_combo.grid(row=0, column=1, padx=(10, 0), pady=5, sticky='ew')
         
@@ -475,6 +601,14 @@ class ProCryptoGUI:
         self.portfolio_container = tk.Frame(portfolio_card, bg=self.current_theme["bg_card"])
         self.portfolio_container.pack(fill='both', expand=True, padx=20, pady=10)
         
+        self.portfolio_empty_label = tk.Label(self.portfolio_container,
+                                             text="Ваш портфель пуст\n\nНачните торговать!",
+                                             font=self.fonts['body'],
+                                             bg=self.current_theme["bg_card"],
+                                             fg=self.current_theme.get("text_secondary", "#64748b"),
+                                             justify='center')
+        self.portfolio_rows = {}
+        
     def create_mining_panel(self, parent):
         mining_card = self.create_card(parent, height=200)
         mining_card.pack(fill='x')
@@ -495,9 +629,14 @@ class ProCryptoGUI:
         buttons_frame = tk.Frame(mining_card, bg=self.current_theme["bg_card"])
         buttons_frame.pack(pady=15)
         
-        self.mining_btn = tk.Button(buttons_frame, text="▶️ НАЧАТЬ МАЙНИНГ",
+        if self.mining_active:
+            mining_text, mining_bg = "⏹️ ОСТАНОВИТЬ", self.current_theme.get("danger", "#ef4444")
+        else:
+            mining_text, mining_bg = "▶️ НАЧАТЬ МАЙНИНГ", self.current_theme["success"]
+        
+        self.mining_btn = tk.Button(buttons_frame, text=mining_text,
                                    font=self.fonts['button'],
-                                   bg=self.current_theme["success"],
+                                   bg=mining_bg,
                                    fg="white", border=0,
                                    padx=20, pady=8,
                                    command=self.toggle_mining)
@@ -511,6 +650,10 @@ class ProCryptoGUI:
                                command=self.upgrade_mining)
         upgrade_btn.pack(side='left')
         
+        if self.mining_symbol is None:
+            self.mining_btn.configure(state='disabled')
+            upgrade_btn.configure(state='disabled')
+        
     def create_card(self, parent, width=None, height=None):
         card = tk.Frame(parent, bg=self.current_theme["bg_card"], relief='solid', bd=1)
         if width:
@@ -520,140 +663,137 @@ class ProCryptoGUI:
         return card
         
     def start_updates(self):
-        self.update_prices()
-        self.update_time()
+        self.scheduler.every(self.sim.tick_interval, self.update_prices, 'prices', delay=0)
+        self.scheduler.every(self.render.interval, self.render.frame, 'render', delay=0)
+        self.scheduler.every(1.0, self.update_time, 'clock', delay=0)
+        if self.mining_symbol is not None:
+            self.scheduler.every(5.0, instruments.timed('mining', self.credit_mining), 'mining')
+        self.scheduler.every(self.config.get("autosave_interval", 60), self.save_session, 'autosave')
+        self.scheduler.attach(self.root)
         
     def update_prices(self):
-        for token in self.prices:
-            change = random.uniform(-0.05, 0.05)
-            self.prices[token] *= (1 + change)
-            self.prices[token] = max(0.01, self.prices[token])
-            
-        self.time_history.append(datetime.now())
-        for token, price in self.prices.items():
-            self.price_history[token].append(price)
-            
-        if len(self.time_history) > 100:
-            self.time_history = self.time_history[-100:]
-            for token in self.price_history:
-                self.price_history[token] = self.price_history[token][-100:]
-            
-        self.update_market_display()
-        self.update_portfolio_display()
-        self.update_stats_display()
-        
-        self.root.after(3000, self.update_prices)
+        # Тик только помечает панели; рисует их цикл отрисовки раз в кадр
+        self.sim.tick()
+        if self.gateway is not None:
+            self.gateway.publish_tick()
+        self.render.invalidate(tick=True)
         
     def update_time(self):
-        current_time = datetime.now().strftime("%d.%m.%Y %H:%M:%S")
+        current_time = self.sim.clock.now().strftime("%d.%m.%Y %H:%M:%S")
         if hasattr(self, 'time_label'):
             self.time_label.configure(text=current_time)
-        self.root.after(1000, self.update_time)
         
     def update_market_display(self):
-        if not hasattr(self, 'tokens_container'):
+        if not hasattr(self, 'market_grid'):
             return
             
-        for widget in self.tokens_container.winfo_children():
-            widget.destroy()
-            
-        for i, (symbol, price) in enumerate(self.prices.items()):
-            row_frame = tk.Frame(self.tokens_container, 
-                               bg=self.current_theme.get("hover", "#f1f5f9") if i % 2 == 0 else self.current_theme["bg_card"])
-            row_frame.pack(fill='x', pady=2)
-            
-            tk.Label(row_frame, text=f"🪙 {symbol}",
-                    font=self.fonts['body'],
-                    bg=row_frame['bg'],
-                    fg=self.current_theme["text_primary"]).grid(row=0, column=0, padx=15, pady=8, sticky='w')
-            
-            price_text = f"${price:.2f}" if price >= 1 else f"${price:.6f}"
-            tk.Label(row_frame, text=price_text,
-                    font=self.fonts['number'],
-                    bg=row_frame['bg'],
-                    fg=self.current_theme["text_primary"]).grid(row=0, column=1, padx=15, pady=8)
-            
-            change = random.uniform(-5, 5)
-            change_text = f"{'▲' if change > 0 else '▼'} {change:+.2f}%"
-            change_color = self.current_theme["success"] if change > 0 else self.current_theme.get("danger", "#ef4444")
-            tk.Label(row_frame, text=change_text,
-                    font=self.fonts['small'],
-                    bg=row_frame['bg'],
-                    fg=change_color).grid(row=0, column=2, padx=15, pady=8)
-            
-            quick_btn = tk.Button(row_frame, text="Купить",
-                                 font=self.fonts['small'],
-                                 bg=self.current_theme["primary"],
-                                 fg="white", border=0,
-                                 padx=15, pady=5,
-                                 command=lambda s=symbol: self.quick_buy(s))
-            quick_btn.grid(row=0, column=3, padx=15, pady=8)
-            
-            for j in range(4):
-                row_frame.grid_columnconfigure(j, weight=1)
-                
+        self.market_grid.update_changes()
+        self.market_grid.refresh()
+        
     def update_portfolio_display(self):
         if not hasattr(self, 'portfolio_container'):
             return
             
-        for widget in self.portfolio_container.winfo_children():
-            widget.destroy()
+        positions = self.sim.ledger.snapshot().positions
+        held = [symbol for symbol, amount in positions.items() if amount > 0]
+        self.sync_rows(self.portfolio_rows, held, self.create_portfolio_row)
             
-        if not self.portfolio:
-            empty_label = tk.Label(self.portfolio_container,
-                                  text="Ваш портфель пуст\n\nНачните торговать!",
-                                  font=self.fonts['body'],
-                                  bg=self.current_theme["bg_card"],
-                                  fg=self.current_theme.get("text_secondary", "#64748b"),
-                                  justify='center')
-            empty_label.pack(expand=True)
+        if not held:
+            self.portfolio_empty_label.pack(expand=True)
         else:
-            for symbol, amount in self.portfolio.items():
-                value = amount * self.prices[symbol]
-                
-                asset_frame = tk.Frame(self.portfolio_container, bg=self.current_theme.get("border", "#e2e8f0"))
-                asset_frame.pack(fill='x', pady=3, padx=5)
+            self.portfolio_empty_label.pack_forget()
+            for symbol in held:
+                amount = positions[symbol]
+                row = self.portfolio_rows[symbol]
+                value = amount * self.sim.prices[symbol]
+                self.set_cell(row, 'amount', text=f"Количество: {amount:.6f}")
+                self.set_cell(row, 'value', text=f"${value:.2f}")
                 
-                info_frame = tk.Frame(asset_frame, bg=asset_frame['bg'])
-                info_frame.pack(side='left', fill='both', expand=True, padx=15, pady=10)
-                
-                tk.Label(info_frame, text=f"🪙 {symbol}",
-                        font=self.fonts['body'],
-                        bg=asset_frame['bg'],
-                        fg=self.current_theme["text_primary"]).pack(anchor='w')
-                
-                tk.Label(info_frame, text=f"Количество: {amount:.6f}",
-                        font=self.fonts['small'],
-                        bg=asset_frame['bg'],
-                        fg=self.current_theme.get("text_secondary", "#64748b")).pack(anchor='w')
-                
-                value_frame = tk.Frame(asset_frame, bg=asset_frame['bg'])
-                value_frame.pack(side='right', padx=15, pady=10)
+    def create_portfolio_row(self, symbol):
+        bg = self.current_theme.get("border", "#e2e8f0")
+        
+        asset_frame = tk.Frame(self.portfolio_container, bg=bg)
+        asset_frame.pack(fill='x', pady=3, padx=5)
+        
+        row = {'frame': asset_frame, 'cache': {}}
+        instruments.count('widgets_created', 6)
+        
+        info_frame = tk.Frame(asset_frame, bg=bg)
+        info_frame.pack(side='left', fill='both', expand=True, padx=15, pady=10)
+        
+        tk.Label(info_frame, text=f"🪙 {symbol}",
+                font=self.fonts['body'],
+                bg=bg,
+                fg=self.current_theme["text_primary"]).pack(anchor='w')
+        
+        row['amount'] = tk.Label(info_frame,
+                                font=self.fonts['small'],
+                                bg=bg,
+                                fg=self.current_theme.get("text_secondary", "#64748b"))
+        row['amount'].pack(anchor='w')
+        
+        value_frame = tk.Frame(asset_frame, bg=bg)
+        value_frame.pack(side='right', padx=15, pady=10)
+        
+        row['value'] = tk.Label(value_frame,
+                               font=self.fonts['number'],
+                               bg=bg,
+                               fg=self.current_theme["success"])
+        row['value'].pack()
+        return row
+        
+    def sync_rows(self, rows, symbols, create_row):
+        # Строки создаются и удаляются только при изменении набора монет
+        if len(rows) == len(symbols) and all(s in rows for s in symbols):
+            return
+            
+        wanted = set(symbols)
+        for symbol in [s for s in rows if s not in wanted]:
+            rows.pop(symbol)['frame'].destroy()
+            
+        for symbol in symbols:
+            if symbol not in rows:
+                rows[symbol] = create_row(symbol)
                 
-                tk.Label(value_frame, text=f"${value:.2f}",
-                        font=self.fonts['number'],
-                        bg=asset_frame['bg'],
-                        fg=self.current_theme["success"]).pack()
+    def set_cell(self, row, name, **options):
+        cache = row['cache']
+        key = (name, tuple(options))
+        if cache.get(key) != options:
+            row[name].configure(**options)
+            cache[key] = options
                         
     def update_stats_display(self):
+        snapshot = self.sim.ledger.snapshot()
         if hasattr(self, 'balance_label'):
-            self.balance_label.configure(text=f"${self.balance:,.2f}")
+            self.balance_label.configure(text=f"${snapshot.balance:,.2f}")
         
-        portfolio_value = sum(amount * self.prices[symbol] 
-                             for symbol, amount in self.portfolio.items())
         if hasattr(self, 'portfolio_value_label'):
-            self.portfolio_value_label.configure(text=f"${portfolio_value:,.2f}")
+            self.portfolio_value_label.configure(text=f"${self.sim.portfolio_value():,.2f}")
         
         if hasattr(self, 'profit_label'):
-            self.profit_label.configure(text=f"${self.stats['total_profit']:.2f}")
+            self.profit_label.configure(text=f"${self.sim.metrics.realized_pnl:.2f}")
         
         if hasattr(self, 'winrate_label'):
-            if self.stats['total_trades'] > 0:
-                win_rate = (self.stats['successful_trades'] / self.stats['total_trades']) * 100
-                self.winrate_label.configure(text=f"{win_rate:.1f}%")
-            else:
-                self.winrate_label.configure(text="0%")
+            self.winrate_label.configure(text=f"{self.sim.metrics.win_rate:.1f}%")
+            
+        if hasattr(self, 'metric_labels'):
+            for key, text in self.metric_texts().items():
+                self.metric_labels[key].configure(text=text)
                 
+    def metric_texts(self):
+        m = self.sim.metrics
+        return {
+            'total_trades': str(m.total_trades),
+            'wins': str(m.wins),
+            'best_trade': f"${m.best_trade:.2f}",
+            'worst_trade': f"${m.worst_trade:.2f}",
+            'roi': f"{m.roi:.1f}%",
+            'mining': f"${self.sim.ledger.snapshot().earned:.2f}",
+            'max_drawdown': f"{m.max_drawdown * 100:.1f}%",
+            'volatility': f"{m.volatility * 100:.1f}%",
+            'sharpe': f"{m.sharpe:.2f}"
+        }
+        
     def manual_update(self):
         self.update_prices()
         
@@ -667,41 +807,14 @@ class ProCryptoGUI:
         try:
             symbol = self.token_var.get()
             amount = float(self.amount_entry.get())
-            cost = amount * self.prices[symbol]
+            trade = self.sim.buy(symbol, amount)
             
-            if cost <= self.balance:
-                self.balance -= cost
-                if symbol in self.portfolio:
-                    self.portfolio[symbol] += amount
-                else:
-                    self.portfolio[symbol] = amount
-                    
-                self.stats['total_trades'] += 1
-                profit = cost * random.uniform(-0.1, 0.2)
-                self.stats['total_profit'] += profit
-                
-                if profit > 0:
-                    self.stats['successful_trades'] += 1
-                    
-                if profit > self.stats['best_trade']:
-                    self.stats['best_trade'] = profit
-                    
-                if profit < self.stats['worst_trade']:
-                    self.stats['worst_trade'] = profit
-                    
-                self.stats['trade_history'].append({
-                    'type': 'buy',
-                    'symbol': symbol,
-                    'amount': amount,
-                    'price': self.prices[symbol],
-                    'timestamp': datetime.now()
-                })
-                    
-                messagebox.showinfo("✅ Успешная покупка!", 
-                                   f"Куплено {amount} {symbol} за ${cost:.2f}")
-                self.amount_entry.delete(0, tk.END)
-            else:
-                messagebox.showerror("❌ Ошибка", "Недостаточно средств!")
+            messagebox.showinfo("✅ Успешная покупка!", 
+                               f"Куплено {trade['amount']} {symbol} за ${trade['amount'] * trade['price']:.2f}")
+            self.amount_entry.delete(0, tk.END)
+            self.render.invalidate('stats', 'portfolio')
+        except LedgerError as e:
+            messagebox.showerror("❌ Ошибка", str(e))
         except ValueError:
             messagebox.showerror("❌ Ошибка", "Введите корректное количество!")
             
@@ -709,73 +822,52 @@ class ProCryptoGUI:
         try:
             symbol = self.token_var.get()
             amount = float(self.amount_entry.get())
+            trade = self.sim.sell(symbol, amount)
             
-            if symbol in self.portfolio and self.portfolio[symbol] >= amount:
-                revenue = amount * self.prices[symbol]
-                self.balance += revenue
-                self.portfolio[symbol] -= amount
-                
-                if self.portfolio[symbol] <= 0:
-                    del self.portfolio[symbol]
-                    
-                self.stats['total_trades'] += 1
-                profit = revenue * random.uniform(-0.1, 0.2)
-                self.stats['total_profit'] += profit
-                
-                if profit > 0:
-                    self.stats['successful_trades'] += 1
-                    
-                self.stats['trade_history'].append({
-                    'type': 'sell',
-                    'symbol': symbol,
-                    'amount': amount,
-                    'price': self.prices[symbol],
-                    'timestamp': datetime.now()
-                })
-                    
-                messagebox.showinfo("✅ Успешная продажа!", 
-                                   f"Продано {amount} {symbol} за ${revenue:.2f}")
-                self.amount_entry.delete(0, tk.END)
-                self.update_portfolio_display()
-            else:
-                messagebox.showerror("❌ Ошибка", "Недостаточно токенов!")
+            messagebox.showinfo("✅ Успешная продажа!", 
+                               f"Продано {trade['amount']} {symbol} за ${trade['amount'] * trade['price']:.2f}")
+            self.amount_entry.delete(0, tk.END)
+            self.render.invalidate('stats', 'portfolio')
+        except LedgerError as e:
+            messagebox.showerror("❌ Ошибка", str(e))
         except ValueError:
             messagebox.showerror("❌ Ошибка", "Введите корректное количество!")
             
     def toggle_mining(self):
+        if self.mining_symbol is None:
+            return
         if self.mining_active:
             self.mining_active = False
+            self.credit_reward(self.mining.stop(self.farm, self.scheduler.clock()))
             self.mining_btn.configure(text="▶️ НАЧАТЬ МАЙНИНГ", bg=self.current_theme["success"])
         else:
             self.mining_active = True
+            self.mining.start(self.farm, self.scheduler.clock())
             self.mining_btn.configure(text="⏹️ ОСТАНОВИТЬ", bg=self.current_theme.get("danger", "#ef4444"))
-            self.start_mining_process()
             
-    def start_mining_process(self):
-        def mining_loop():
-            while self.mining_active:
-                time.sleep(5)
-                if self.mining_active:
-                    reward = self.mining_power * random.uniform(0.0001, 0.0005)
-                    if "BTC" in self.portfolio:
-                        self.portfolio["BTC"] += reward
-                    else:
-                        self.portfolio["BTC"] = reward
-                    
-                    self.total_earned += reward * self.prices["BTC"]
-                    
-        threading.Thread(target=mining_loop, daemon=True).start()
+    def credit_mining(self):
+        rewards = self.mining.accrue(self.scheduler.clock())
+        self.credit_reward(rewards[self.farm])
+        
+    def credit_reward(self, reward):
+        symbol = self.mining_symbol
+        if reward > 0 and symbol is not None:
+            self.sim.ledger.credit(symbol, float(reward), float(reward) * self.sim.prices[symbol])
         
     def upgrade_mining(self):
+        if self.mining_symbol is None:
+            return
         cost = int(self.mining_power * 1000)
         
         result = messagebox.askyesno("🔧 Улучшение майнинга", 
                                     f"Улучшить майнинг ферму за ${cost}?\n\n"
                                     f"Мощность: {self.mining_power:.1f} → {self.mining_power + 0.5:.1f} TH/s")
         if result:
-            if self.balance >= cost:
-                self.balance -= cost
+            if self.sim.ledger.available_cash() >= cost:
+                self.sim.ledger.charge(cost)
                 self.mining_power += 0.5
+                self.credit_reward(self.mining.set_power(self.farm, self.mining_power,
+                                                         self.scheduler.clock()))
                 messagebox.showinfo("✅ Успех!", "Майнинг ферма улучшена!")
             else:
                 messagebox.showerror("❌ Ошибка", "Недостаточно средств!")
@@ -787,20 +879,34 @@ class ProCryptoGUI:
         
         messagebox.showinfo("✅ Успех!", "Настройки сохранены!\nПерезапустите приложение для применения изменений.")
         
+    def toggle_profiling(self):
+        if self.profile_var.get():
+            profiler.start(cpu=True, memory=True)
+            return
+        if not profiler.active:
+            return
+        path = self.save_profile()
+        if path:
+            messagebox.showinfo("🔬 Профилирование", f"Отчёт сохранён в {path}")
+            
+    def save_profile(self):
+        path = self.config.get("profile_path", "profile.txt")
+        try:
+            return profiler.save(path)
+        except OSError as e:
+            print(f"Ошибка сохранения профиля: {e}")
+            return None
+            
     def reset_game(self):
         result = messagebox.askyesno("🔄 Сброс игры", 
                                     "Вы уверены, что хотите сбросить все данные?\n\nЭто действие нельзя отменить!")
         if result:
-            self.balance = 10000.0
-            self.portfolio = {token: 0.0 for token in self.prices}
-            self.stats = {
-                'total_trades': 0, 'win_rate': 0.0, 'total_profit': 0.0,
-                'best_trade': 0.0, 'worst_trade': 0.0, 'roi': 0.0,
-                'trade_history': []
-            }
-            self.total_earned = 0.0
+            self.sim.reset(10000.0)
             self.mining_power = 1.0
             self.mining_active = False
+            self.mining.stop(self.farm, self.scheduler.clock())
+            self.mining.set_power(self.farm, self.mining_power, self.scheduler.clock())
+            self.render.invalidate()
             
             messagebox.showinfo("✅ Успех!", "Игра сброшена!")
             
@@ -811,6 +917,19 @@ class ProCryptoGUI:
         self.root.geometry(f"+{x}+{y}")
         
         self.root.mainloop()
+        
+        self.credit_mining()
+        self.save_session(wait=True)
+        if self.gateway is not None:
+            self.gateway.stop()
+        if self.order_api is not None:
+            self.order_api.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if profiler.active:
+            self.save_profile()
+        if self.journal is not None:
+            self.journal.close()
 
 if __name__ == "__main__":
     try:
@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from web import ServerThread, HttpError, read_request, response
+
+# Гистограмма в духе HDR: до 2**SUB_BITS нс значения точные, дальше на каждую степень
+# двойки 2**(SUB_BITS - 1) корзин, то есть относительная погрешность не больше ~3%
+SUB_BITS = 6
+HALF = 1 << (SUB_BITS - 1)
+BUCKETS = 64 * HALF
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+PROFILE_ENV = 'CRYPTO_SIM_PROFILE'
+
+
+def bucket_index(value):
+    if value < (1 << SUB_BITS):
+        return value
+    shift = value.bit_length() - SUB_BITS
+    return (shift << (SUB_BITS - 1)) + (value >> shift)
+
+
+def bucket_upper(index):
+    if index < (1 << SUB_BITS):
+        return index
+    shift = index // HALF - 1
+    return ((index - shift * HALF + 1) << shift) - 1
+
+
+class Histogram:
+    # Задержки в наносекундах; запись — одно сложение в списке корзин
+
+    def __init__(self):
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def record(self, value):
+        value = max(0, int(value))
+        self.counts[min(bucket_index(value), BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def quantiles(self, qs=QUANTILES):
+        result = {}
+        if not self.count:
+            return {q: 0 for q in qs}
+        targets = sorted(qs)
+        seen = 0
+        i = 0
+        for index, n in enumerate(self.counts):
+            if not n:
+                continue
+            seen += n
+            while i < len(targets) and seen >= targets[i] * self.count:
+                result[targets[i]] = min(bucket_upper(index), self.max)
+                i += 1
+            if i == len(targets):
+                break
+        return result
+
+    def summary(self):
+        # В миллисекундах, для JSON и настроек
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count / 1e6 if self.count else 0.0,
+            'min_ms': (self.min or 0) / 1e6,
+            'max_ms': self.max / 1e6,
+            **{f"p{q * 100:g}_ms": v / 1e6 for q, v in self.quantiles().items()},
+        }
+
+
+class Instruments:
+    # Счётчики, таймеры стадий и значения, которые читаются по запросу (колбэки).
+    # Один экземпляр на процесс: instrumentation.instruments.
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self.callbacks = {}
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record(self, name, nanoseconds):
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Histogram()
+        timer.record(nanoseconds)
+
+    @contextmanager
+    def timer(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter_ns() - start)
+
+    def timed(self, name, callback):
+        # Обёртка для колбэков планировщика и цикла отрисовки
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter_ns() - start)
+        wrapper.__name__ = getattr(callback, '__name__', name)
+        return wrapper
+
+    def register(self, name, read, kind='gauge'):
+        # kind: 'counter' — монотонный счётчик (заявки биржи), 'gauge' — текущее значение
+        self.callbacks[name] = (read, kind)
+
+    def unregister(self, name):
+        self.callbacks.pop(name, None)
+
+    def read_callbacks(self):
+        values = {}
+        for name, (read, kind) in list(self.callbacks.items()):
+            try:
+                values[name] = (read(), kind)
+            except Exception as e:
+                print(f"Метрика {name} недоступна: {e}")
+        return values
+
+    def reset(self):
+        self.counters.clear()
+        self.timers.clear()
+
+    def snapshot(self):
+        # Читается из потока сервера метрик, пока поток Tk добавляет новые имена:
+        # словари обходятся по копиям
+        values = self.read_callbacks()
+        return {
+            'counters': {**dict(list(self.counters.items())),
+                         **{n: v for n, (v, kind) in values.items() if kind == 'counter'}},
+            'gauges': {n: v for n, (v, kind) in values.items() if kind != 'counter'},
+            'timers': {name: timer.summary() for name, timer in list(self.timers.items())},
+            'profiling': profiler.active,
+        }
+
+    def prometheus(self, prefix='crypto_sim'):
+        lines = []
+        for name, value in sorted(list(self.counters.items())):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        for name, (value, kind) in sorted(self.read_callbacks().items()):
+            metric = f"{prefix}_{name}_total" if kind == 'counter' else f"{prefix}_{name}"
+            lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric} {value:g}")
+        for name, timer in sorted(list(self.timers.items())):
+            metric = f"{prefix}_{name}_seconds"
+            lines.append(f"# TYPE {metric} summary")
+            for q, v in timer.quantiles().items():
+                lines.append(f'{metric}{{quantile="{q:g}"}} {v / 1e9:.9f}')
+            lines.append(f"{metric}_sum {timer.total / 1e9:.9f}")
+            lines.append(f"{metric}_count {timer.count}")
+        return '\n'.join(lines) + '\n'
+
+
+class Profiler:
+    # Профилирование по запросу: cProfile (время) и/или tracemalloc (память).
+    # Включается из настроек или переменной окружения CRYPTO_SIM_PROFILE=cpu|memory|all.
+
+    def __init__(self):
+        self.cpu = None
+        self.memory = False
+        self.started_at = None
+
+    @property
+    def active(self):
+        return self.cpu is not None or self.memory
+
+    def start(self, cpu=True, memory=False):
+        if self.active:
+            return
+        if cpu:
+            self.cpu = cProfile.Profile()
+            self.cpu.enable()
+        if memory:
+            tracemalloc.start(25)
+            self.memory = True
+        self.started_at = time.time()
+
+    def start_from_env(self):
+        mode = os.environ.get(PROFILE_ENV, '').lower()
+        if mode in ('1', 'cpu', 'all', 'memory'):
+            self.start(cpu=mode != 'memory', memory=mode in ('memory', 'all'))
+        return self.active
+
+    def stop(self, top=30):
+        # Возвращает текстовый отчёт
+        if not self.active:
+            return ""
+        out = io.StringIO()
+        out.write(f"Профиль за {time.time() - self.started_at:.1f} с\n\n")
+        if self.cpu is not None:
+            self.cpu.disable()
+            pstats.Stats(self.cpu, stream=out).sort_stats('cumulative').print_stats(top)
+            self.cpu = None
+        if self.memory:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.memory = False
+            out.write(f"\nПамять: сейчас {current / 2**20:.1f} МБ, пик {peak / 2**20:.1f} МБ\n")
+            for stat in snapshot.statistics('lineno')[:top]:
+                out.write(f"{stat}\n")
+        return out.getvalue()
+
+    def save(self, path, top=30):
+        report = self.stop(top)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(report)
+        return path
+
+
+instruments = Instruments()
+profiler = Profiler()
+
+
+class MetricsServer:
+    # /metrics — текст для Prometheus, /metrics.json — то же в JSON
+
+    def __init__(self, host='127.0.0.1', port=8767, source=instruments):
+        self.source = source
+        self.server = ServerThread(self.handle, host, port, name='metrics')
+
+    @property
+    def port(self):
+        return self.server.port
+
+    def start(self):
+        self.server.start()
+        return self
+
+    def stop(self):
+        self.server.stop()
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = None
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    if request.method != 'GET':
+                        raise HttpError(405, "Только GET")
+                    if request.path == '/metrics':
+                        status, body = 200, self.source.prometheus().encode('utf-8')
+                        content_type = 'text/plain; version=0.0.4'
+                    elif request.path == '/metrics.json':
+                        status, body, content_type = 200, self.source.snapshot(), 'application/json'
+                    else:
+                        raise HttpError(404, "Нет такого адреса")
+                except HttpError as e:
+                    status, body, content_type = e.status, {'error': str(e)}, 'application/json'
+                except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+                    raise
+                except Exception as e:
+                    # Ошибка при сборе метрик не должна обрывать соединение без ответа
+                    print(f"Ошибка сервера метрик: {e}")
+                    status, body, content_type = 500, {'error': "Внутренняя ошибка сервера"}, 'application/json'
+                    request = None
+                keep_alive = request is not None and request.keep_alive
+                writer.write(response(status, body, content_type, keep_alive=keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+def main():
+    # Симулятор без интерфейса с открытыми метриками — для нагрузочных замеров
+    from market_engine import MarketEngine
+    from simulator import Simulator
+
+    parser = argparse.ArgumentParser(description="Метрики симулятора без интерфейса")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8767)
+    parser.add_argument('--rate', type=float, default=10.0, help="тиков в секунду")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    sim = Simulator(MarketEngine(seed=args.seed), tick_interval=1.0 / args.rate)
+    sim.instrument()
+    server = MetricsServer(args.host, args.port).start()
+    print(f"Метрики: http://{args.host}:{server.port}/metrics")
+    profiler.start_from_env()
+    try:
+        while True:
+            sim.tick()
+            time.sleep(sim.tick_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        if profiler.active:
+            print(profiler.stop())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from cost_basis import CostBasis, FIFO
+
+LedgerSnapshot = namedtuple('LedgerSnapshot', 'balance positions earned trade_count version')
+
+
+class LedgerError(ValueError):
+    pass
+
+
+class Ledger:
+    # Единственный владелец баланса, позиций и истории сделок. Все изменения идут
+    # пакетами под одной блокировкой, UI читает только неизменяемые снимки.
+
+    def __init__(self, balance=10000.0, journal=None, cost_method=FIFO):
+        # RLock: buy/sell держат блокировку на весь пакет вместе с учётом себестоимости
+        self._lock = threading.RLock()
+        self.journal = journal
+        self._journal_base = journal.count if journal is not None else 0
+        self._balance = float(balance)
+        self._positions = {}
+        self._earned = 0.0
+        self._trades = []
+        self._version = 0
+        self._snapshot = None
+        self.basis = CostBasis(cost_method)
+        # Резервы под лежащие в книге заявки: деньги под покупки, монеты под продажи.
+        # Любое изменение, кроме расчёта самой заявки (он сначала снимает резерв), их не трогает
+        self._reserved_cash = 0.0
+        self._reserved = {}
+
+    @property
+    def balance(self):
+        return self._balance
+
+    @property
+    def version(self):
+        return self._version
+
+    def position(self, symbol):
+        return self._positions.get(symbol, 0.0)
+
+    @property
+    def reserved_cash(self):
+        return self._reserved_cash
+
+    def reserved(self, symbol=None):
+        if symbol is None:
+            return {s: q for s, q in self._reserved.items() if q > 0}
+        return self._reserved.get(symbol, 0.0)
+
+    def available_cash(self):
+        return self._balance - self._reserved_cash
+
+    def available(self, symbol):
+        return self._positions.get(symbol, 0.0) - self._reserved.get(symbol, 0.0)
+
+    def reserve(self, cash=0.0, symbol=None, amount=0.0):
+        with self._lock:
+            if cash > self.available_cash() + 1e-9:
+                raise LedgerError("Недостаточно средств!")
+            if symbol is not None and amount > self.available(symbol) + 1e-12:
+                raise LedgerError("Недостаточно токенов!")
+            self._reserved_cash += cash
+            if symbol is not None:
+                self._reserved[symbol] = self._reserved.get(symbol, 0.0) + amount
+
+    def release(self, cash=0.0, symbol=None, amount=0.0):
+        with self._lock:
+            self._reserved_cash = max(0.0, self._reserved_cash - cash)
+            if symbol is not None:
+                left = self._reserved.get(symbol, 0.0) - amount
+                if left > 1e-12:
+                    self._reserved[symbol] = left
+                else:
+                    self._reserved.pop(symbol, None)
+
+    def snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            return snapshot
+        with self._lock:
+            snapshot = LedgerSnapshot(self._balance, MappingProxyType(dict(self._positions)),
+                                      self._earned, self._trade_count(), self._version)
+            self._snapshot = snapshot
+        return snapshot
+
+    def _trade_count(self):
+        if self.journal is not None:
+            return self.journal.count - self._journal_base
+        return len(self._trades)
+
+    def trades(self):
+        # Без журнала история хранится в памяти; с журналом читается из файла
+        if self.journal is not None:
+            self.journal.flush()
+            return self.journal.records()[self._journal_base:]
+        with self._lock:
+            return tuple(self._trades)
+
+    def apply(self, cash=0.0, positions=None, trades=(), earned=0.0):
+        # Пакет изменений применяется целиком или не применяется вовсе
+        with self._lock:
+            balance = self._balance + cash
+            if cash < 0 and balance < self._reserved_cash - 1e-9:
+                raise LedgerError("Недостаточно средств!")
+
+            updated = {}
+            for symbol, delta in (positions or {}).items():
+                amount = self._positions.get(symbol, 0.0) + delta
+                if delta < 0 and amount < self._reserved.get(symbol, 0.0) - 1e-12:
+                    raise LedgerError("Недостаточно токенов!")
+                updated[symbol] = amount
+
+            self._balance = balance
+            for symbol, amount in updated.items():
+                if amount <= 1e-12:
+                    self._positions.pop(symbol, None)
+                else:
+                    self._positions[symbol] = amount
+            self._earned += earned
+            for trade in trades:
+                if self.journal is not None:
+                    self.journal.append(trade['symbol'], trade['type'], trade['amount'],
+                                        trade['price'], trade['timestamp'])
+                else:
+                    self._trades.append(trade)
+            self._version += 1
+
+    def buy(self, symbol, amount, cost, timestamp=None):
+        trade = {'type': 'buy', 'symbol': symbol, 'amount': amount, 'price': cost / amount,
+                 'timestamp': time.time_ns() if timestamp is None else timestamp}
+        with self._lock:
+            self.apply(cash=-cost, positions={symbol: amount}, trades=(trade,))
+            self.basis.buy(symbol, amount, trade['price'])
+        return trade
+
+    def sell(self, symbol, amount, revenue, timestamp=None):
+        trade = {'type': 'sell', 'symbol': symbol, 'amount': amount, 'price': revenue / amount,
+                 'timestamp': time.time_ns() if timestamp is None else timestamp}
+        with self._lock:
+            self.apply(cash=revenue, positions={symbol: -amount}, trades=(trade,))
+            trade['pnl'] = self.basis.sell(symbol, amount, trade['price'])
+        return trade
+
+    def credit(self, symbol, amount, value=0.0):
+        # Намайненное ложится лотом по рыночной цене: доход учтён в earned, а не в торговом PnL
+        with self._lock:
+            self.apply(positions={symbol: amount}, earned=value)
+            if amount > 0:
+                self.basis.buy(symbol, amount, value / amount)
+
+
+    def charge(self, cost):
+        self.apply(cash=-cost)
+
+    def state(self):
+        with self._lock:
+            return {
+                'balance': self._balance,
+                'positions': dict(self._positions),
+                'earned': self._earned,
+                'trades': list(self._trades),
+                'journal_base': self._journal_base,
+                'basis': self.basis.state(),
+            }
+
+    def restore(self, state):
+        with self._lock:
+            self._balance = state['balance']
+            self._positions = dict(state['positions'])
+            self._earned = state['earned']
+            self._trades = list(state['trades'])
+            self.basis = CostBasis.from_state(state['basis'])
+            if self.journal is not None:
+                self._journal_base = min(state['journal_base'], self.journal.count)
+            self._version += 1
+
+    def reset(self, balance=10000.0):
+        with self._lock:
+            self._balance = float(balance)
+            self._positions = {}
+            self._earned = 0.0
+            self._trades = []
+            self.basis = CostBasis(self.basis.method)
+            self._reserved_cash = 0.0
+            self._reserved = {}
+            if self.journal is not None:
+                self._journal_base = self.journal.count
+            self._version += 1
@@ -0,0 +1,102 @@
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+
+class LiveChart:
+    # Живой график поверх PriceHistory: линии создаются один раз, каждый кадр
+    # обновляет их данные и перерисовывает только линии поверх закешированного фона.
+    # Своего таймера нет: on_frame вызывается как панель общего RenderLoop.
+
+    def __init__(self, parent, history, theme, symbols, window=100):
+        self.history = history
+        self.theme = theme
+        self.symbols = list(symbols)
+        self.rows = [history.index[s] for s in self.symbols]
+        self.window = window
+
+        self.x = np.arange(window, dtype=np.float64)
+        self.y = np.full((len(self.symbols), window), np.nan)
+
+        self.figure = Figure(figsize=(12, 6), facecolor=theme["bg_card"])
+        self.ax = self.figure.add_subplot()
+        self.ax.set_facecolor(theme["bg_card"])
+        self.ax.set_title('Динамика цен криптовалют', color=theme["text_primary"])
+        self.ax.set_xlabel('Время', color=theme["text_primary"])
+        self.ax.set_ylabel('Цена ($)', color=theme["text_primary"])
+        self.ax.set_xlim(0, window - 1)
+        self.ax.grid(True, alpha=0.3)
+
+        self.lines = [
+            self.ax.plot(self.x, row, label=symbol, linewidth=2, animated=True)[0]
+            for symbol, row in zip(self.symbols, self.y)
+        ]
+        self.ax.legend(loc='upper left')
+
+        self.canvas = FigureCanvasTkAgg(self.figure, parent)
+        self.widget = self.canvas.get_tk_widget()
+        self.background = None
+        self.canvas.mpl_connect('draw_event', self.on_draw)
+
+        self.last_timestamp = None
+        self.frames_drawn = 0
+        self.full_redraws = 0
+
+    def pack(self, **kwargs):
+        self.widget.pack(**kwargs)
+
+    def start(self):
+        if self.after_id is None:
+            self.after_id = self.widget.after(self.interval, self.on_frame)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.widget.after_cancel(self.after_id)
+    
+    def on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_lines()
+
+    def on_frame(self):
+        # Скрытую вкладку не рисуем: last_timestamp не сдвигается, и кадр
+        # догонит данные, когда вкладку откроют
+        if self.widget.winfo_ismapped():
+            self.render()
+
+    def render(self):
+        times = self.history.times(last=1)
+        if not len(times) or times[-1] == self.last_timestamp:
+            return False
+        self.last_timestamp = times[-1]
+
+        prices = self.history.prices(last=self.window)
+        count = prices.shape[1]
+        self.y[:, :self.window - count] = np.nan
+        self.y[:, self.window - count:] = prices[self.rows]
+        for line, row in zip(self.lines, self.y):
+            line.set_ydata(row)
+
+        if self.background is None or self.rescale(prices[self.rows]):
+            self.full_redraws += 1
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_lines()
+            self.canvas.blit(self.figure.bbox)
+        self.frames_drawn += 1
+        return True
+
+    def draw_lines(self):
+        for line in self.lines:
+            self.ax.draw_artist(line)
+
+    def rescale(self, visible):
+        # Полная перерисовка нужна только когда данные вышли за текущие пределы оси
+        low, high = float(visible.min()), float(visible.max())
+        bottom, top = self.ax.get_ylim()
+        if bottom <= low and high <= top and (high - low) > 0.25 * (top - bottom):
+            return False
+
+        margin = max((high - low) * 0.1, abs(high) * 0.01, 0.01)
+        self.ax.set_ylim(low - margin, high + margin)
+        return True
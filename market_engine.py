@@ -0,0 +1,121 @@
+import numpy as np
+
+from price_models import UniformModel, create_model
+from symbols import SymbolRegistry
+
+DEFAULT_PRICES = {
+    'BTC': 45000.0, 'ETH': 3200.0, 'BNB': 420.0, 'ADA': 1.8,
+    'SOL': 120.0, 'DOT': 28.0, 'LINK': 18.5, 'MATIC': 1.2
+}
+
+
+class MarketEngine:
+    def __init__(self, prices=None, seed=None, max_change=0.05, min_price=0.01, model=None, registry=None):
+        # Набор монет — словарь цен или готовый SymbolRegistry; цены движка и есть его столбец price
+        if registry is None:
+            registry = SymbolRegistry.from_prices(prices if prices is not None else DEFAULT_PRICES)
+
+        self.registry = registry
+        self.symbols = registry.tickers
+        self.index = registry.ids
+        self.prices = registry.price
+        self.prev_prices = self.prices.copy()
+
+        self.max_change = max_change
+        self.min_price = min_price
+        self.model = model if model is not None else UniformModel(max_change)
+        self.rng = np.random.default_rng(seed)
+        self.tick_count = 0
+
+        self._factors = np.empty_like(self.prices)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def step(self):
+        factors = self.model.step(self.rng, self._factors)
+
+        self.prev_prices[:] = self.prices
+        self.prices *= factors
+        np.maximum(self.prices, self.min_price, out=self.prices)
+        self.tick_count += 1
+        return self.prices
+
+    def set_prices(self, prices):
+        # Тик из внешнего источника (повтор записи) вместо шага модели
+        self.prev_prices[:] = self.prices
+        self.prices[:] = prices
+        self.tick_count += 1
+        return self.prices
+
+    def load_path(self, path):
+        # Пакет внешних тиков сразу: движок встаёт на последнюю строку
+        self.prev_prices[:] = path[-2] if len(path) > 1 else self.prices
+        self.prices[:] = path[-1]
+        self.tick_count += len(path)
+        return self.prices
+
+    def simulate(self, ticks):
+        # Возвращает матрицу цен (ticks × symbols) и переводит движок в последнее состояние
+        if ticks <= 0:
+            return np.empty((0, len(self.symbols)))
+
+        factors = self.model.factors(self.rng, (ticks, len(self.symbols)))
+
+        path = np.cumprod(factors, axis=0)
+        path *= self.prices
+
+        floored = (path < self.min_price).any(axis=0)
+        if floored.any():
+            # Пол в 0.01 нелинеен, поэтому задетые колонки пересчитываем по шагам
+            cols = np.flatnonzero(floored)
+            current = self.prices[cols].copy()
+            for t in range(ticks):
+                current *= factors[t, cols]
+                np.maximum(current, self.min_price, out=current)
+                path[t, cols] = current
+
+        self.prev_prices[:] = path[-2] if ticks > 1 else self.prices
+        self.prices[:] = path[-1]
+        self.tick_count += ticks
+        return path
+
+    def state(self):
+        return {
+            'symbols': self.symbols,
+            'prices': self.prices.tolist(),
+            'prev_prices': self.prev_prices.tolist(),
+            'max_change': self.max_change,
+            'min_price': self.min_price,
+            'model': self.model.state(),
+            'symbol_meta': self.registry.metadata(),
+            'tick_count': self.tick_count,
+            'rng': self.rng.bit_generator.state,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        symbols = state['symbols']
+        engine = cls(dict(zip(symbols, state['prices'])),
+                     max_change=state['max_change'], min_price=state['min_price'],
+                     model=create_model(state.get('model', {'max_change': state['max_change']}),
+                                        len(symbols)))
+        if 'symbol_meta' in state:
+            engine.registry.set_metadata(state['symbol_meta'])
+        engine.prev_prices[:] = state['prev_prices']
+        engine.tick_count = state['tick_count']
+        engine.rng.bit_generator.state = state['rng']
+        return engine
+
+    def changes(self, out=None):
+        # Изменение за последний тик в процентах, считается от реальной предыдущей цены
+        out = np.divide(self.prices, self.prev_prices, out=out)
+        out -= 1
+        out *= 100
+        return out
+
+    def price(self, symbol):
+        return float(self.prices[self.index[symbol]])
+
+    def as_dict(self):
+        return dict(zip(self.symbols, self.prices.tolist()))
@@ -0,0 +1,252 @@
+import tkinter as tk
+
+import numpy as np
+
+from instrumentation import instruments
+
+
+class MarketGrid:
+    # Виртуализированная таблица рынка: виджеты создаются только для видимых строк
+    # и переиспользуются при прокрутке, порядок и фильтр считаются на массивах движка.
+
+    ROW_HEIGHT = 40
+    DEFAULT_ROWS = 10
+    HEADERS = (('symbol', 'Монета'), ('price', 'Цена'), ('change', 'Изменение'), (None, 'Действие'))
+
+    def __init__(self, parent, engine, theme, fonts, on_buy):
+        self.engine = engine
+        self.theme = theme
+        self.fonts = fonts
+        self.on_buy = on_buy
+
+        self.symbol_array = np.array(engine.symbols)
+        self.symbol_upper = np.char.upper(self.symbol_array)
+        self.changes = np.zeros(len(engine.symbols))
+
+        self.sort_key = None
+        self.sort_desc = False
+        self.filter_mask = None
+        self.order = np.arange(len(engine.symbols))
+        self.top = 0
+        self.visible_rows = self.DEFAULT_ROWS
+        self.slots = []
+
+        self.frame = tk.Frame(parent, bg=theme["bg_card"])
+
+        filter_frame = tk.Frame(self.frame, bg=theme["bg_card"])
+        filter_frame.pack(fill='x', pady=(0, 10))
+
+        tk.Label(filter_frame, text="🔍 Фильтр:",
+                font=fonts['body'],
+                bg=theme["bg_card"],
+                fg=theme["text_primary"]).pack(side='left')
+
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add('write', lambda *args: self.set_filter(self.filter_var.get()))
+        tk.Entry(filter_frame, textvariable=self.filter_var,
+                font=fonts['body']).pack(side='left', fill='x', expand=True, padx=(10, 0))
+
+        headers_frame = tk.Frame(self.frame, bg=theme.get("border", "#e2e8f0"))
+        headers_frame.pack(fill='x', pady=(0, 10))
+
+        self.header_labels = {}
+        for i, (key, title) in enumerate(self.HEADERS):
+            label = tk.Label(headers_frame, text=title,
+                           font=fonts['body'],
+                           bg=headers_frame['bg'],
+                           fg=theme["text_primary"],
+                           pady=10)
+            label.grid(row=0, column=i, sticky='ew', padx=5)
+            if key:
+                label.bind('<Button-1>', lambda e, k=key: self.toggle_sort(k))
+                self.header_labels[key] = (label, title)
+
+        for i in range(len(self.HEADERS)):
+            headers_frame.grid_columnconfigure(i, weight=1)
+
+        list_frame = tk.Frame(self.frame, bg=theme["bg_card"])
+        list_frame.pack(fill='both', expand=True)
+
+        self.scrollbar = tk.Scrollbar(list_frame, orient='vertical', command=self.yview)
+        self.scrollbar.pack(side='right', fill='y')
+
+        self.body = tk.Frame(list_frame, bg=theme["bg_card"])
+        self.body.pack(side='left', fill='both', expand=True)
+        self.body.bind('<Configure>', self.on_resize)
+
+        for widget in (self.body, self.scrollbar):
+            widget.bind('<MouseWheel>', self.on_mousewheel)
+            widget.bind('<Button-4>', lambda e: self.scroll_rows(-3))
+            widget.bind('<Button-5>', lambda e: self.scroll_rows(3))
+
+        self.ensure_slots()
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def ensure_slots(self):
+        while len(self.slots) < self.visible_rows:
+            self.slots.append(self.create_slot())
+        while len(self.slots) > self.visible_rows:
+            self.slots.pop()['frame'].destroy()
+
+    def create_slot(self):
+        instruments.count('widgets_created', 5)
+        slot_frame = tk.Frame(self.body)
+        slot = {'frame': slot_frame, 'cache': {}, 'index': None, 'shown': False}
+
+        slot['symbol'] = tk.Label(slot_frame, font=self.fonts['body'],
+                                 fg=self.theme["text_primary"], anchor='w')
+        slot['symbol'].grid(row=0, column=0, padx=15, pady=8, sticky='w')
+
+        slot['price'] = tk.Label(slot_frame, font=self.fonts['number'],
+                                fg=self.theme["text_primary"])
+        slot['price'].grid(row=0, column=1, padx=15, pady=8)
+
+        slot['change'] = tk.Label(slot_frame, font=self.fonts['small'])
+        slot['change'].grid(row=0, column=2, padx=15, pady=8)
+
+        quick_btn = tk.Button(slot_frame, text="Купить",
+                             font=self.fonts['small'],
+                             bg=self.theme["primary"],
+                             fg="white", border=0,
+                             padx=15, pady=5,
+                             command=lambda s=slot: self.buy_from_slot(s))
+        quick_btn.grid(row=0, column=3, padx=15, pady=8)
+
+        for j in range(4):
+            slot_frame.grid_columnconfigure(j, weight=1)
+
+        for widget in (slot_frame, slot['symbol'], slot['price'], slot['change'], quick_btn):
+            widget.bind('<MouseWheel>', self.on_mousewheel)
+            widget.bind('<Button-4>', lambda e: self.scroll_rows(-3))
+            widget.bind('<Button-5>', lambda e: self.scroll_rows(3))
+        return slot
+
+    def buy_from_slot(self, slot):
+        if slot['index'] is not None:
+            self.on_buy(self.engine.symbols[slot['index']])
+
+    def set_cell(self, slot, name, **options):
+        cache = slot['cache']
+        key = (name, tuple(options))
+        if cache.get(key) != options:
+            slot[name].configure(**options)
+            cache[key] = options
+
+    def set_filter(self, prefix):
+        prefix = prefix.strip().upper()
+        self.filter_mask = np.char.startswith(self.symbol_upper, prefix) if prefix else None
+        self.top = 0
+        self.refresh(reorder=True)
+
+    def toggle_sort(self, key):
+        if self.sort_key == key:
+            self.sort_desc = not self.sort_desc
+        else:
+            self.sort_key = key
+            self.sort_desc = key != 'symbol'
+
+        for column, (label, title) in self.header_labels.items():
+            arrow = (' ▼' if self.sort_desc else ' ▲') if column == self.sort_key else ''
+            label.configure(text=title + arrow)
+        self.refresh(reorder=True)
+
+    def compute_order(self):
+        if self.filter_mask is None:
+            indices = np.arange(len(self.engine.symbols))
+        else:
+            indices = np.flatnonzero(self.filter_mask)
+
+        if self.sort_key is None:
+            return indices
+
+        if self.sort_key == 'symbol':
+            values = self.symbol_array[indices]
+        elif self.sort_key == 'price':
+            values = self.engine.prices[indices]
+        else:
+            values = self.changes[indices]
+
+        order = indices[np.argsort(values, kind='stable')]
+        return order[::-1] if self.sort_desc else order
+
+    def update_changes(self):
+        self.engine.changes(out=self.changes)
+
+    def refresh(self, reorder=False):
+        if reorder or self.sort_key in ('price', 'change'):
+            self.order = self.compute_order()
+
+        self.top = max(0, min(self.top, len(self.order) - self.visible_rows + 1))
+
+        prices = self.engine.prices
+        symbols = self.engine.symbols
+        hover = self.theme.get("hover", "#f1f5f9")
+        success = self.theme["success"]
+        danger = self.theme.get("danger", "#ef4444")
+
+        for i, slot in enumerate(self.slots):
+            position = self.top + i
+            if position >= len(self.order):
+                if slot['shown']:
+                    slot['frame'].place_forget()
+                    slot['shown'] = False
+                slot['index'] = None
+                continue
+
+            index = int(self.order[position])
+            if not slot['shown']:
+                slot['frame'].place(x=0, y=i * self.ROW_HEIGHT, relwidth=1, height=self.ROW_HEIGHT)
+                slot['shown'] = True
+
+            bg = hover if position % 2 == 0 else self.theme["bg_card"]
+            for name in ('frame', 'symbol', 'price', 'change'):
+                self.set_cell(slot, name, bg=bg)
+
+            if slot['index'] != index:
+                slot['index'] = index
+                self.set_cell(slot, 'symbol', text=f"🪙 {symbols[index]}")
+
+            price = prices[index]
+            self.set_cell(slot, 'price', text=f"${price:.2f}" if price >= 1 else f"${price:.6f}")
+
+            change = self.changes[index]
+            self.set_cell(slot, 'change',
+                          text=f"{'▲' if change > 0 else '▼'} {change:+.2f}%",
+                          fg=success if change > 0 else danger)
+
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = len(self.order)
+        if total <= self.visible_rows - 1:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, min(1.0, (self.top + self.visible_rows - 1) / total))
+
+    def scroll_rows(self, delta):
+        top = max(0, min(self.top + delta, len(self.order) - self.visible_rows + 1))
+        if top != self.top:
+            self.top = top
+            self.refresh()
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.top = int(float(args[1]) * len(self.order))
+            self.refresh()
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= max(1, self.visible_rows - 1)
+            self.scroll_rows(step)
+
+    def on_mousewheel(self, event):
+        self.scroll_rows(-3 if event.delta > 0 else 3)
+
+    def on_resize(self, event):
+        rows = max(1, event.height // self.ROW_HEIGHT) + 1
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.ensure_slots()
+            self.refresh()
@@ -0,0 +1,138 @@
+import math
+
+import numpy as np
+
+
+class Welford:
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self, count=0, mean=0.0, m2=0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    def remove(self, x):
+        if self.count <= 1:
+            self.count, self.mean, self.m2 = 0, 0.0, 0.0
+            return
+        delta = x - self.mean
+        self.count -= 1
+        self.mean -= delta / self.count
+        self.m2 -= delta * (x - self.mean)
+
+    def variance(self):
+        return max(self.m2, 0.0) / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+
+class StreamingMetrics:
+    # Все показатели обновляются за O(1) на сделку или тик: Welford для среднего и
+    # дисперсии доходностей, скользящее окно через кольцевой буфер, пик для просадки.
+
+    def __init__(self, start_equity=10000.0, window=100, periods_per_year=365 * 24 * 1200):
+        self.start_equity = start_equity
+        self.window = window
+        self.periods_per_year = periods_per_year
+
+        self.total_trades = 0
+        self.closed_trades = 0
+        self.wins = 0
+        self.realized_pnl = 0.0
+        self.best_trade = 0.0
+        self.worst_trade = 0.0
+
+        self.equity = start_equity
+        self.unrealized_pnl = 0.0
+        self.peak = start_equity
+        self.max_drawdown = 0.0
+
+        self.returns = Welford()
+        self.rolling = Welford()
+        self._window = np.zeros(window)
+        self._window_pos = 0
+
+    def record_trade(self, pnl=None):
+        # pnl = None для сделок без реализованного результата (например, покупка)
+        self.total_trades += 1
+        if pnl is None:
+            return
+        self.closed_trades += 1
+        self.realized_pnl += pnl
+        if pnl > 0:
+            self.wins += 1
+        if pnl > self.best_trade:
+            self.best_trade = pnl
+        if pnl < self.worst_trade:
+            self.worst_trade = pnl
+
+    def record_equity(self, equity, unrealized_pnl=0.0):
+        previous = self.equity
+        self.equity = equity
+        self.unrealized_pnl = unrealized_pnl
+
+        if equity > self.peak:
+            self.peak = equity
+        elif self.peak > 0:
+            drawdown = (self.peak - equity) / self.peak
+            if drawdown > self.max_drawdown:
+                self.max_drawdown = drawdown
+
+        if previous > 0:
+            r = equity / previous - 1.0
+            self.returns.add(r)
+            if self.rolling.count == self.window:
+                self.rolling.remove(self._window[self._window_pos])
+            self.rolling.add(r)
+            self._window[self._window_pos] = r
+            self._window_pos = (self._window_pos + 1) % self.window
+
+    @property
+    def win_rate(self):
+        return self.wins / self.closed_trades * 100 if self.closed_trades else 0.0
+
+    @property
+    def roi(self):
+        return (self.equity - self.start_equity) / self.start_equity * 100 if self.start_equity else 0.0
+
+    @property
+    def volatility(self):
+        # Годовая волатильность по скользящему окну доходностей
+        return self.rolling.std() * math.sqrt(self.periods_per_year)
+
+    @property
+    def sharpe(self):
+        std = self.returns.std()
+        if std == 0.0:
+            return 0.0
+        return self.returns.mean / std * math.sqrt(self.periods_per_year)
+
+    def state(self):
+        state = {key: getattr(self, key) for key in (
+            'start_equity', 'window', 'periods_per_year', 'total_trades', 'closed_trades',
+            'wins', 'realized_pnl', 'best_trade', 'worst_trade', 'equity', 'unrealized_pnl',
+            'peak', 'max_drawdown')}
+        state['returns'] = [self.returns.count, self.returns.mean, self.returns.m2]
+        state['rolling'] = [self.rolling.count, self.rolling.mean, self.rolling.m2]
+        state['rolling_window'] = self._window.tolist()
+        state['rolling_pos'] = self._window_pos
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        metrics = cls(state['start_equity'], state['window'], state['periods_per_year'])
+        for key, value in state.items():
+            if key not in ('returns', 'rolling', 'rolling_window', 'rolling_pos'):
+                setattr(metrics, key, value)
+        metrics.returns = Welford(*state['returns'])
+        metrics.rolling = Welford(*state['rolling'])
+        metrics._window[:] = state['rolling_window']
+        metrics._window_pos = state['rolling_pos']
+        return metrics
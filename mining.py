@@ -0,0 +1,87 @@
+import numpy as np
+
+# Раньше ферма раз в 5 секунд получала power * uniform(0.0001, 0.0005) BTC,
+# то есть в среднем 0.0003 BTC на 1 TH/s за 5 секунд.
+REWARD_PER_TH_SECOND = 0.0003 / 5
+
+
+class MiningFarms:
+    # Все фермы в колонках: начисление за любой прошедший промежуток считается
+    # аналитически (мощность × ставка × время), одним векторным выражением на все фермы.
+
+    def __init__(self, capacity=16, rate=REWARD_PER_TH_SECOND):
+        self.rate = rate
+        self.count = 0
+        self.power = np.zeros(capacity)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.last_accrual = np.zeros(capacity)
+        self.mined = np.zeros(capacity)
+
+    def __len__(self):
+        return self.count
+
+    def add(self, power=1.0):
+        if self.count == len(self.power):
+            grow = len(self.power)
+            self.power = np.concatenate([self.power, np.zeros(grow)])
+            self.active = np.concatenate([self.active, np.zeros(grow, dtype=bool)])
+            self.last_accrual = np.concatenate([self.last_accrual, np.zeros(grow)])
+            self.mined = np.concatenate([self.mined, np.zeros(grow)])
+
+        farm = self.count
+        self.power[farm] = power
+        self.count += 1
+        return farm
+
+    def start(self, farm, now):
+        if not self.active[farm]:
+            self.active[farm] = True
+            self.last_accrual[farm] = now
+
+    def stop(self, farm, now):
+        reward = self.accrue_one(farm, now)
+        self.active[farm] = False
+        return reward
+
+    def set_power(self, farm, power, now):
+        reward = self.accrue_one(farm, now)
+        self.power[farm] = power
+        return reward
+
+    def accrue_one(self, farm, now):
+        if not self.active[farm]:
+            return 0.0
+        reward = self.power[farm] * self.rate * max(0.0, now - self.last_accrual[farm])
+        self.last_accrual[farm] = now
+        self.mined[farm] += reward
+        return float(reward)
+
+    def accrue(self, now):
+        # Награды всех ферм с прошлого начисления; одно пробуждение покрывает любой промежуток
+        n = self.count
+        active = self.active[:n]
+        elapsed = np.maximum(now - self.last_accrual[:n], 0.0)
+        rewards = np.where(active, self.power[:n] * self.rate * elapsed, 0.0)
+        self.last_accrual[:n][active] = now
+        self.mined[:n] += rewards
+        return rewards
+
+    def state(self):
+        n = self.count
+        return {
+            'rate': self.rate,
+            'power': self.power[:n].tolist(),
+            'active': self.active[:n].tolist(),
+            'mined': self.mined[:n].tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state, now):
+        # Монотонные часы не переживают перезапуск, поэтому начисление продолжается с now
+        farms = cls(capacity=max(16, len(state['power'])), rate=state['rate'])
+        for power, active, mined in zip(state['power'], state['active'], state['mined']):
+            farm = farms.add(power)
+            farms.mined[farm] = mined
+            if active:
+                farms.start(farm, now)
+        return farms
@@ -0,0 +1,134 @@
+import argparse
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from market_engine import DEFAULT_PRICES
+from price_models import UniformModel, create_model
+
+MonteCarloResult = namedtuple('MonteCarloResult',
+                              'symbols terminal drawdown portfolio_terminal portfolio_drawdown')
+
+# Сколько чисел (пути × шаги × монеты) держим в памяти за раз: 4M float64 ≈ 32 МБ
+CHUNK_ELEMENTS = 1 << 22
+
+
+def simulate_paths(prices, paths, steps, rng, model, min_price=0.01):
+    # Те же модели и пол min_price, что и в MarketEngine.step.
+    # Возвращает тензор (paths × steps × symbols); состояние модели не сдвигается.
+    factors = model.factors(rng, (paths, steps, len(prices)), advance=False)
+
+    path = np.cumprod(factors, axis=1)
+    path *= prices
+
+    floored = (path < min_price).any(axis=1)
+    if floored.any():
+        # Пол нелинеен, поэтому задетые пары (путь, монета) пересчитываем по шагам
+        rows, cols = np.nonzero(floored)
+        current = np.asarray(prices, dtype=np.float64)[cols].copy()
+        for t in range(steps):
+            current *= factors[rows, t, cols]
+            np.maximum(current, min_price, out=current)
+            path[rows, t, cols] = current
+    return path
+
+
+def max_drawdown(values, axis=1):
+    # Максимальная относительная просадка вдоль оси времени
+    peak = np.maximum.accumulate(values, axis=axis)
+    return (1.0 - values / peak).max(axis=axis)
+
+
+def run_chunk(prices, paths, steps, seed, model, min_price, positions, cash):
+    rng = np.random.default_rng(seed)
+    path = simulate_paths(prices, paths, steps, rng, model, min_price)
+
+    start = np.broadcast_to(np.asarray(prices, dtype=np.float64), (paths, 1, len(prices)))
+    full = np.concatenate([start, path], axis=1)
+    terminal = path[:, -1].copy()
+    drawdown = max_drawdown(full)
+
+    if positions is None:
+        return terminal, drawdown, None, None
+    value = full @ positions + cash
+    return terminal, drawdown, value[:, -1].copy(), max_drawdown(value)
+
+
+def run_monte_carlo(prices=None, paths=10000, steps=1000, seed=None, workers=None,
+                    chunk_paths=None, model=None, min_price=0.01, positions=None, cash=0.0):
+    # prices — словарь symbol -> цена; positions — словарь symbol -> количество для стресс-теста портфеля.
+    # Пути режутся на куски, у каждого куска свой генератор из SeedSequence.spawn, поэтому
+    # результат при заданном seed не зависит от числа процессов.
+    if prices is None:
+        prices = DEFAULT_PRICES
+    if model is None:
+        model = UniformModel()
+    symbols = list(prices)
+    start = np.array([prices[s] for s in symbols], dtype=np.float64)
+    holdings = None
+    if positions is not None:
+        holdings = np.array([positions.get(s, 0.0) for s in symbols], dtype=np.float64)
+
+    if chunk_paths is None:
+        chunk_paths = max(1, CHUNK_ELEMENTS // max(1, (steps + 1) * len(symbols)))
+    sizes = [min(chunk_paths, paths - i) for i in range(0, paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(start, size, steps, s, model, min_price, holdings, cash)
+            for size, s in zip(sizes, seeds)]
+
+    if workers is None:
+        workers = min(len(sizes), os.cpu_count() or 1)
+    if workers <= 1 or len(sizes) == 1:
+        results = [run_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(run_chunk, *zip(*args)))
+
+    terminal = np.concatenate([r[0] for r in results])
+    drawdown = np.concatenate([r[1] for r in results])
+    if holdings is None:
+        return MonteCarloResult(symbols, terminal, drawdown, None, None)
+    return MonteCarloResult(symbols, terminal, drawdown,
+                            np.concatenate([r[2] for r in results]),
+                            np.concatenate([r[3] for r in results]))
+
+
+def summarize(result, percentiles=(5, 50, 95)):
+    summary = {}
+    for i, symbol in enumerate(result.symbols):
+        summary[symbol] = {
+            'terminal': dict(zip(percentiles, np.percentile(result.terminal[:, i], percentiles).tolist())),
+            'drawdown': dict(zip(percentiles, np.percentile(result.drawdown[:, i], percentiles).tolist())),
+        }
+    if result.portfolio_terminal is not None:
+        summary['portfolio'] = {
+            'terminal': dict(zip(percentiles, np.percentile(result.portfolio_terminal, percentiles).tolist())),
+            'drawdown': dict(zip(percentiles, np.percentile(result.portfolio_drawdown, percentiles).tolist())),
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Монте-Карло: много независимых сессий рынка без интерфейса")
+    parser.add_argument('--paths', type=int, default=10000)
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--model', default='uniform',
+                        choices=('uniform', 'gbm', 'merton', 'garch', 'correlated'))
+    args = parser.parse_args()
+
+    model = create_model({'name': args.model}, len(DEFAULT_PRICES))
+    result = run_monte_carlo(paths=args.paths, steps=args.steps, seed=args.seed,
+                             workers=args.workers, model=model)
+    for symbol, stats in summarize(result).items():
+        terminal = stats['terminal']
+        drawdown = stats['drawdown']
+        print(f"{symbol:>6}: цена p5/p50/p95 = {terminal[5]:.2f} / {terminal[50]:.2f} / {terminal[95]:.2f}, "
+              f"просадка p50/p95 = {drawdown[50] * 100:.1f}% / {drawdown[95] * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
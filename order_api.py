@@ -0,0 +1,360 @@
+import argparse
+import asyncio
+import time
+from collections import OrderedDict
+
+from order_book import BUY, SELL, LIMIT, MARKET, IOC, FOK, OrderError
+from ledger import LedgerError
+from web import ServerThread, HttpError, read_request, response
+
+ORDER_TYPES = (LIMIT, MARKET, IOC, FOK)
+
+
+def order_number(value):
+    if isinstance(value, bool):
+        raise HttpError(400, "Некорректный номер заявки")
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HttpError(400, "Некорректный номер заявки")
+
+
+class OrderApi:
+    # Локальный HTTP/JSON вход заявок в отдельном потоке со своим циклом asyncio.
+    # Все сделки со стороны API рассчитываются через обработчик исполнений биржи,
+    # поэтому лимитная заявка, исполненная позже чужой заявкой, тоже попадает в леджер.
+    # Под лежащие в книге заявки леджер резервирует деньги (покупка) или монеты (продажа),
+    # и сделки из интерфейса не могут их потратить.
+
+    def __init__(self, sim, host='127.0.0.1', port=8766, owner='api', idempotency_capacity=100_000):
+        self.sim = sim
+        self.owner = owner
+        self.server = ServerThread(self.handle, host, port, name='order-api')
+
+        self.open_orders = {}
+
+        self.responses = OrderedDict()
+        self.idempotency_capacity = idempotency_capacity
+
+        self.orders_received = 0
+        self.rejected = 0
+        self.replayed = 0
+
+    @property
+    def port(self):
+        return self.server.port
+
+    def start(self):
+        self.server.start()
+        self.sim.exchange.fill_handlers.append(self.on_fills)
+        self.sim.reset_handlers.append(self.cancel_all)
+        return self
+
+    def stop(self):
+        if self.on_fills in self.sim.exchange.fill_handlers:
+            self.sim.exchange.fill_handlers.remove(self.on_fills)
+        if self.cancel_all in self.sim.reset_handlers:
+            self.sim.reset_handlers.remove(self.cancel_all)
+        self.server.stop()
+
+    def remember(self, key, value):
+        self.responses[key] = value
+        if len(self.responses) > self.idempotency_capacity:
+            self.responses.popitem(last=False)
+
+    def on_fills(self, symbol, side, owner, fills):
+        # Вызывается биржей внутри submit, то есть уже под sim.lock. Сначала снимаются
+        # резервы исполненных лежащих заявок, потом всё рассчитывается в леджере; расчёт
+        # покрыт резервом или проверкой при приёме заявки, поэтому ошибка здесь не глотается
+        maker_side = SELL if side == BUY else BUY
+        makers = [(price, qty) for _, maker_id, maker_owner, price, qty in fills if maker_owner == self.owner]
+        for _, maker_id, maker_owner, _, qty in fills:
+            order = self.open_orders.get(maker_id) if maker_owner == self.owner else None
+            if order is not None:
+                self.release(order, qty)
+
+        if owner == self.owner:
+            qty = sum(fill[4] for fill in fills)
+            notional = sum(fill[3] * fill[4] for fill in fills)
+            self.sim.settle(symbol, side, qty, notional)
+        for price, qty in makers:
+            self.sim.settle(symbol, maker_side, qty, qty * price)
+
+    def release(self, order, qty):
+        symbol, side, price, remaining = order['symbol'], order['side'], order['price'], order['remaining']
+        qty = min(qty, remaining)
+        if side == BUY:
+            self.sim.ledger.release(cash=qty * price)
+        else:
+            self.sim.ledger.release(symbol=symbol, amount=qty)
+        order['remaining'] = remaining - qty
+        if order['remaining'] <= 1e-12:
+            self.open_orders.pop(order['id'], None)
+
+    def cancel_all(self):
+        # Сброс игры: лежащие заявки API снимаются вместе с резервами
+        for order_id in list(self.open_orders):
+            self.cancel(order_id)
+
+    def submit(self, spec):
+        # client_order_id — ключ идемпотентности: повтор возвращает прежний ответ
+        key = spec.get('client_order_id') if isinstance(spec, dict) else None
+        if key is not None and key in self.responses:
+            self.replayed += 1
+            return self.responses[key]
+        result = self.place(spec)
+        if key is not None:
+            result['client_order_id'] = key
+            self.remember(key, result)
+        return result
+
+    def place(self, spec):
+        self.orders_received += 1
+        if spec.get('account') is not None:
+            return self.place_for_account(spec)
+        try:
+            symbol = spec['symbol']
+            side = spec['side']
+            qty = float(spec['qty'])
+            order_type = spec.get('type', MARKET)
+            price = spec.get('price')
+            price = None if price is None else float(price)
+
+            if symbol not in self.sim.engine.index:
+                raise OrderError(f"Неизвестная монета: {symbol}")
+            if order_type not in ORDER_TYPES:
+                raise OrderError(f"Неизвестный тип заявки: {order_type}")
+            if order_type != MARKET and price is None:
+                raise OrderError("Для этой заявки нужна цена")
+            if not qty > 0 or (price is not None and not price > 0):
+                raise OrderError("Количество и цена должны быть больше нуля")
+            # Лимитная цена — к шагу цены монеты, количество — вниз к лоту
+            registry = self.sim.registry
+            qty = registry.round_quantity(symbol, qty)
+            if price is not None:
+                price = registry.round_price(symbol, price)
+            if not qty > 0 or (price is not None and not price > 0):
+                raise OrderError("Количество меньше лота или цена меньше шага цены")
+
+            with self.sim.lock:
+                exchange = self.sim.exchange
+                exchange.ensure_liquidity(symbol, self.sim.prices[symbol])
+                if side == BUY:
+                    cost = qty * price if price is not None else exchange.book(symbol).quote_cost(BUY, qty)
+                    if cost is None:
+                        raise OrderError("Недостаточно ликвидности")
+                    if cost > self.sim.ledger.available_cash():
+                        raise LedgerError("Недостаточно средств!")
+                elif side == SELL:
+                    if qty > self.sim.ledger.available(symbol):
+                        raise LedgerError("Недостаточно токенов!")
+
+                order_id, fills, remaining = exchange.submit(symbol, side, qty, price, order_type,
+                                                             owner=self.owner)
+                if remaining > 0 and order_type == LIMIT:
+                    self.open_orders[order_id] = {'id': order_id, 'symbol': symbol, 'side': side,
+                                                  'price': price, 'remaining': remaining}
+                    if side == BUY:
+                        self.sim.ledger.reserve(cash=remaining * price)
+                    else:
+                        self.sim.ledger.reserve(symbol=symbol, amount=remaining)
+        except (KeyError, TypeError, ValueError) as e:
+            self.rejected += 1
+            return {'status': 'rejected', 'error': str(e)}
+
+        filled = qty - remaining
+        notional = sum(fill[3] * fill[4] for fill in fills)
+        if remaining <= 0:
+            status = 'filled'
+        elif order_type == LIMIT:
+            status = 'partially_filled' if filled > 0 else 'resting'
+        else:
+            status = 'partially_filled' if filled > 0 else 'unfilled'
+        return {'id': order_id, 'status': status, 'filled': filled,
+                'remaining': remaining if order_type == LIMIT else 0.0,
+                'avg_price': notional / filled if filled > 0 else None}
+
+    def place_for_account(self, spec):
+        # Заявка участника из реестра счетов: только рыночная, рассчитывается сразу
+        try:
+            symbol = spec['symbol']
+            side = spec['side']
+            qty = float(spec['qty'])
+            if symbol not in self.sim.engine.index:
+                raise OrderError(f"Неизвестная монета: {symbol}")
+            if spec.get('type', MARKET) != MARKET:
+                raise OrderError("Для счетов из реестра доступны только рыночные заявки")
+            if side not in (BUY, SELL) or not qty > 0:
+                raise OrderError("Некорректная заявка")
+            # Сравнивать исполнение нужно с количеством после округления к лоту
+            qty = self.sim.lot(symbol, qty)
+            filled, notional = self.sim.trade(spec['account'], symbol, side, qty)
+        except (KeyError, TypeError, ValueError) as e:
+            self.rejected += 1
+            return {'status': 'rejected', 'error': str(e)}
+        remaining = max(0.0, round(qty - filled, 12))
+        return {'account': spec['account'], 'status': 'filled' if remaining <= 0 else 'partially_filled',
+                'filled': filled, 'remaining': remaining,
+                'avg_price': notional / filled if filled > 0 else None}
+
+    def open_accounts(self, payload):
+        names = payload.get('names') if isinstance(payload, dict) else None
+        if not isinstance(names, list):
+            raise HttpError(400, "Ожидался список names")
+        try:
+            with self.sim.lock:
+                self.sim.accounts.open_many(names, payload.get('balance'))
+        except (TypeError, ValueError) as e:
+            raise HttpError(409, str(e))
+        return {'opened': len(names), 'accounts': self.sim.accounts.count}
+
+    def cancel(self, order_id):
+        with self.sim.lock:
+            order = self.open_orders.get(order_id)
+            if order is None:
+                return {'id': order_id, 'status': 'not_found'}
+            remaining = order['remaining']
+            self.sim.exchange.cancel(order_id)
+            self.release(order, remaining)
+        return {'id': order_id, 'status': 'cancelled', 'remaining': remaining}
+
+    def balance(self):
+        # portfolio_value может пересобрать столбцы позиций реестра: только под sim.lock
+        ledger = self.sim.ledger
+        with self.sim.lock:
+            return {'balance': ledger.balance, 'reserved': ledger.reserved_cash,
+                    'available': ledger.available_cash(),
+                    'equity': ledger.balance + self.sim.portfolio_value()}
+
+    def positions(self):
+        with self.sim.lock:
+            return {'positions': dict(self.sim.ledger.snapshot().positions),
+                    'reserved': self.sim.ledger.reserved()}
+
+    def stats(self):
+        return {'orders': self.orders_received, 'rejected': self.rejected, 'replayed': self.replayed,
+                'open': len(self.open_orders)}
+
+    def route(self, request):
+        # Возвращает (статус, тело). Idempotency-Key в заголовке защищает весь запрос целиком.
+        method, path = request.method, request.path.rstrip('/')
+        key = request.headers.get('idempotency-key')
+
+        if method == 'POST' and path == '/orders':
+            spec = request.json()
+            if not isinstance(spec, dict):
+                raise HttpError(400, "Ожидался объект заявки")
+            if key is not None:
+                spec.setdefault('client_order_id', key)
+            result = self.submit(spec)
+            return (400 if result['status'] == 'rejected' else 200), result
+
+        if method == 'POST' and path == '/orders/batch':
+            if key is not None and 'batch:' + key in self.responses:
+                self.replayed += 1
+                return 200, self.responses['batch:' + key]
+            payload = request.json()
+            orders = payload.get('orders') if isinstance(payload, dict) else None
+            if not isinstance(orders, list):
+                raise HttpError(400, "Ожидался список orders")
+            body = {'results': [self.submit(spec) if isinstance(spec, dict)
+                                else {'status': 'rejected', 'error': "Ожидался объект заявки"}
+                                for spec in orders]}
+            if key is not None:
+                self.remember('batch:' + key, body)
+            return 200, body
+
+        if method == 'POST' and path == '/orders/cancel':
+            payload = request.json()
+            ids = payload.get('ids') if isinstance(payload, dict) else None
+            if not isinstance(ids, list):
+                raise HttpError(400, "Ожидался список ids")
+            ids = [order_number(order_id) for order_id in ids]
+            return 200, {'results': [self.cancel(order_id) for order_id in ids]}
+
+        if method == 'DELETE' and path.startswith('/orders/'):
+            result = self.cancel(order_number(path.rsplit('/', 1)[1]))
+            return (404 if result['status'] == 'not_found' else 200), result
+
+        if method == 'POST' and path == '/accounts':
+            return 200, self.open_accounts(request.json())
+
+        if method == 'GET':
+            if path.startswith('/accounts/'):
+                try:
+                    return 200, self.sim.accounts.account(path.split('/', 2)[2])
+                except LedgerError as e:
+                    raise HttpError(404, str(e))
+            if path == '/leaderboard':
+                try:
+                    top = int(request.query.get('top', 10))
+                except ValueError:
+                    raise HttpError(400, "Некорректный параметр top")
+                return 200, {'leaders': [{'name': name, 'equity': equity, 'return_pct': pct}
+                                         for name, equity, pct in self.sim.accounts.leaderboard(top=top)]}
+            if path == '/orders':
+                return 200, {'orders': list(self.open_orders.values())}
+            if path == '/balance':
+                return 200, self.balance()
+            if path == '/positions':
+                return 200, self.positions()
+            if path == '/stats':
+                return 200, self.stats()
+        raise HttpError(404, "Нет такого адреса")
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request = None
+                try:
+                    request = await read_request(reader)
+                    if request is None:
+                        break
+                    status, body = self.route(request)
+                except HttpError as e:
+                    status, body = e.status, {'error': str(e)}
+                except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+                    raise
+                except Exception as e:
+                    # Ошибка в обработчике не должна обрывать соединение без ответа
+                    print(f"Ошибка API заявок: {e}")
+                    status, body, request = 500, {'error': "Внутренняя ошибка сервера"}, None
+                keep_alive = request is not None and request.keep_alive
+                writer.write(response(status, body, keep_alive=keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+def main():
+    # Симулятор без интерфейса с входом заявок по HTTP
+    from market_engine import MarketEngine
+    from simulator import Simulator
+
+    parser = argparse.ArgumentParser(description="HTTP API заявок без интерфейса")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--balance', type=float, default=1_000_000.0)
+    parser.add_argument('--rate', type=float, default=1.0, help="тиков в секунду")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    sim = Simulator(MarketEngine(seed=args.seed), balance=args.balance, tick_interval=1.0 / args.rate)
+    api = OrderApi(sim, args.host, args.port).start()
+    print(f"API заявок: http://{args.host}:{api.port}/orders")
+    try:
+        while True:
+            sim.tick()
+            time.sleep(sim.tick_interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+import heapq
+from collections import deque
+from itertools import count
+
+BUY = 'buy'
+SELL = 'sell'
+
+LIMIT = 'limit'
+MARKET = 'market'
+IOC = 'ioc'
+FOK = 'fok'
+
+MARKET_MAKER = 'market_maker'
+
+
+class OrderError(ValueError):
+    pass
+
+
+class Order:
+    __slots__ = ('id', 'symbol', 'side', 'price', 'qty', 'owner')
+
+    def __init__(self, order_id, symbol, side, price, qty, owner):
+        self.id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.qty = qty
+        self.owner = owner
+
+
+class PriceLevel:
+    __slots__ = ('orders', 'qty')
+
+    def __init__(self):
+        self.orders = deque()
+        self.qty = 0.0
+
+
+class OrderBook:
+    # Ценовые уровни в словаре + куча цен с ленивым удалением, внутри уровня FIFO.
+    # Отменённые заявки помечаются qty = 0 и выбрасываются при проходе по очереди.
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bids = {}
+        self.asks = {}
+        self._bid_heap = []
+        self._ask_heap = []
+
+    def best_bid(self):
+        heap = self._bid_heap
+        while heap and -heap[0] not in self.bids:
+            heapq.heappop(heap)
+        return -heap[0] if heap else None
+
+    def best_ask(self):
+        heap = self._ask_heap
+        while heap and heap[0] not in self.asks:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _drop_level(self, side, price):
+        # Ключ пустого уровня остаётся в куче до ленивого удаления; если мёртвых ключей
+        # стало слишком много, куча пересобирается из живых уровней
+        if side == BUY:
+            levels, heap, sign = self.bids, self._bid_heap, -1
+        else:
+            levels, heap, sign = self.asks, self._ask_heap, 1
+        del levels[price]
+        if len(heap) > 2 * len(levels) + 16:
+            heap[:] = [sign * p for p in levels]
+            heapq.heapify(heap)
+
+    def add(self, order):
+        if order.side == BUY:
+            levels, heap, key = self.bids, self._bid_heap, -order.price
+        else:
+            levels, heap, key = self.asks, self._ask_heap, order.price
+
+        level = levels.get(order.price)
+        if level is None:
+            level = levels[order.price] = PriceLevel()
+            heapq.heappush(heap, key)
+        level.orders.append(order)
+        level.qty += order.qty
+
+    def remove(self, order):
+        levels = self.bids if order.side == BUY else self.asks
+        level = levels.get(order.price)
+        if level is None:
+            return
+        level.qty -= order.qty
+        order.qty = 0.0
+        if level.qty <= 1e-12:
+            self._drop_level(order.side, order.price)
+
+    def available(self, side, qty, limit=None):
+        # Сколько можно исполнить против книги, не трогая её (для FOK)
+        levels = self.asks if side == BUY else self.bids
+        prices = sorted(levels, reverse=(side == SELL))
+        total = 0.0
+        for price in prices:
+            if limit is not None and (price > limit if side == BUY else price < limit):
+                break
+            total += levels[price].qty
+            if total >= qty:
+                break
+        return total
+
+    def quote_cost(self, side, qty):
+        # Стоимость исполнения рыночной заявки без изменения книги
+        levels = self.asks if side == BUY else self.bids
+        remaining = qty
+        cost = 0.0
+        for price in sorted(levels, reverse=(side == SELL)):
+            take = min(remaining, levels[price].qty)
+            cost += take * price
+            remaining -= take
+            if remaining <= 1e-12:
+                return cost
+        return None
+
+    def match(self, side, qty, limit, taker_id, fills):
+        if side == BUY:
+            levels, best = self.asks, self.best_ask
+        else:
+            levels, best = self.bids, self.best_bid
+
+        while qty > 1e-12:
+            price = best()
+            if price is None:
+                break
+            if limit is not None and (price > limit if side == BUY else price < limit):
+                break
+
+            level = levels[price]
+            orders = level.orders
+            while qty > 1e-12 and orders:
+                maker = orders[0]
+                if maker.qty <= 0.0:
+                    orders.popleft()
+                    continue
+                take = maker.qty if maker.qty < qty else qty
+                maker.qty -= take
+                level.qty -= take
+                qty -= take
+                fills.append((taker_id, maker.id, maker.owner, price, take))
+                if maker.qty <= 1e-12:
+                    maker.qty = 0.0
+                    orders.popleft()
+
+            if not orders or level.qty <= 1e-12:
+                self._drop_level(SELL if side == BUY else BUY, price)
+        return qty
+
+
+class MatchingEngine:
+    def __init__(self, spread=0.001, depth_levels=5, level_step=0.0005, level_notional=1_000_000.0):
+        self.books = {}
+        self.orders = {}
+        self.fill_handlers = []
+
+        self.spread = spread
+        self.depth_levels = depth_levels
+        self.level_step = level_step
+        self.level_notional = level_notional
+        self._quoted_at = {}
+        self._quote_ids = {}
+        # Число лежащих заявок участников (не маркет-мейкера) по монетам
+        self._resting = {}
+
+        self._ids = count(1)
+        self.orders_submitted = 0
+        self.fills_count = 0
+
+    def book(self, symbol):
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def requote(self, prices):
+        # Вызывается на тике: монеты с лежащими заявками участников перекотируются сразу,
+        # чтобы заявка исполнялась, когда до неё дошла цена, а не при следующей заявке
+        for symbol in [s for s, n in self._resting.items() if n > 0]:
+            self.ensure_liquidity(symbol, prices[symbol])
+
+    def _track(self, order, delta):
+        if order.owner != MARKET_MAKER:
+            n = self._resting.get(order.symbol, 0) + delta
+            if n > 0:
+                self._resting[order.symbol] = n
+            else:
+                self._resting.pop(order.symbol, None)
+
+    def ensure_liquidity(self, symbol, reference_price):
+        # Маркет-мейкер перекотировывается лениво, только когда заявка приходит по новой цене
+        if self._quoted_at.get(symbol) == reference_price:
+            return
+        book = self.book(symbol)
+        for order_id in self._quote_ids.pop(symbol, ()):
+            order = self.orders.pop(order_id, None)
+            if order is not None and order.qty > 0:
+                book.remove(order)
+
+        ids = []
+        half = self.spread / 2
+        for level in range(self.depth_levels):
+            offset = half + level * self.level_step
+            for side, price in ((BUY, reference_price * (1 - offset)),
+                                (SELL, reference_price * (1 + offset))):
+                order = Order(next(self._ids), symbol, side, price,
+                              self.level_notional / reference_price, MARKET_MAKER)
+                # Новая котировка может пересечь лежащие заявки пользователей: сначала
+                # она исполняется против них, в книгу кладётся только остаток
+                self._execute(book, order, price)
+                if order.qty > 1e-12:
+                    self.orders[order.id] = order
+                    book.add(order)
+                    ids.append(order.id)
+        self._quote_ids[symbol] = ids
+        self._quoted_at[symbol] = reference_price
+
+    def submit(self, symbol, side, qty, price=None, order_type=LIMIT, owner=None):
+        if side not in (BUY, SELL):
+            raise OrderError(f"Неизвестная сторона заявки: {side}")
+        if qty <= 0:
+            raise OrderError("Количество должно быть больше нуля")
+        if order_type == LIMIT and price is None:
+            raise OrderError("Для лимитной заявки нужна цена")
+
+        book = self.book(symbol)
+        order_id = next(self._ids)
+        self.orders_submitted += 1
+        limit = None if order_type == MARKET else price
+
+        if order_type == FOK and book.available(side, qty, limit) < qty - 1e-12:
+            return order_id, [], qty
+
+        order = Order(order_id, symbol, side, price, qty, owner)
+        fills = self._execute(book, order, limit)
+        remaining = order.qty
+
+        if remaining > 1e-12 and order_type == LIMIT:
+            self.orders[order_id] = order
+            book.add(order)
+            self._track(order, 1)
+        elif remaining <= 1e-12:
+            remaining = 0.0
+        return order_id, fills, remaining
+
+    def _execute(self, book, order, limit):
+        # Исполняет входящую заявку против книги и уведомляет обработчики исполнений
+        fills = []
+        order.qty = book.match(order.side, order.qty, limit, order.id, fills)
+        if fills:
+            self.fills_count += len(fills)
+            for fill in fills:
+                maker = self.orders.get(fill[1])
+                if maker is not None and maker.qty <= 0.0:
+                    del self.orders[fill[1]]
+                    self._track(maker, -1)
+            for handler in self.fill_handlers:
+                handler(book.symbol, order.side, order.owner, fills)
+        return fills
+
+    def cancel(self, order_id):
+        order = self.orders.pop(order_id, None)
+        if order is None or order.qty <= 0:
+            return False
+        self.books[order.symbol].remove(order)
+        self._track(order, -1)
+        return True
@@ -0,0 +1,163 @@
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+class PriceHistory:
+    # Кольцевой буфер удвоенной длины: каждая точка пишется в слот i и i + capacity,
+    # поэтому последние N точек всегда лежат непрерывно и отдаются как view без копий.
+
+    def __init__(self, symbols, capacity=10000):
+        if capacity <= 0:
+            raise ValueError("capacity должен быть больше нуля")
+
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.capacity = capacity
+
+        self._prices = np.zeros((len(self.symbols), 2 * capacity), dtype=np.float64)
+        self._times = np.zeros(2 * capacity, dtype=np.int64)
+        self._pos = 0
+        self._count = 0
+        self._base = None
+
+    def __len__(self):
+        return self._count
+
+    def append(self, prices, timestamp_ns=None):
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+
+        pos = self._pos
+        mirror = pos + self.capacity
+        self._prices[:, pos] = prices
+        self._prices[:, mirror] = prices
+        self._times[pos] = timestamp_ns
+        self._times[mirror] = timestamp_ns
+        if self._base is not None:
+            self._overwritten(pos + 1)
+
+        self._pos = (pos + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, path, timestamps_ns):
+        # path: матрица (ticks × symbols), как её возвращает MarketEngine.simulate
+        path = np.asarray(path, dtype=np.float64)
+        timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+        if len(path) != len(timestamps_ns):
+            raise ValueError("Количество тиков и временных меток не совпадает")
+
+        cap = self.capacity
+        if len(path) > cap:
+            path = path[-cap:]
+            timestamps_ns = timestamps_ns[-cap:]
+
+        ticks = len(path)
+        pos = self._pos
+        first = min(ticks, cap - pos)
+        rest = ticks - first
+
+        for offset in (0, cap):
+            self._prices[:, pos + offset:pos + offset + first] = path[:first].T
+            self._times[pos + offset:pos + offset + first] = timestamps_ns[:first]
+            if rest:
+                self._prices[:, offset:offset + rest] = path[first:].T
+                self._times[offset:offset + rest] = timestamps_ns[first:]
+        if self._base is not None:
+            self._overwritten(cap if rest else pos + first)
+
+        self._pos = (pos + ticks) % cap
+        self._count = min(self._count + ticks, cap)
+
+    def clear(self):
+        self._pos = 0
+        self._count = 0
+        self._base = None
+
+    # После load старые точки остаются в memmap _base и переносятся в кольцо только при
+    # чтении. Они занимают слоты [_lo, _hi) первой половины; окна чтения всегда
+    # кончаются последней точкой, поэтому подгружается хвост, и _hi идёт вниз,
+    # а новые точки затирают слоты с начала, и _lo идёт вверх.
+
+    def _overwritten(self, end):
+        self._lo = max(self._lo, end)
+        if self._lo >= self._hi:
+            self._base = None
+
+    def _materialize(self, start):
+        base = self._base
+        if base is None or start >= self._hi:
+            return
+        lo = max(start, self._lo)
+        self._prices[:, lo:self._hi] = base[:, lo - self._offset:self._hi - self._offset]
+        self._hi = lo
+        if self._hi <= self._lo:
+            self._base = None
+
+    def _window(self, last):
+        count = self._count if last is None else min(last, self._count)
+        end = self._pos + self.capacity
+        return end - count, end
+
+    def times(self, last=None):
+        start, end = self._window(last)
+        return self._times[start:end]
+
+    def datetimes(self, last=None):
+        return self.times(last).view('datetime64[ns]')
+
+    def prices(self, symbol=None, last=None):
+        start, end = self._window(last)
+        self._materialize(start)
+        if symbol is None:
+            return self._prices[:, start:end]
+        return self._prices[self.index[symbol], start:end]
+
+    def latest(self):
+        if not self._count:
+            return None
+        self._materialize(self._pos + self.capacity - 1)
+        return self._prices[:, self._pos + self.capacity - 1]
+
+    def save(self, directory):
+        # Пишется только живое окно от старых точек к новым, без зеркальной половины.
+        # Запись идёт прямо из буферов через memmap файла, без копии истории в памяти
+        directory = Path(directory)
+        start, end = self._window(None)
+        base = self._base
+        lo, hi = (self._lo, self._hi) if base is not None else (end, end)
+        lo = min(max(start, lo), end)
+        hi = max(lo, min(hi, end))
+
+        out = np.lib.format.open_memmap(directory / 'history_prices.npy', mode='w+',
+                                        dtype=np.float64, shape=(len(self.symbols), end - start))
+        out[:, :lo - start] = self._prices[:, start:lo]
+        if hi > lo:
+            out[:, lo - start:hi - start] = base[:, lo - self._offset:hi - self._offset]
+        out[:, hi - start:] = self._prices[:, hi:end]
+        out.flush()
+        del out
+        np.save(directory / 'history_times.npy', self._times[start:end])
+        return {'symbols': self.symbols, 'capacity': self.capacity, 'count': self._count}
+
+    @classmethod
+    def load(cls, directory, meta, mmap_mode='c'):
+        # Цены отображаются с диска лениво и читаются по мере надобности, ничего не парсится.
+        # Окно ложится в конец первой половины кольца с pos = 0: зеркальная половина
+        # читается только после того, как её заполнят новые точки
+        directory = Path(directory)
+        history = cls(meta['symbols'], meta['capacity'])
+        count = meta['count']
+        if not count:
+            return history
+        cap = history.capacity
+        history._offset = cap - count
+        history._times[cap - count:cap] = np.load(directory / 'history_times.npy')
+        history._base = np.load(directory / 'history_prices.npy', mmap_mode=mmap_mode)
+        history._lo, history._hi = cap - count, cap
+        history._count = count
+        if mmap_mode is None:
+            history._materialize(0)
+        return history
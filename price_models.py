@@ -0,0 +1,202 @@
+import numpy as np
+
+# Модель цены выдаёт мультипликативные множители для всего вектора монет сразу:
+# step() заполняет вектор (symbols,) на месте, factors() — массив формы (..., steps, symbols)
+# для simulate и Монте-Карло. Параметры — скаляры или векторы по монетам.
+
+
+class UniformModel:
+    # Исходная модель симулятора: независимый равномерный множитель ±max_change
+    name = 'uniform'
+
+    def __init__(self, max_change=0.05):
+        self.max_change = max_change
+
+    def step(self, rng, out):
+        rng.random(out=out)
+        out *= 2 * self.max_change
+        out += 1 - self.max_change
+        return out
+
+    def factors(self, rng, shape, advance=True):
+        factors = rng.random(shape)
+        factors *= 2 * self.max_change
+        factors += 1 - self.max_change
+        return factors
+
+    def state(self):
+        return {'name': self.name, 'max_change': self.max_change}
+
+
+class GBMModel:
+    # Геометрическое броуновское движение: log-доходность ~ N((mu - sigma²/2)·dt, sigma²·dt)
+    name = 'gbm'
+
+    def __init__(self, mu=0.0, sigma=0.02, dt=1.0):
+        self.mu = np.asarray(mu, dtype=np.float64)
+        self.sigma = np.asarray(sigma, dtype=np.float64)
+        self.dt = dt
+        self._drift = (self.mu - 0.5 * self.sigma ** 2) * dt
+        self._scale = self.sigma * np.sqrt(dt)
+
+    def log_returns(self, rng, shape):
+        z = rng.standard_normal(shape)
+        z *= self._scale
+        z += self._drift
+        return z
+
+    def step(self, rng, out):
+        rng.standard_normal(out=out)
+        out *= self._scale
+        out += self._drift
+        return np.exp(out, out=out)
+
+    def factors(self, rng, shape, advance=True):
+        return np.exp(self.log_returns(rng, shape))
+
+    def state(self):
+        return {'name': self.name, 'mu': self.mu.tolist(), 'sigma': self.sigma.tolist(), 'dt': self.dt}
+
+
+class MertonModel(GBMModel):
+    # Скачкообразная диффузия Мертона: GBM плюс пуассоновские скачки с log-нормальным размером.
+    # Снос компенсирован на lambda·k, чтобы скачки не меняли среднюю доходность.
+    name = 'merton'
+
+    def __init__(self, mu=0.0, sigma=0.02, jump_rate=0.01, jump_mean=-0.05, jump_std=0.1, dt=1.0):
+        super().__init__(mu, sigma, dt)
+        self.jump_rate = np.asarray(jump_rate, dtype=np.float64)
+        self.jump_mean = np.asarray(jump_mean, dtype=np.float64)
+        self.jump_std = np.asarray(jump_std, dtype=np.float64)
+        k = np.exp(self.jump_mean + 0.5 * self.jump_std ** 2) - 1
+        self._drift = self._drift - self.jump_rate * k * dt
+
+    def log_returns(self, rng, shape):
+        r = super().log_returns(rng, shape)
+        jumps = rng.poisson(self.jump_rate * self.dt, shape)
+        hit = jumps > 0
+        if hit.any():
+            # Сумма n log-нормальных скачков: n·m + sqrt(n)·s·Z, считаем только там, где скачки были
+            n = jumps[hit]
+            mean = np.broadcast_to(self.jump_mean, shape)[hit]
+            std = np.broadcast_to(self.jump_std, shape)[hit]
+            r[hit] += n * mean + np.sqrt(n) * std * rng.standard_normal(n.shape)
+        return r
+
+    def step(self, rng, out):
+        out[:] = self.log_returns(rng, out.shape)
+        return np.exp(out, out=out)
+
+    def state(self):
+        state = super().state()
+        state.update(jump_rate=self.jump_rate.tolist(), jump_mean=self.jump_mean.tolist(),
+                     jump_std=self.jump_std.tolist())
+        return state
+
+
+class GarchModel:
+    # GARCH(1,1): sigma²[t+1] = omega + alpha·eps[t]² + beta·sigma²[t], по вектору монет.
+    # Условная дисперсия — состояние модели; advance=False считает пути, не сдвигая его.
+    name = 'garch'
+
+    def __init__(self, n_symbols, omega=2e-6, alpha=0.1, beta=0.88, mu=0.0, variance=None):
+        self.omega = np.asarray(omega, dtype=np.float64)
+        self.alpha = np.asarray(alpha, dtype=np.float64)
+        self.beta = np.asarray(beta, dtype=np.float64)
+        self.mu = np.asarray(mu, dtype=np.float64)
+        if variance is None:
+            variance = self.omega / np.maximum(1 - self.alpha - self.beta, 1e-6)
+        self.variance = np.broadcast_to(np.asarray(variance, dtype=np.float64), (n_symbols,)).copy()
+        self._eps = np.empty(n_symbols)
+
+    def step(self, rng, out):
+        eps = self._eps
+        rng.standard_normal(out=eps)
+        eps *= np.sqrt(self.variance)
+        np.add(eps, self.mu, out=out)
+        np.exp(out, out=out)
+
+        self.variance *= self.beta
+        eps *= eps
+        eps *= self.alpha
+        self.variance += eps
+        self.variance += self.omega
+        return out
+
+    def factors(self, rng, shape, advance=True):
+        # Рекурсия по времени неизбежна, но каждый шаг векторизован по путям и монетам
+        steps = shape[-2]
+        z = rng.standard_normal(shape)
+        variance = np.broadcast_to(self.variance, shape[:-2] + shape[-1:]).copy()
+        for t in range(steps):
+            eps = z[..., t, :]
+            eps *= np.sqrt(variance)
+            variance *= self.beta
+            variance += self.alpha * eps * eps + self.omega
+        if advance:
+            self.variance[:] = variance
+        z += self.mu
+        return np.exp(z, out=z)
+
+    def state(self):
+        return {'name': self.name, 'omega': self.omega.tolist(), 'alpha': self.alpha.tolist(),
+                'beta': self.beta.tolist(), 'mu': self.mu.tolist(), 'variance': self.variance.tolist()}
+
+
+class CorrelatedModel(GBMModel):
+    # Коррелированный GBM: независимые нормали умножаются на фактор Холецкого матрицы
+    # корреляций. Фактор считается один раз и пересчитывается только при set_correlation.
+    name = 'correlated'
+
+    def __init__(self, correlation, mu=0.0, sigma=0.02, dt=1.0):
+        super().__init__(mu, sigma, dt)
+        self.set_correlation(correlation)
+
+    def set_correlation(self, correlation):
+        self.correlation = np.asarray(correlation, dtype=np.float64)
+        self._cholesky_t = np.linalg.cholesky(self.correlation).T.copy()
+        self._z = np.empty(len(self.correlation))
+
+    def log_returns(self, rng, shape):
+        z = rng.standard_normal(shape) @ self._cholesky_t
+        z *= self._scale
+        z += self._drift
+        return z
+
+    def step(self, rng, out):
+        rng.standard_normal(out=self._z)
+        np.matmul(self._z, self._cholesky_t, out=out)
+        out *= self._scale
+        out += self._drift
+        return np.exp(out, out=out)
+
+    def state(self):
+        state = super().state()
+        state['correlation'] = self.correlation.tolist()
+        return state
+
+
+def constant_correlation(n_symbols, rho):
+    correlation = np.full((n_symbols, n_symbols), float(rho))
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+def create_model(spec, n_symbols):
+    # spec — словарь из config.json или из state(): {"name": "gbm", "sigma": 0.02, ...}
+    spec = dict(spec or {})
+    name = spec.pop('name', 'uniform')
+    if name == 'uniform':
+        return UniformModel(**spec)
+    if name == 'gbm':
+        return GBMModel(**spec)
+    if name == 'merton':
+        return MertonModel(**spec)
+    if name == 'garch':
+        return GarchModel(n_symbols, **spec)
+    if name == 'correlated':
+        correlation = spec.pop('correlation', 0.0)
+        if np.ndim(correlation) == 0:
+            correlation = constant_correlation(n_symbols, correlation)
+        return CorrelatedModel(correlation, **spec)
+    raise ValueError(f"Неизвестная модель цены: {name}")
@@ -0,0 +1,100 @@
+import time
+
+from instrumentation import instruments
+
+
+class Panel:
+    __slots__ = ('name', 'callback', 'priority', 'dirty', 'renders', 'deferred')
+
+    def __init__(self, name, callback, priority):
+        self.name = name
+        self.callback = callback
+        self.priority = priority
+        self.dirty = False
+        self.renders = 0
+        self.deferred = 0
+
+
+class RenderLoop:
+    # Один цикл отрисовки интерфейса. Тики только помечают панели грязными,
+    # кадр рисует каждую грязную панель один раз, сколько бы тиков ни пришло.
+    # Панели с priority 0 рисуются всегда, остальные — пока не исчерпан бюджет кадра,
+    # иначе переносятся на следующий кадр.
+
+    def __init__(self, fps=30, budget_ms=12.0, clock=time.perf_counter):
+        self.interval = 1.0 / fps
+        self.budget = budget_ms / 1000.0
+        self.clock = clock
+        self.panels = []
+        self._by_name = {}
+        self._pending = 0
+        self._last_frame = None
+
+        self.frames = 0
+        self.idle_frames = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.over_budget = 0
+        self.last_frame_ms = 0.0
+
+    def add(self, name, callback, priority=1):
+        panel = self._by_name[name] = Panel(name, callback, priority)
+        self.panels.append(panel)
+        self.panels.sort(key=lambda p: p.priority)
+        return panel
+
+    def invalidate(self, *names, tick=False):
+        # Без имён помечаются все панели. Слитыми считаются только тики, пришедшие
+        # до кадра повторно; перерисовки после сделок и сброса в этот счётчик не входят
+        if tick:
+            self._pending += 1
+            if self._pending > 1:
+                self.coalesced += 1
+        for panel in (self.panels if not names else [self._by_name[n] for n in names]):
+            panel.dirty = True
+
+    def frame(self):
+        start = self.clock()
+        if self._last_frame is not None:
+            # Кадры, которые не успели начаться вовремя, считаются пропущенными
+            late = int((start - self._last_frame) / self.interval) - 1
+            if late > 0:
+                self.dropped += late
+        self._last_frame = start
+
+        if not self._pending and not any(p.dirty for p in self.panels):
+            self.idle_frames += 1
+            return False
+        self._pending = 0
+
+        deferred = False
+        for panel in self.panels:
+            if not panel.dirty:
+                continue
+            if panel.priority > 0 and self.clock() - start > self.budget:
+                panel.deferred += 1
+                deferred = True
+                continue
+            panel.dirty = False
+            began = time.perf_counter_ns()
+            panel.callback()
+            instruments.record('render_' + panel.name, time.perf_counter_ns() - began)
+            panel.renders += 1
+
+        self.frames += 1
+        self.last_frame_ms = (self.clock() - start) * 1000
+        instruments.record('frame', int(self.last_frame_ms * 1e6))
+        if deferred or self.last_frame_ms > self.budget * 1000:
+            self.over_budget += 1
+        return True
+
+    def stats(self):
+        return {
+            'frames': self.frames,
+            'idle_frames': self.idle_frames,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'over_budget': self.over_budget,
+            'last_frame_ms': self.last_frame_ms,
+            'deferred': {p.name: p.deferred for p in self.panels},
+        }
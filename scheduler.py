@@ -0,0 +1,99 @@
+import heapq
+import time
+from itertools import count
+
+
+class Job:
+    __slots__ = ('name', 'interval', 'callback', 'due', 'active', 'runs')
+
+    def __init__(self, name, interval, callback, due):
+        self.name = name
+        self.interval = interval
+        self.callback = callback
+        self.due = due
+        self.active = True
+        self.runs = 0
+
+
+class Scheduler:
+    # Один планировщик для всех периодических задач: куча по времени срабатывания,
+    # один таймер на весь процесс вместо отдельного потока или after-цепочки на задачу.
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.jobs = {}
+        self._heap = []
+        self._seq = count()
+        self._root = None
+        self._after_id = None
+
+    def every(self, interval, callback, name=None, delay=None):
+        name = name or getattr(callback, '__name__', f"job{len(self.jobs)}")
+        self.cancel(name)
+        due = self.clock() + (interval if delay is None else delay)
+        job = self.jobs[name] = Job(name, interval, callback, due)
+        heapq.heappush(self._heap, (due, next(self._seq), job))
+        self._wake()
+        return job
+
+    def cancel(self, name):
+        job = self.jobs.pop(name, None)
+        if job is not None:
+            job.active = False
+
+    def run_pending(self, now=None):
+        # Возвращает время в секундах до следующей задачи (None, если задач нет)
+        if now is None:
+            now = self.clock()
+
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, job = heapq.heappop(heap)
+            if not job.active:
+                continue
+            job.runs += 1
+            try:
+                job.callback()
+            except Exception as e:
+                # Упавшая задача остаётся в расписании, иначе она больше не запустится
+                print(f"Ошибка задачи {job.name}: {e}")
+            if job.active:
+                # Пропущенные интервалы не догоняются пачкой вызовов
+                job.due += job.interval
+                if job.due <= now:
+                    job.due = now + job.interval
+                heapq.heappush(heap, (job.due, next(self._seq), job))
+
+        while heap and not heap[0][2].active:
+            heapq.heappop(heap)
+        return max(0.0, heap[0][0] - now) if heap else None
+
+    def attach(self, root):
+        self._root = root
+        self._wake()
+
+    def detach(self):
+        if self._root is not None and self._after_id is not None:
+            self._root.after_cancel(self._after_id)
+        self._root = None
+        self._after_id = None
+
+    def _wake(self):
+        if self._root is None:
+            return
+        if self._after_id is not None:
+            self._root.after_cancel(self._after_id)
+        self._after_id = self._root.after(0, self._on_timer)
+
+    def _on_timer(self):
+        self._after_id = None
+        try:
+            self.run_pending()
+        finally:
+            # Таймер взводится заново при любом исходе, иначе встанут все задачи
+            heap = self._heap
+            while heap and not heap[0][2].active:
+                heapq.heappop(heap)
+            if heap and self._root is not None and self._after_id is None:
+                delay = max(0.0, heap[0][0] - self.clock())
+                self._after_id = self._root.after(max(1, int(delay * 1000)), self._on_timer)
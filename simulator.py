@@ -0,0 +1,257 @@
+import threading
+
+import numpy as np
+
+from clock import WallClock, VirtualClock
+from market_engine import MarketEngine
+from price_history import PriceHistory
+from candles import CandleAggregator
+from order_book import MatchingEngine, BUY, SELL, MARKET
+from ledger import Ledger, LedgerError
+from cost_basis import FIFO
+from metrics import StreamingMetrics
+from accounts import AccountRegistry
+from instrumentation import instruments
+
+# Без on_tick решения между тиками не принимаются, и прогон идёт пакетами такого размера
+BATCH_TICKS = 4096
+
+
+class Simulator:
+    # Торговое ядро без интерфейса: рынок, биржа, леджер и метрики с одними часами.
+    # Интерфейс, ускоренный прогон и повтор записанных тиков идут через одни и те же buy/sell.
+
+    def __init__(self, engine=None, clock=None, journal=None, balance=10000.0, cost_method=FIFO,
+                 tick_interval=3.0, history_capacity=10000, candle_capacity=1440):
+        self.engine = engine if engine is not None else MarketEngine()
+        self.clock = clock if clock is not None else WallClock()
+        # Реестр монет движка: столбцы цен, позиций и себестоимости; prices — вид на него по тикерам
+        self.registry = self.engine.registry
+        self.prices = self.registry.price_map()
+        self.tick_interval = tick_interval
+        self.start_balance = balance
+        # Тики из потока Tk и заявки из серверных потоков идут под одной блокировкой
+        self.lock = threading.RLock()
+
+        self.ledger = Ledger(balance, journal=journal, cost_method=cost_method)
+        self.metrics = self.new_metrics()
+        self.exchange = MatchingEngine()
+        self.exchange.fill_handlers.append(self.record_volume)
+        # Вызываются при сбросе до обнуления леджера: снимают свои заявки и резервы
+        self.reset_handlers = []
+        self.history = PriceHistory(self.engine.symbols, capacity=history_capacity)
+        self.candles = CandleAggregator(self.engine.symbols, capacity=candle_capacity)
+        # Остальные участники (класс, турнир) — столбцами в одном реестре
+        self.accounts = AccountRegistry(self.engine.symbols, balance=balance)
+
+        self._positions_version = None
+        self._positions = self.registry.position
+
+    def new_metrics(self):
+        return StreamingMetrics(self.start_balance,
+                                periods_per_year=365 * 24 * 3600 / self.tick_interval)
+
+    def tick(self, prices=None):
+        # prices = None — шаг модели, иначе цены из записи (вектор в порядке engine.symbols)
+        with self.lock, instruments.timer('tick'):
+            instruments.count('ticks')
+            if prices is None:
+                self.engine.step()
+            else:
+                self.engine.set_prices(prices)
+
+            now = self.clock.time_ns()
+            self.history.append(self.engine.prices, now)
+            self.candles.update(self.engine.prices, now)
+            # Лежащие заявки участников исполняются по новой цене на этом же тике
+            self.exchange.requote(self.prices)
+            self.update_equity()
+            if self.accounts.count:
+                self.accounts.mark_to_market(self.engine.prices)
+
+    def advance(self, path, times):
+        # Пакет уже применённых к движку тиков: история и свечи пишутся векторно,
+        # капитал по тикам — одно матричное умножение на неизменный вектор позиций
+        instruments.count('ticks', len(path))
+        self.history.extend(path, times)
+        self.candles.extend(path, times)
+        self.exchange.requote(self.prices)
+
+        balance = self.ledger.snapshot().balance
+        self.portfolio_value()
+        cost = self.ledger.basis.total_cost
+        for value in (path @ self._positions).tolist():
+            self.metrics.record_equity(balance + value, value - cost)
+        if self.accounts.count:
+            self.accounts.mark_to_market(self.engine.prices)
+
+    def instrument(self, target=instruments):
+        # Счётчики биржи и леджера читаются в момент выгрузки метрик, на горячем пути их нет
+        target.register('orders', lambda: self.exchange.orders_submitted, 'counter')
+        target.register('fills', lambda: self.exchange.fills_count, 'counter')
+        target.register('trades', lambda: self.ledger.snapshot().trade_count, 'counter')
+        target.register('engine_ticks', lambda: self.engine.tick_count, 'counter')
+        target.register('accounts', lambda: self.accounts.count)
+        target.register('equity', lambda: self.metrics.equity)
+
+    def record_volume(self, symbol, side, owner, fills):
+        # Объём свечей — по всем исполнениям биржи: интерфейс, API и счета реестра
+        self.candles.add_volume(symbol, sum(qty for _, _, _, _, qty in fills), self.clock.time_ns())
+
+    def portfolio_value(self):
+        # Столбец позиций реестра пересобирается только при изменениях леджера в обход settle
+        # (майнинг, сброс, загрузка), дальше это одно скалярное произведение. Пересборка
+        # обнуляет столбец, поэтому чтение из интерфейса и серверов идёт под sim.lock
+        with self.lock:
+            if self.ledger.version != self._positions_version:
+                snapshot = self.ledger.snapshot()
+                self.registry.sync_positions(snapshot.positions, self.ledger.basis)
+                self._positions_version = snapshot.version
+            return float(self._positions @ self.engine.prices)
+
+    def update_equity(self):
+        snapshot = self.ledger.snapshot()
+        value = self.portfolio_value()
+        self.metrics.record_equity(snapshot.balance + value, value - self.ledger.basis.total_cost)
+
+    def execute_order(self, symbol, side, amount, owner='gui'):
+        self.exchange.ensure_liquidity(symbol, self.prices[symbol])
+        order_id, fills, remaining = self.exchange.submit(symbol, side, amount,
+                                                          order_type=MARKET, owner=owner)
+        notional = sum(price * qty for _, _, _, price, qty in fills)
+        return amount - remaining, notional
+
+    def settle(self, symbol, side, amount, notional):
+        # Исполненная сделка попадает в леджер и метрики; столбцы реестра правятся точечно
+        in_sync = self._positions_version == self.ledger.version
+        if side == BUY:
+            trade = self.ledger.buy(symbol, amount, notional, timestamp=self.clock.time_ns())
+            self.metrics.record_trade(None)
+        else:
+            trade = self.ledger.sell(symbol, amount, notional, timestamp=self.clock.time_ns())
+            self.metrics.record_trade(trade['pnl'])
+        if in_sync:
+            i = self.registry.ids[symbol]
+            self.registry.position[i] = self.ledger.position(symbol)
+            self.registry.cost[i] = self.ledger.basis.cost.get(symbol, 0.0)
+            self._positions_version = self.ledger.version
+        return trade
+
+    def lot(self, symbol, amount):
+        # Количество вниз к лоту монеты; меньше одного лота — ошибка
+        if amount <= 0:
+            raise ValueError(amount)
+        amount = self.registry.round_quantity(symbol, amount)
+        if amount <= 0:
+            raise LedgerError("Количество меньше минимального лота!")
+        return amount
+
+    def buy(self, symbol, amount, owner='gui'):
+        amount = self.lot(symbol, amount)
+
+        with self.lock:
+            self.exchange.ensure_liquidity(symbol, self.prices[symbol])
+            cost = self.exchange.book(symbol).quote_cost(BUY, amount)
+            if cost is None or cost > self.ledger.available_cash():
+                raise LedgerError("Недостаточно средств!")
+
+            amount, cost = self.execute_order(symbol, BUY, amount, owner)
+            return self.settle(symbol, BUY, amount, cost)
+
+    def sell(self, symbol, amount, owner='gui'):
+        amount = self.lot(symbol, amount)
+
+        with self.lock:
+            if self.ledger.available(symbol) < amount - 1e-12:
+                raise LedgerError("Недостаточно токенов!")
+
+            amount, revenue = self.execute_order(symbol, SELL, amount, owner)
+            return self.settle(symbol, SELL, amount, revenue)
+
+    def trade(self, account, symbol, side, amount):
+        # Рыночная заявка от счёта из реестра; возвращает (исполнено, сумма)
+        amount = self.lot(symbol, amount)
+
+        accounts = self.accounts
+        with self.lock:
+            row = accounts.row(account)
+            if side == BUY:
+                self.exchange.ensure_liquidity(symbol, self.prices[symbol])
+                cost = self.exchange.book(symbol).quote_cost(BUY, amount)
+                if cost is None or cost > accounts.balances[row]:
+                    raise LedgerError("Недостаточно средств!")
+            elif accounts.position(row, symbol) < amount:
+                raise LedgerError("Недостаточно токенов!")
+
+            filled, notional = self.execute_order(symbol, side, amount, owner='account:' + accounts.names[row])
+            if side == BUY:
+                accounts.buy(row, symbol, filled, notional)
+            else:
+                accounts.sell(row, symbol, filled, notional)
+            return filled, notional
+
+    def run(self, ticks, on_tick=None):
+        # Ускоренный режим: виртуальные часы сдвигаются на tick_interval без ожидания
+        if not isinstance(self.clock, VirtualClock):
+            raise ValueError("Ускоренный прогон требует VirtualClock")
+        if on_tick is None:
+            step_ns = int(round(self.tick_interval * 1e9))
+            while ticks > 0:
+                n = min(ticks, BATCH_TICKS)
+                path = self.engine.simulate(n)
+                times = self.clock.time_ns() + step_ns * np.arange(1, n + 1, dtype=np.int64)
+                self.clock.set_time_ns(times[-1])
+                self.advance(path, times)
+                ticks -= n
+            return
+        for _ in range(ticks):
+            self.clock.advance(self.tick_interval)
+            self.tick()
+            on_tick(self)
+
+    def replay(self, times, prices, on_tick=None):
+        # Повтор записи: times — метки в нс, prices — матрица (тики × engine.symbols)
+        if not isinstance(self.clock, VirtualClock):
+            raise ValueError("Повтор тиков требует VirtualClock")
+        if on_tick is None:
+            times = np.asarray(times, dtype=np.int64)
+            prices = np.asarray(prices, dtype=np.float64)
+            for start in range(0, len(times), BATCH_TICKS):
+                path = prices[start:start + BATCH_TICKS]
+                chunk = times[start:start + BATCH_TICKS]
+                self.clock.set_time_ns(chunk[-1])
+                self.engine.load_path(path)
+                self.advance(path, chunk)
+            return
+        for timestamp, row in zip(times, prices):
+            self.clock.set_time_ns(timestamp)
+            self.tick(row)
+            on_tick(self)
+
+    def reset(self, balance=None):
+        if balance is not None:
+            self.start_balance = balance
+        with self.lock:
+            for handler in self.reset_handlers:
+                handler()
+            self.ledger.reset(self.start_balance)
+        self.metrics = self.new_metrics()
+
+    def state(self):
+        return {
+            'engine': self.engine.state(),
+            'ledger': self.ledger.state(),
+            'metrics': self.metrics.state(),
+        }
+
+    def restore(self, state, history, candles, accounts=None):
+        # Реестр счетов сохраняется отдельно от JSON-состояния, столбцами .npy
+        self.history = history
+        self.candles = candles
+        self.ledger.restore(state['ledger'])
+        self.metrics = StreamingMetrics.from_state(state['metrics'])
+        if accounts is not None:
+            if accounts.symbols != self.engine.symbols:
+                accounts = accounts.remap(self.engine.symbols)
+            self.accounts = accounts
+            self.accounts.mark_to_market(self.engine.prices)
@@ -0,0 +1,80 @@
+import json
+import os
+import shutil
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from price_history import PriceHistory
+from candles import CandleAggregator
+from accounts import AccountRegistry
+
+FORMAT_VERSION = 5
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+# Каждое сохранение пишется в новое поколение gen-NNNNNN, затем файл CURRENT
+# атомарно переключается на него. Старые поколения удаляются по возможности:
+# на Windows поколение, открытое через memmap, удалится при следующем запуске.
+
+def current_generation(root):
+    pointer = Path(root) / 'CURRENT'
+    if not pointer.exists():
+        return None
+    return pointer.read_text(encoding='utf-8').strip()
+
+
+def save_snapshot(root, state, history, candles, lock=None, accounts=None):
+    # С lock состояние (dict или функция, которая его вернёт) и массивы истории и свечей
+    # снимаются под одной блокировкой прямо из живых буферов, без копий; JSON и
+    # переключение поколения идут уже без неё
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    current = current_generation(root)
+    number = int(current.split('-')[1]) + 1 if current else 1
+    name = f"gen-{number:06d}"
+    tmp = root / f".{name}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+
+    with lock if lock is not None else nullcontext():
+        meta = {
+            'format': FORMAT_VERSION,
+            'saved_at': time.time_ns(),
+            'state': state() if callable(state) else state,
+            'history': history.save(tmp),
+            'candles': candles.save(tmp),
+            'accounts': accounts.save(tmp) if accounts is not None else None,
+        }
+    (tmp / 'state.json').write_text(json.dumps(meta, ensure_ascii=False), encoding='utf-8')
+    tmp.rename(root / name)
+
+    pointer_tmp = root / 'CURRENT.tmp'
+    pointer_tmp.write_text(name, encoding='utf-8')
+    os.replace(pointer_tmp, root / 'CURRENT')
+
+    for old in root.glob('gen-*'):
+        if old.name != name:
+            shutil.rmtree(old, ignore_errors=True)
+    return root / name
+
+
+def load_snapshot(root, mmap_mode='c'):
+    # Возвращает (state, history, candles, accounts) или None, если сохранений ещё нет
+    name = current_generation(root)
+    if name is None:
+        return None
+
+    directory = Path(root) / name
+    meta = json.loads((directory / 'state.json').read_text(encoding='utf-8'))
+    if meta.get('format') != FORMAT_VERSION:
+        raise SnapshotError(f"Неподдерживаемая версия сохранения: {meta.get('format')}")
+
+    history = PriceHistory.load(directory, meta['history'], mmap_mode=mmap_mode)
+    candles = CandleAggregator.load(directory, meta['candles'], mmap_mode=mmap_mode)
+    accounts = AccountRegistry.load(directory, meta['accounts']) if meta['accounts'] else None
+    return meta['state'], history, candles, accounts
@@ -0,0 +1,188 @@
+from collections import namedtuple
+
+import numpy as np
+
+from order_book import BUY, SELL, MARKET, OrderError
+
+Fill = namedtuple('Fill', 'symbol side qty price notional')
+
+
+class Strategy:
+    # Базовый класс стратегии. on_tick получает контекст с видами на массивы цен и позиций
+    # и ставит заявки в пакет; после всех стратегий пакет исполняется без диалогов.
+
+    def on_start(self, ctx):
+        pass
+
+    def on_tick(self, ctx):
+        pass
+
+    def on_fill(self, ctx, fill):
+        pass
+
+
+class StrategyContext:
+    # Счёт одной стратегии: свои деньги и вектор позиций в порядке engine.symbols
+
+    def __init__(self, name, symbols, index, balance):
+        self.name = name
+        self.symbols = symbols
+        self.index = index
+        self.start_balance = balance
+        self.cash = balance
+        self.positions = np.zeros(len(symbols))
+        self.prices = None
+        self.prev_prices = None
+        self.tick = 0
+        self.orders = []
+
+        self.fills = 0
+        self.rejected = 0
+
+    def buy(self, symbol, qty):
+        self.orders.append((self.index[symbol], BUY, qty))
+
+    def sell(self, symbol, qty):
+        self.orders.append((self.index[symbol], SELL, qty))
+
+    def submit(self, quantities):
+        # Пакетная заявка вектором по всем монетам: > 0 — купить, < 0 — продать, 0 — пропустить
+        for column in np.flatnonzero(quantities):
+            qty = float(quantities[column])
+            self.orders.append((int(column), BUY if qty > 0 else SELL, abs(qty)))
+
+    @property
+    def equity(self):
+        return self.cash + float(self.positions @ self.prices)
+
+
+class StrategyRunner:
+    # Запускает много стратегий рядом на одном движке и одной бирже: sim.run(n, on_tick=runner.on_tick)
+
+    def __init__(self, sim, balance=10000.0):
+        self.sim = sim
+        self.balance = balance
+        self.strategies = []
+        self.evaluations = 0
+        self.orders_executed = 0
+
+        prices = sim.engine.prices.view()
+        prices.flags.writeable = False
+        prev_prices = sim.engine.prev_prices.view()
+        prev_prices.flags.writeable = False
+        self._prices = prices
+        self._prev_prices = prev_prices
+
+    def add(self, strategy, name=None, balance=None):
+        name = name or f"{type(strategy).__name__}-{len(self.strategies) + 1}"
+        engine = self.sim.engine
+        ctx = StrategyContext(name, engine.symbols, engine.index,
+                              self.balance if balance is None else balance)
+        ctx.prices = self._prices
+        ctx.prev_prices = self._prev_prices
+        self.strategies.append((strategy, ctx))
+        strategy.on_start(ctx)
+        return ctx
+
+    def on_tick(self, sim=None):
+        tick = self.sim.engine.tick_count
+        for strategy, ctx in self.strategies:
+            ctx.tick = tick
+            strategy.on_tick(ctx)
+        self.evaluations += len(self.strategies)
+        self.flush()
+
+    def flush(self):
+        # Пакет заявок всех стратегий за тик: ликвидность котируется один раз на монету
+        exchange = self.sim.exchange
+        symbols = self.sim.engine.symbols
+        quoted = set()
+
+        # Биржа общая с GUI и серверами API: весь пакет исполняется под блокировкой симулятора
+        with self.sim.lock:
+            prices = self.sim.engine.prices
+            for strategy, ctx in self.strategies:
+                orders, ctx.orders = ctx.orders, []
+                for column, side, qty in orders:
+                    symbol = symbols[column]
+                    if column not in quoted:
+                        exchange.ensure_liquidity(symbol, float(prices[column]))
+                        quoted.add(column)
+
+                    if qty <= 0 or (side == SELL and ctx.positions[column] < qty):
+                        ctx.rejected += 1
+                        continue
+                    if side == BUY:
+                        cost = exchange.book(symbol).quote_cost(BUY, qty)
+                        if cost is None or cost > ctx.cash:
+                            ctx.rejected += 1
+                            continue
+
+                    try:
+                        _, fills, remaining = exchange.submit(symbol, side, qty, order_type=MARKET,
+                                                              owner=ctx.name)
+                    except OrderError:
+                        ctx.rejected += 1
+                        continue
+
+                    filled = qty - remaining
+                    notional = sum(price * amount for _, _, _, price, amount in fills)
+                    if side == BUY:
+                        ctx.cash -= notional
+                        ctx.positions[column] += filled
+                    else:
+                        ctx.cash += notional
+                        ctx.positions[column] -= filled
+                    ctx.fills += 1
+                    self.orders_executed += 1
+                    strategy.on_fill(ctx, Fill(symbol, side, filled,
+                                               notional / filled if filled else 0.0, notional))
+
+    def results(self):
+        return {ctx.name: {'equity': ctx.equity, 'cash': ctx.cash, 'fills': ctx.fills,
+                           'rejected': ctx.rejected}
+                for _, ctx in self.strategies}
+
+
+class MovingAverageCross(Strategy):
+    # Пересечение быстрой и медленной EMA, считается сразу по всем монетам вектором
+
+    def __init__(self, fast=10, slow=40, notional=100.0):
+        self.fast = 2.0 / (fast + 1)
+        self.slow = 2.0 / (slow + 1)
+        self.notional = notional
+
+    def on_start(self, ctx):
+        self.ema_fast = ctx.prices.copy()
+        self.ema_slow = ctx.prices.copy()
+        self.above = np.zeros(len(ctx.prices), dtype=bool)
+
+    def on_tick(self, ctx):
+        prices = ctx.prices
+        self.ema_fast += self.fast * (prices - self.ema_fast)
+        self.ema_slow += self.slow * (prices - self.ema_slow)
+        above = self.ema_fast > self.ema_slow
+
+        crossed_up = above & ~self.above
+        crossed_down = ~above & self.above & (ctx.positions > 0)
+        self.above = above
+        if crossed_up.any() or crossed_down.any():
+            quantities = np.where(crossed_up, self.notional / prices, 0.0)
+            quantities[crossed_down] = -ctx.positions[crossed_down]
+            ctx.submit(quantities)
+
+
+class MeanReversion(Strategy):
+    # Покупает после резкого падения за тик, продаёт всю позицию после такого же роста
+
+    def __init__(self, threshold=0.03, notional=100.0):
+        self.threshold = threshold
+        self.notional = notional
+
+    def on_tick(self, ctx):
+        change = ctx.prices / ctx.prev_prices - 1
+        quantities = np.where(change < -self.threshold, self.notional / ctx.prices, 0.0)
+        exit_mask = (change > self.threshold) & (ctx.positions > 0)
+        quantities[exit_mask] = -ctx.positions[exit_mask]
+        if quantities.any():
+            ctx.submit(quantities)
@@ -0,0 +1,217 @@
+import csv
+import json
+from collections.abc import Mapping
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_PRECISION = 8
+
+
+class SymbolRegistry:
+    # Тикеры интернируются в плотные целые id (порядок добавления), все поля монет —
+    # выровненные столбцы NumPy: цена, позиция, себестоимость, шаг цены, лот, точность.
+    # Движок работает прямо со столбцом price, поэтому набор монет фиксируется
+    # до создания MarketEngine.
+
+    def __init__(self, capacity=16):
+        self.tickers = []
+        self.ids = {}
+        self.count = 0
+        self._allocate(max(1, capacity))
+
+    def _allocate(self, capacity):
+        self._price = np.zeros(capacity)
+        self._position = np.zeros(capacity)
+        self._cost = np.zeros(capacity)
+        self._tick_size = np.zeros(capacity)
+        self._lot_size = np.zeros(capacity)
+        self._precision = np.full(capacity, DEFAULT_PRECISION, dtype=np.int8)
+
+    def _grow(self, needed):
+        capacity = len(self._price)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        old = (self._price, self._position, self._cost, self._tick_size, self._lot_size, self._precision)
+        self._allocate(capacity)
+        for new, data in zip((self._price, self._position, self._cost, self._tick_size,
+                              self._lot_size, self._precision), old):
+            new[:self.count] = data[:self.count]
+
+    # Столбцы длиной ровно count; это виды, запись в них меняет реестр
+    @property
+    def price(self):
+        return self._price[:self.count]
+
+    @property
+    def position(self):
+        return self._position[:self.count]
+
+    @property
+    def cost(self):
+        return self._cost[:self.count]
+
+    @property
+    def tick_size(self):
+        return self._tick_size[:self.count]
+
+    @property
+    def lot_size(self):
+        return self._lot_size[:self.count]
+
+    @property
+    def precision(self):
+        return self._precision[:self.count]
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, ticker):
+        return ticker in self.ids
+
+    def id(self, ticker):
+        return self.ids[ticker]
+
+    def add(self, ticker, price, tick_size=0.0, lot_size=0.0, precision=DEFAULT_PRECISION):
+        # Повторный тикер возвращает прежний id
+        existing = self.ids.get(ticker)
+        if existing is not None:
+            return existing
+        return self.add_many([ticker], [price], [tick_size], [lot_size], [precision])[0]
+
+    def add_many(self, tickers, prices, tick_size=None, lot_size=None, precision=None):
+        tickers = [str(t) for t in tickers]
+        if len(set(tickers)) != len(tickers) or any(t in self.ids for t in tickers):
+            raise ValueError("Повторяющиеся тикеры")
+        first, n = self.count, len(tickers)
+        self._grow(first + n)
+        rows = slice(first, first + n)
+        self._price[rows] = prices
+        if tick_size is not None:
+            self._tick_size[rows] = tick_size
+        if lot_size is not None:
+            self._lot_size[rows] = lot_size
+        if precision is not None:
+            self._precision[rows] = precision
+        for i, ticker in enumerate(tickers, first):
+            self.ids[ticker] = i
+        self.tickers.extend(tickers)
+        self.count += n
+        return list(range(first, first + n))
+
+    @classmethod
+    def from_prices(cls, prices):
+        registry = cls(capacity=len(prices))
+        registry.add_many(list(prices), list(prices.values()))
+        return registry
+
+    @classmethod
+    def load(cls, path):
+        # CSV с заголовком symbol,price[,tick_size,lot_size,precision] или JSON:
+        # список объектов с теми же полями либо {"symbols": [...]}
+        path = Path(path)
+        if path.suffix.lower() == '.csv':
+            with open(path, newline='', encoding='utf-8') as f:
+                rows = list(csv.DictReader(f))
+        else:
+            with open(path, encoding='utf-8') as f:
+                rows = json.load(f)
+            if isinstance(rows, dict):
+                rows = rows['symbols']
+
+        registry = cls(capacity=len(rows))
+        registry.add_many(
+            [row['symbol'] for row in rows],
+            [float(row['price']) for row in rows],
+            [float(row.get('tick_size') or 0.0) for row in rows],
+            [float(row.get('lot_size') or 0.0) for row in rows],
+            [int(row.get('precision') or DEFAULT_PRECISION) for row in rows],
+        )
+        return registry
+
+    def save(self, path):
+        path = Path(path)
+        fields = ('symbol', 'price', 'tick_size', 'lot_size', 'precision')
+        columns = zip(self.tickers, self.price.tolist(), self.tick_size.tolist(),
+                      self.lot_size.tolist(), self.precision.tolist())
+        if path.suffix.lower() == '.csv':
+            with open(path, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(fields)
+                writer.writerows(columns)
+        else:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'symbols': [dict(zip(fields, row)) for row in columns]}, f)
+
+    def metadata(self):
+        # Только то, что не выводится из цен: для сохранения вместе с движком
+        return {
+            'tick_size': self.tick_size.tolist(),
+            'lot_size': self.lot_size.tolist(),
+            'precision': self.precision.tolist(),
+        }
+
+    def set_metadata(self, meta):
+        self.tick_size[:] = meta['tick_size']
+        self.lot_size[:] = meta['lot_size']
+        self.precision[:] = meta['precision']
+
+    def round_prices(self, values, ids=None):
+        # Цены к шагу монеты; монеты без шага не трогаются
+        ticks = self.tick_size if ids is None else self.tick_size[ids]
+        stepped = np.round(values / np.where(ticks > 0, ticks, 1.0)) * ticks
+        return np.where(ticks > 0, stepped, values)
+
+    def round_price(self, ticker, price):
+        tick = self._tick_size[self.ids[ticker]]
+        return round(round(price / tick) * tick, 12) if tick > 0 else price
+
+    def round_quantity(self, ticker, qty):
+        # Количество вниз к целому числу лотов
+        lot = self._lot_size[self.ids[ticker]]
+        if lot <= 0:
+            return qty
+        return round(float(np.floor(qty / lot + 1e-9)) * lot, 12)
+
+    def format_price(self, ticker, price=None):
+        i = self.ids[ticker]
+        value = self._price[i] if price is None else price
+        return f"{value:,.{int(self._precision[i])}f}"
+
+    def sync_positions(self, positions, basis=None):
+        # Полная пересборка столбцов позиций и себестоимости из словарей леджера
+        self.position[:] = 0.0
+        self.cost[:] = 0.0
+        for ticker, amount in positions.items():
+            i = self.ids.get(ticker)
+            if i is not None:
+                self._position[i] = amount
+                if basis is not None:
+                    self._cost[i] = basis.cost.get(ticker, 0.0)
+
+    def mark_to_market(self):
+        return float(self.position @ self.price)
+
+    def price_map(self):
+        return PriceMap(self)
+
+
+class PriceMap(Mapping):
+    # Словарь цен только для чтения поверх столбца price: тик не пересобирает dict
+
+    __slots__ = ('registry',)
+
+    def __init__(self, registry):
+        self.registry = registry
+
+    def __getitem__(self, ticker):
+        registry = self.registry
+        return float(registry._price[registry.ids[ticker]])
+
+    def __iter__(self):
+        return iter(self.registry.tickers)
+
+    def __len__(self):
+        return self.registry.count
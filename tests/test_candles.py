@@ -0,0 +1,111 @@
+import numpy as np
+import pytest
+
+from candles import CandleAggregator, CandleSeries, lttb, minmax_decimate
+from clock import VirtualClock
+from gateway import MarketDataGateway
+from market_engine import MarketEngine
+from simulator import Simulator
+from web import HttpError
+
+SECOND = 1_000_000_000
+
+
+def test_fill_before_first_tick_opens_its_own_bucket():
+    series = CandleSeries(2, SECOND, capacity=8)
+    series.update(np.array([10.0, 20.0]), SECOND // 2)
+    series.add_volume(1, 3.0, SECOND + 100)
+
+    # Сделка в новой секунде не должна попасть в объём прошлой свечи
+    assert len(series) == 2
+    assert series.volume[series.pos].tolist() == [0.0, 3.0]
+    assert series.open[series.pos].tolist() == [10.0, 20.0]
+    assert series.ticks[series.pos] == 0
+
+    series.update(np.array([11.0, 19.0]), SECOND + 500)
+    candle = series.select(1)
+    assert candle['volume'].tolist() == [0.0, 3.0]
+    assert candle['high'].tolist() == [20.0, 20.0] and candle['low'].tolist() == [20.0, 19.0]
+    assert series.ticks[series.pos] == 1
+
+
+def test_late_fill_goes_to_its_older_bucket():
+    series = CandleSeries(1, SECOND, capacity=2)
+    for i in range(3):
+        series.update(np.array([float(i)]), i * SECOND)
+    series.add_volume(0, 1.0, SECOND + 5)
+    # Корзина 0 уже вытеснена из кольца: объём теряется, а не падает в чужую свечу
+    series.add_volume(0, 2.0, 5)
+    assert series.select(0)['volume'].tolist() == [1.0, 0.0]
+
+
+def test_simulator_attributes_fill_volume_by_clock():
+    clock = VirtualClock()
+    sim = Simulator(MarketEngine(seed=1), clock=clock)
+    sim.tick()
+    clock.advance(1.5)
+    sim.buy('BTC', 0.1)
+
+    seconds = sim.candles.candles('BTC', '1s')
+    assert seconds['start'].tolist() == [0, SECOND]
+    assert seconds['volume'][0] == 0.0 and seconds['volume'][1] > 0
+    assert sim.candles.candles('BTC', '1m')['volume'].tolist() == [seconds['volume'][1]]
+
+
+def random_walk(ticks, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100 + np.cumsum(rng.normal(0, 1, (ticks, 2)), axis=0)
+
+
+def test_minmax_decimation_keeps_extremes_in_time_order():
+    path = random_walk(1000)
+    x = np.arange(1000, dtype=np.int64)
+    out_x, out_y = minmax_decimate(x, path[:, 0], path[:, 0], 100)
+
+    assert len(out_x) == 100
+    assert np.all(np.diff(out_x) >= 0)
+    assert out_y.min() == path[:, 0].min() and out_y.max() == path[:, 0].max()
+
+
+def test_lttb_keeps_endpoints_and_point_count():
+    path = random_walk(500)
+    x = np.arange(500, dtype=np.int64)
+    out_x, out_y = lttb(x, path[:, 1], 50)
+
+    assert len(out_x) == 50
+    assert out_x[0] == 0 and out_x[-1] == 499
+    assert np.all(np.diff(out_x) > 0)
+    assert np.array_equal(out_y, path[out_x, 1])
+
+
+def test_query_picks_coarser_resolution_for_long_ranges():
+    aggregator = CandleAggregator(['BTC', 'ETH'], capacity=4000)
+    times = np.arange(3600, dtype=np.int64) * SECOND
+    aggregator.extend(random_walk(3600), times)
+
+    # Час по секундам — 3600 свечей, больше 4 × 100: берутся минутные
+    x, y = aggregator.query('BTC', 0, times[-1], 100)
+    assert len(x) <= 100
+    assert set(np.asarray(x) % (60 * SECOND)) == {0}
+    x, y = aggregator.query('BTC', 0, 200 * SECOND, 100, method='lttb')
+    assert len(x) == 100
+
+
+def test_gateway_history_serves_decimated_candles():
+    clock = VirtualClock()
+    sim = Simulator(MarketEngine(seed=1), clock=clock)
+    for _ in range(600):
+        clock.advance(1.0)
+        sim.tick()
+    gateway = MarketDataGateway(sim)
+
+    body = gateway.history({'symbol': 'BTC', 'points': '60'})
+    assert body['symbol'] == 'BTC' and len(body['t']) == len(body['p']) <= 60
+    assert max(body['p']) == pytest.approx(sim.history.prices()[sim.engine.index['BTC']].max())
+
+    with pytest.raises(HttpError) as error:
+        gateway.history({'symbol': 'NOPE'})
+    assert error.value.status == 404
+    with pytest.raises(HttpError) as error:
+        gateway.history({'symbol': 'BTC', 'points': 'many'})
+    assert error.value.status == 400
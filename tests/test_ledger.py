@@ -0,0 +1,93 @@
+import pytest
+
+from cost_basis import AVERAGE, FIFO, CostBasis
+from ledger import Ledger, LedgerError
+
+
+def test_fifo_sell_consumes_oldest_lots_first():
+    basis = CostBasis(FIFO)
+    basis.buy('BTC', 1.0, 100.0)
+    basis.buy('BTC', 1.0, 200.0)
+    basis.buy('BTC', 1.0, 200.0)
+
+    # Первый лот целиком и половина слитого лота по 200
+    assert basis.sell('BTC', 1.5, 300.0) == pytest.approx(450.0 - 200.0)
+    assert [list(lot) for lot in basis.lots['BTC']] == [[1.5, 200.0]]
+    assert basis.average_price('BTC') == pytest.approx(200.0)
+    assert basis.total_cost == pytest.approx(300.0)
+
+
+def test_average_sell_releases_proportional_cost():
+    basis = CostBasis(AVERAGE)
+    basis.buy('BTC', 1.0, 100.0)
+    basis.buy('BTC', 1.0, 200.0)
+
+    assert basis.sell('BTC', 1.5, 300.0) == pytest.approx(450.0 - 225.0)
+    assert basis.lots == {}
+    assert basis.average_price('BTC') == pytest.approx(150.0)
+    assert basis.total_cost == pytest.approx(75.0)
+
+
+@pytest.mark.parametrize('method', [FIFO, AVERAGE])
+def test_realized_and_unrealized_pnl_add_up(method):
+    basis = CostBasis(method)
+    basis.buy('ETH', 2.0, 100.0)
+    basis.buy('ETH', 2.0, 150.0)
+    basis.sell('ETH', 1.0, 180.0)
+
+    # Реализованный плюс нереализованный равен выручке от всей позиции по рынку
+    market = 160.0
+    total = basis.realized_pnl + basis.unrealized('ETH', market)
+    assert total == pytest.approx(1.0 * 180.0 + 3.0 * market - 500.0)
+    assert basis.unrealized('ETH', market) == pytest.approx(3.0 * market - basis.cost['ETH'])
+
+    # Полная продажа закрывает позицию без остатка себестоимости
+    basis.sell('ETH', 3.0, market)
+    assert basis.qty == {} and basis.cost == {}
+    assert basis.total_cost == pytest.approx(0.0)
+    assert basis.realized_pnl == pytest.approx(total)
+
+
+def test_cost_basis_survives_state_round_trip():
+    basis = CostBasis(FIFO)
+    basis.buy('BTC', 1.0, 100.0)
+    basis.buy('BTC', 2.0, 120.0)
+    basis.sell('BTC', 0.5, 130.0)
+
+    restored = CostBasis.from_state(basis.state())
+    assert restored.sell('BTC', 2.0, 140.0) == pytest.approx(basis.sell('BTC', 2.0, 140.0))
+    assert restored.total_cost == pytest.approx(basis.total_cost)
+
+
+def test_apply_rejects_whole_batch_when_one_position_goes_negative():
+    ledger = Ledger(balance=1000.0)
+    ledger.buy('BTC', 1.0, 100.0)
+    before = ledger.state(), ledger.version
+
+    trade = {'type': 'buy', 'symbol': 'ETH', 'amount': 1.0, 'price': 50.0, 'timestamp': 1}
+    with pytest.raises(LedgerError):
+        ledger.apply(cash=-50.0, positions={'ETH': 1.0, 'BTC': -2.0}, trades=(trade,))
+    assert (ledger.state(), ledger.version) == before
+    assert ledger.position('ETH') == 0.0
+
+
+def test_failed_trade_leaves_balance_and_cost_basis_untouched():
+    ledger = Ledger(balance=100.0)
+    with pytest.raises(LedgerError):
+        ledger.buy('BTC', 1.0, 150.0)
+    with pytest.raises(LedgerError):
+        ledger.sell('BTC', 1.0, 150.0)
+
+    assert ledger.balance == 100.0
+    assert ledger.trades() == ()
+    assert ledger.basis.qty == {} and ledger.basis.realized_pnl == 0.0
+
+
+def test_ledger_sell_reports_realized_pnl():
+    ledger = Ledger(balance=1000.0)
+    ledger.buy('BTC', 2.0, 200.0)
+    trade = ledger.sell('BTC', 1.0, 150.0)
+
+    assert trade['pnl'] == pytest.approx(50.0)
+    assert ledger.balance == pytest.approx(950.0)
+    assert ledger.snapshot().trade_count == 2
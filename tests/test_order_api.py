@@ -0,0 +1,75 @@
+import pytest
+
+from clock import VirtualClock
+from ledger import LedgerError
+from market_engine import MarketEngine
+from order_api import OrderApi
+from simulator import Simulator
+
+
+def make_api(balance=10000.0):
+    sim = Simulator(MarketEngine(seed=1), clock=VirtualClock(), balance=balance)
+    api = OrderApi(sim)
+    # Без запуска сервера: только обработчики, которые start вешает на симулятор
+    sim.exchange.fill_handlers.append(api.on_fills)
+    sim.reset_handlers.append(api.cancel_all)
+    return sim, api
+
+
+def test_gui_trade_cannot_spend_cash_reserved_for_resting_buy():
+    sim, api = make_api()
+    price = round(sim.prices['BTC'] * 0.9, 2)
+    result = api.place({'symbol': 'BTC', 'side': 'buy', 'type': 'limit', 'qty': 0.2, 'price': price})
+    assert result['status'] == 'resting'
+    assert sim.ledger.reserved_cash == pytest.approx(0.2 * price)
+
+    with pytest.raises(LedgerError):
+        sim.buy('BTC', 0.05)
+    assert sim.ledger.balance == 10000.0
+
+
+def test_resting_sell_settles_after_gui_sells_free_coins():
+    sim, api = make_api()
+    sim.buy('ETH', 0.5)
+    price = sim.prices['ETH'] * 1.01
+    result = api.place({'symbol': 'ETH', 'side': 'sell', 'type': 'limit', 'qty': 0.4, 'price': price})
+    assert sim.ledger.reserved('ETH') == pytest.approx(0.4)
+
+    with pytest.raises(LedgerError):
+        sim.sell('ETH', 0.2)
+    sim.sell('ETH', 0.1)
+
+    # Рынок вырос выше лимита: заявка исполняется и рассчитывается в леджере
+    sim.engine.prices[sim.engine.index['ETH']] *= 1.05
+    sim.buy('ETH', 0.01)
+    assert result['id'] not in api.open_orders
+    assert sim.ledger.position('ETH') == pytest.approx(0.01)
+    assert sim.ledger.reserved() == {}
+
+
+def test_reset_cancels_api_orders_and_reservations():
+    sim, api = make_api()
+    price = round(sim.prices['BTC'] * 0.9, 2)
+    api.place({'symbol': 'BTC', 'side': 'buy', 'type': 'limit', 'qty': 0.1, 'price': price})
+    sim.reset(10000.0)
+    assert api.open_orders == {}
+    assert sim.ledger.reserved_cash == 0.0
+    assert not any(order.owner == api.owner for order in sim.exchange.orders.values())
+
+
+def test_resting_limit_fills_on_price_tick_without_new_orders():
+    sim, api = make_api(balance=100000.0)
+    price = round(sim.prices['BTC'] * 0.98, 2)
+    result = api.place({'symbol': 'BTC', 'side': 'buy', 'type': 'limit', 'qty': 0.5, 'price': price})
+    assert result['status'] == 'resting'
+
+    # Никаких новых заявок по BTC: исполнить лежащую покупку должен сам тик
+    i = sim.engine.index['BTC']
+    sim.tick(sim.engine.prices * 1.0)
+    assert result['id'] in api.open_orders
+    prices = sim.engine.prices.copy()
+    prices[i] = price * 0.97
+    sim.tick(prices)
+    assert result['id'] not in api.open_orders
+    assert sim.ledger.position('BTC') == pytest.approx(0.5)
+    assert sim.ledger.reserved_cash == pytest.approx(0.0, abs=1e-6)
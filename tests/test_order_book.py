@@ -0,0 +1,40 @@
+from order_book import MatchingEngine, OrderBook, Order, BUY, SELL, LIMIT
+
+
+def test_resting_limit_fills_when_market_maker_quote_reaches_it():
+    engine = MatchingEngine()
+    engine.ensure_liquidity('BTC', 100.0)
+    handled = []
+    engine.fill_handlers.append(lambda *args: handled.append(args))
+
+    order_id, fills, remaining = engine.submit('BTC', BUY, 1.0, 99.0, LIMIT, owner='api')
+    assert not fills and remaining == 1.0
+
+    # Рынок упал: новая котировка продавца ниже лежащей покупки и должна её исполнить
+    engine.ensure_liquidity('BTC', 90.0)
+    book = engine.book('BTC')
+    assert order_id not in engine.orders
+    assert book.best_bid() < book.best_ask()
+    _, side, owner, maker_fills = handled[-1]
+    assert side == SELL and maker_fills[0][1] == order_id and maker_fills[0][2] == 'api'
+    assert maker_fills[0][3] == 99.0 and maker_fills[0][4] == 1.0
+
+
+def test_empty_levels_do_not_accumulate_in_heaps():
+    engine = MatchingEngine()
+    for i in range(20000):
+        engine.ensure_liquidity('BTC', 100.0 + (i % 500) * 0.01)
+    book = engine.book('BTC')
+    assert len(book._bid_heap) <= 2 * len(book.bids) + 16
+    assert len(book._ask_heap) <= 2 * len(book.asks) + 16
+    assert book.best_bid() == max(book.bids) and book.best_ask() == min(book.asks)
+
+
+def test_best_prices_skip_removed_levels():
+    book = OrderBook('BTC')
+    orders = [Order(i, 'BTC', SELL, 100.0 + i, 1.0, None) for i in range(5)]
+    for order in orders:
+        book.add(order)
+    book.remove(orders[0])
+    book.remove(orders[1])
+    assert book.best_ask() == 102.0
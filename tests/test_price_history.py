@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from price_history import PriceHistory
+
+
+def filled(capacity, ticks, seed=0):
+    rng = np.random.default_rng(seed)
+    history = PriceHistory(['BTC', 'ETH'], capacity=capacity)
+    history.extend(rng.normal(100, 1, (ticks, 2)), np.arange(ticks, dtype=np.int64))
+    return history
+
+
+@pytest.mark.parametrize('ticks', [3, 10, 25])
+def test_snapshot_keeps_only_live_window(tmp_path, ticks):
+    history = filled(10, ticks)
+    meta = history.save(tmp_path)
+    assert np.load(tmp_path / 'history_prices.npy').shape == (2, min(ticks, 10))
+
+    restored = PriceHistory.load(tmp_path, meta, mmap_mode='r')
+    assert np.array_equal(restored.prices(), history.prices())
+    assert np.array_equal(restored.times(), history.times())
+
+
+@pytest.mark.parametrize('mmap_mode', ['r', None])
+def test_restored_history_keeps_appending_like_the_original(tmp_path, mmap_mode):
+    history = filled(16, 40)
+    restored = PriceHistory.load(tmp_path, history.save(tmp_path), mmap_mode=mmap_mode)
+    rng = np.random.default_rng(1)
+    for i in range(40, 70):
+        prices = rng.normal(100, 1, 2)
+        history.append(prices, i)
+        restored.append(prices, i)
+        assert np.array_equal(restored.prices(last=3), history.prices(last=3))
+        assert np.array_equal(restored.latest(), history.latest())
+    assert np.array_equal(restored.prices(), history.prices())
+
+
+def test_resaving_restored_history_reads_old_points_from_disk(tmp_path):
+    history = filled(16, 16)
+    (tmp_path / 'a').mkdir()
+    restored = PriceHistory.load(tmp_path / 'a', history.save(tmp_path / 'a'), mmap_mode='r')
+    restored.append(np.array([1.0, 2.0]), 16)
+    history.append(np.array([1.0, 2.0]), 16)
+
+    (tmp_path / 'b').mkdir()
+    again = PriceHistory.load(tmp_path / 'b', restored.save(tmp_path / 'b'), mmap_mode='r')
+    assert np.array_equal(again.prices(), history.prices())
+    assert np.array_equal(again.times(), history.times())
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from ledger import Ledger
+from trade_journal import RECORD, JournalError, TradeJournal
+
+SYMBOLS = ['BTC', 'ETH', 'SOL']
+
+TRADES = [
+    ('BTC', 'buy', 1.0, 100.0),
+    ('ETH', 'buy', 2.0, 50.0),
+    ('BTC', 'sell', 0.5, 120.0),
+    ('SOL', 'buy', 3.0, 10.0),
+    ('ETH', 'sell', 2.0, 55.0),
+]
+
+
+def write_trades(path, trades=TRADES, batch=2):
+    journal = TradeJournal(path, SYMBOLS, batch=batch)
+    for i, (symbol, side, qty, price) in enumerate(trades):
+        journal.append(symbol, side, qty, price, timestamp_ns=i)
+    return journal
+
+
+def aggregates(journal):
+    return [journal.trade_count.copy(), journal.buy_qty.copy(), journal.sell_qty.copy(),
+            journal.buy_notional.copy(), journal.sell_notional.copy()]
+
+
+def test_reopened_journal_rebuilds_aggregates_from_disk(tmp_path):
+    path = tmp_path / 'trades.journal'
+    journal = write_trades(path)
+    expected = aggregates(journal)
+    journal.close()
+
+    reopened = TradeJournal(path, SYMBOLS)
+    assert reopened.count == reopened.written == len(TRADES)
+    for rebuilt, original in zip(aggregates(reopened), expected):
+        assert np.allclose(rebuilt, original)
+    assert reopened.realized_cash() == pytest.approx(0.5 * 120.0 + 2.0 * 55.0 - 100.0 - 100.0 - 30.0)
+    assert list(reopened.records()['timestamp']) == list(range(len(TRADES)))
+    reopened.close()
+
+
+def test_reopened_journal_keeps_appending_after_old_records(tmp_path):
+    path = tmp_path / 'trades.journal'
+    write_trades(path, TRADES[:3]).close()
+    journal = write_trades(path, TRADES[3:])
+    journal.flush()
+
+    records = journal.records()
+    assert len(records) == len(TRADES)
+    assert [SYMBOLS[s] for s in records['symbol']] == [t[0] for t in TRADES]
+    assert journal.trade_count.tolist() == [2, 2, 1]
+    journal.close()
+
+
+def test_torn_tail_record_is_dropped_on_reopen(tmp_path):
+    path = tmp_path / 'trades.journal'
+    write_trades(path).close()
+    # Обрыв посреди записи: половина записи в конце файла
+    with open(path, 'ab') as f:
+        f.write(b'\1' * (RECORD.itemsize // 2))
+
+    journal = TradeJournal(path, SYMBOLS)
+    assert journal.count == len(TRADES)
+    assert journal.trade_count.sum() == len(TRADES)
+    journal.append('BTC', 'buy', 1.0, 1.0, timestamp_ns=99)
+    journal.flush()
+    assert journal.records()['timestamp'][-1] == 99
+    journal.close()
+
+
+def test_journal_refuses_changed_symbol_set(tmp_path):
+    path = tmp_path / 'trades.journal'
+    write_trades(path).close()
+    with pytest.raises(JournalError):
+        TradeJournal(path, ['ETH', 'BTC', 'SOL'])
+
+
+def test_ledger_reads_only_its_own_trades_from_reopened_journal(tmp_path):
+    path = tmp_path / 'trades.journal'
+    write_trades(path).close()
+
+    journal = TradeJournal(path, SYMBOLS)
+    ledger = Ledger(balance=1000.0, journal=journal)
+    ledger.buy('SOL', 2.0, 30.0, timestamp=100)
+
+    trades = ledger.trades()
+    assert len(trades) == 1 and trades['timestamp'][0] == 100
+    assert ledger.snapshot().trade_count == 1
+    assert journal.trade_count.tolist() == [2, 2, 2]
+    journal.close()
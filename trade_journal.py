@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+MAGIC = b'CSTJ'
+VERSION = 1
+HEADER_SIZE = 16
+
+RECORD = np.dtype([
+    ('timestamp', '<i8'),
+    ('price', '<f8'),
+    ('qty', '<f8'),
+    ('symbol', '<u4'),
+    ('side', 'i1'),
+    ('pad', 'V3'),
+])
+
+SIDES = {'buy': 1, 'sell': -1}
+
+
+class JournalError(ValueError):
+    pass
+
+
+class TradeJournal:
+    # Журнал сделок только на дозапись: записи фиксированной ширины копятся в пачке
+    # в памяти, фоновый поток сбрасывает пачки в файл и делает fsync не чаще fsync_interval.
+
+    def __init__(self, path, symbols, batch=4096, fsync_interval=1.0):
+        self.path = Path(path)
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.fsync_interval = fsync_interval
+
+        self._lock = threading.Condition()
+        self._batch = np.zeros(batch, dtype=RECORD)
+        self._spare = np.zeros(batch, dtype=RECORD)
+        self._pending = None
+        self._filled = 0
+        self._closed = False
+        self._error = None
+
+        n = len(self.symbols)
+        self.trade_count = np.zeros(n, dtype=np.int64)
+        self.buy_qty = np.zeros(n)
+        self.sell_qty = np.zeros(n)
+        self.buy_notional = np.zeros(n)
+        self.sell_notional = np.zeros(n)
+
+        self._open_file()
+        self.count = self.written
+
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        self._writer.start()
+
+    def _open_file(self):
+        symbols_path = self.path.with_suffix(self.path.suffix + '.symbols.json')
+        if self.path.exists() and self.path.stat().st_size >= HEADER_SIZE:
+            with open(self.path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+            if header[:4] != MAGIC:
+                raise JournalError(f"{self.path} не является журналом сделок")
+            version, record_size = np.frombuffer(header[4:12], dtype='<u4')
+            if version != VERSION or record_size != RECORD.itemsize:
+                raise JournalError(f"Неподдерживаемая версия журнала: {version}")
+            if symbols_path.exists():
+                stored = json.loads(symbols_path.read_text(encoding='utf-8'))
+                if stored != self.symbols[:len(stored)]:
+                    raise JournalError("Набор монет журнала не совпадает с текущим")
+
+            size = self.path.stat().st_size - HEADER_SIZE
+            self.written = size // RECORD.itemsize
+            self._file = open(self.path, 'r+b')
+            self._file.truncate(HEADER_SIZE + self.written * RECORD.itemsize)
+            self._file.seek(0, os.SEEK_END)
+            self._rebuild_aggregates()
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'w+b')
+            header = MAGIC + np.array([VERSION, RECORD.itemsize], dtype='<u4').tobytes()
+            self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+            self._file.flush()
+            self.written = 0
+
+        symbols_path.write_text(json.dumps(self.symbols, ensure_ascii=False), encoding='utf-8')
+        self._last_fsync = time.monotonic()
+
+    def _rebuild_aggregates(self):
+        records = self.records()
+        if not len(records):
+            return
+        n = len(self.symbols)
+        symbol = records['symbol']
+        notional = records['qty'] * records['price']
+        buys = records['side'] > 0
+        self.trade_count += np.bincount(symbol, minlength=n)[:n]
+        self.buy_qty += np.bincount(symbol[buys], records['qty'][buys], minlength=n)[:n]
+        self.sell_qty += np.bincount(symbol[~buys], records['qty'][~buys], minlength=n)[:n]
+        self.buy_notional += np.bincount(symbol[buys], notional[buys], minlength=n)[:n]
+        self.sell_notional += np.bincount(symbol[~buys], notional[~buys], minlength=n)[:n]
+
+    def append(self, symbol, side, qty, price, timestamp_ns=None):
+        symbol_id = self.symbol_ids[symbol]
+        sign = SIDES[side]
+        if timestamp_ns is None:
+            timestamp_ns = time.time_ns()
+
+        with self._lock:
+            if self._closed:
+                raise JournalError("Журнал закрыт")
+            self._batch[self._filled] = (timestamp_ns, price, qty, symbol_id, sign, b'')
+            self._filled += 1
+            self.count += 1
+            if self._filled == len(self._batch):
+                self._hand_off()
+
+        self.trade_count[symbol_id] += 1
+        if sign > 0:
+            self.buy_qty[symbol_id] += qty
+            self.buy_notional[symbol_id] += qty * price
+        else:
+            self.sell_qty[symbol_id] += qty
+            self.sell_notional[symbol_id] += qty * price
+
+    def _wait_writer(self):
+        # Вызывается под блокировкой: ждёт, пока писатель заберёт пачку. Ожидание идёт
+        # короткими отрезками, чтобы упавший поток писателя не подвесил вызывающего навсегда
+        while self._pending is not None:
+            if self._error is not None or not self._writer.is_alive():
+                raise JournalError(f"Поток записи журнала остановлен: {self._error}")
+            self._lock.wait(0.1)
+
+    def _hand_off(self):
+        # Вызывается под блокировкой: полная пачка уходит писателю, запись продолжается в запасную
+        self._wait_writer()
+        self._pending = self._batch[:self._filled]
+        self._batch, self._spare = self._spare, self._batch
+        self._filled = 0
+        self._lock.notify_all()
+
+    def _write_loop(self):
+        try:
+            self._write_batches()
+        except Exception as e:
+            with self._lock:
+                self._error = e
+                self._lock.notify_all()
+
+    def _write_batches(self):
+        while True:
+            with self._lock:
+                while self._pending is None and not self._closed:
+                    self._lock.wait(self.fsync_interval)
+                    if self._pending is None and self._filled:
+                        self._hand_off()
+                pending = self._pending
+                if pending is None and self._closed:
+                    return
+
+            self._file.write(pending.tobytes())
+            self._file.flush()
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+
+            with self._lock:
+                self.written += len(pending)
+                self._pending = None
+                self._lock.notify_all()
+
+    def flush(self):
+        with self._lock:
+            if self._filled:
+                self._hand_off()
+            self._wait_writer()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+
+    def close(self):
+        if self._closed:
+            return
+        try:
+            self.flush()
+        finally:
+            with self._lock:
+                self._closed = True
+                self._lock.notify_all()
+            self._writer.join()
+            self._file.close()
+
+    def records(self):
+        # Уже записанные на диск сделки как memmap: агрегаты по ним не держат всё в RAM
+        if not self.written:
+            return np.zeros(0, dtype=RECORD)
+        return np.memmap(self.path, dtype=RECORD, mode='r',
+                         offset=HEADER_SIZE, shape=(self.written,))
+
+    def realized_cash(self):
+        return float(self.sell_notional.sum() - self.buy_notional.sum())
@@ -0,0 +1,196 @@
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+from urllib.parse import urlsplit, parse_qs
+
+# Минимальные HTTP/1.1 и WebSocket (RFC 6455) поверх asyncio, только стандартная библиотека.
+# Серверы живут в своём потоке со своим циклом событий и не трогают цикл Tk.
+
+WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+WS_TEXT = 0x1
+WS_BINARY = 0x2
+WS_CLOSE = 0x8
+WS_PING = 0x9
+WS_PONG = 0xA
+
+MAX_BODY = 16 * 1024 * 1024
+
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+          409: 'Conflict', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Request:
+    __slots__ = ('method', 'path', 'query', 'headers', 'body')
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b'null')
+        except ValueError:
+            raise HttpError(400, "Некорректный JSON")
+
+    @property
+    def keep_alive(self):
+        return self.headers.get('connection', '').lower() != 'close'
+
+
+async def read_request(reader):
+    # None — клиент закрыл соединение между запросами
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HttpError(400, "Некорректная строка запроса")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise HttpError(400, "Некорректный Content-Length")
+    if length < 0:
+        raise HttpError(400, "Некорректный Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, "Слишком большой запрос")
+    body = await reader.readexactly(length) if length else b''
+
+    url = urlsplit(target)
+    query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+    return Request(method.upper(), url.path, query, headers, body)
+
+
+def response(status, body, content_type='application/json', keep_alive=True):
+    if not isinstance(body, (bytes, bytearray)):
+        body = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {STATUS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+def websocket_handshake(request):
+    key = request.headers.get('sec-websocket-key')
+    if request.headers.get('upgrade', '').lower() != 'websocket' or not key:
+        raise HttpError(400, "Ожидался запрос на WebSocket")
+    accept = base64.b64encode(hashlib.sha1(key.encode('latin-1') + WS_GUID).digest()).decode()
+    return ("HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('latin-1')
+
+
+def ws_frame(payload, opcode=WS_TEXT):
+    # Кадр сервера: один фрагмент, без маски
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    n = len(payload)
+    if n < 126:
+        head = struct.pack('!BB', 0x80 | opcode, n)
+    elif n < 65536:
+        head = struct.pack('!BBH', 0x80 | opcode, 126, n)
+    else:
+        head = struct.pack('!BBQ', 0x80 | opcode, 127, n)
+    return head + payload
+
+
+async def read_ws_frame(reader):
+    # Возвращает (opcode, payload); фрагменты склеиваются, маска клиента снимается
+    data = bytearray()
+    while True:
+        b1, b2 = await reader.readexactly(2)
+        opcode = b1 & 0x0F
+        n = b2 & 0x7F
+        if n == 126:
+            n = struct.unpack('!H', await reader.readexactly(2))[0]
+        elif n == 127:
+            n = struct.unpack('!Q', await reader.readexactly(8))[0]
+        if n > MAX_BODY:
+            raise HttpError(413, "Слишком большой кадр")
+        mask = await reader.readexactly(4) if b2 & 0x80 else None
+        payload = await reader.readexactly(n)
+        if mask and n:
+            key = (mask * (n // 4 + 1))[:n]
+            payload = (int.from_bytes(payload, 'little') ^ int.from_bytes(key, 'little')).to_bytes(n, 'little')
+        if opcode >= WS_CLOSE:
+            return opcode, payload
+        data += payload
+        if b1 & 0x80:
+            return opcode or WS_TEXT, bytes(data)
+
+
+class ServerThread:
+    # Цикл событий asyncio в отдельном потоке; handler(reader, writer) — обычная корутина
+
+    def __init__(self, handler, host='127.0.0.1', port=0, name='server'):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.name = name
+        self.loop = None
+        self.server = None
+        self._ready = threading.Event()
+        self._thread = None
+        self.error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(
+                asyncio.start_server(self.handler, self.host, self.port))
+            self.port = self.server.sockets[0].getsockname()[1]
+        except OSError as e:
+            self.error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self.server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+
+    def call(self, callback, *args):
+        # Потокобезопасная передача работы в цикл сервера
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    def stop(self):
+        if self.loop is not None and self._thread is not None and self._thread.is_alive():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)